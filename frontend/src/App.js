@@ -31,8 +31,10 @@ function App() {
       }, ...prev]);
     });
 
-    socket.on('new_packet', (packet) => {
-      const newPacket = {
+    // High-rate events arrive as batched frames: { events: [...], count }
+    // where count may exceed events.length when the server sampled the batch
+    socket.on('new_packet_batch', ({ events, count }) => {
+      const newPackets = events.map(packet => ({
         ...packet,
         id: Math.random().toString(36).substr(2, 9),
         packet_id: packet.packet_id,
@@ -40,69 +42,94 @@ function App() {
         status: packet.status,
         size: parseInt(packet.length) || 1024,
         timestamp: new Date().toISOString()
-      };
+      })).reverse();
+      const sampledBytes = newPackets.reduce((sum, p) => sum + p.size, 0);
+      const scale = newPackets.length ? count / newPackets.length : 0;
       
-      setPackets(prevPackets => [newPacket, ...prevPackets].slice(0, 100));
+      setPackets(prevPackets => [...newPackets, ...prevPackets].slice(0, 100));
       
       setStats(prev => ({
-        totalPackets: prev.totalPackets + 1,
+        totalPackets: prev.totalPackets + count,
         suspiciousPackets: prev.suspiciousPackets,
         maliciousPackets: prev.maliciousPackets,
         activeConnections: Math.max(10, prev.activeConnections + (Math.random() > 0.5 ? 1 : -1)),
         alerts: prev.alerts,
-        bandwidth: prev.bandwidth + (newPacket.size / 1024 / 1024)
+        bandwidth: prev.bandwidth + (sampledBytes * scale / 1024 / 1024)
       }));
     });
 
-    socket.on('classification', (cls) => {
-      const status = cls.status || 'normal';
-      const packetId = cls.packet_id;
-
-      // Update packet row if we can correlate
-      if (packetId) {
-        setPackets(prev => prev.map(p => {
-          if (p.packet_id && p.packet_id === packetId) {
-            return {
-              ...p,
-              status,
-              confidence: cls.confidence,
-              prediction: cls.prediction,
-              destination_port: cls.destination_port ?? p.destination_port,
-            };
-          }
-          return p;
-        }));
+    socket.on('classification_batch', ({ events }) => {
+      // Update packet rows we can correlate
+      const byPacketId = new Map();
+      events.forEach(cls => {
+        if (cls.packet_id) {
+          byPacketId.set(cls.packet_id, cls);
+        }
+      });
+      if (byPacketId.size === 0) {
+        return;
       }
-
-      // Update counters + alerts
-      if (status === 'suspicious' || status === 'malicious') {
-        setStats(prev => ({
-          ...prev,
-          suspiciousPackets: prev.suspiciousPackets + (status === 'suspicious' ? 1 : 0),
-          maliciousPackets: prev.maliciousPackets + (status === 'malicious' ? 1 : 0),
-          alerts: prev.alerts + 1,
-        }));
-
-        setAlerts(prev => {
-          const alert = {
-            id: packetId || Math.random().toString(36).substr(2, 9),
-            timestamp: new Date().toISOString(),
-            message: `${status.toUpperCase()} traffic detected from ${cls.src || 'unknown'} (port ${cls.destination_port ?? 'unknown'})`,
-            severity: status === 'malicious' ? 'high' : 'medium',
+      setPackets(prev => prev.map(p => {
+        const cls = p.packet_id && byPacketId.get(p.packet_id);
+        if (cls) {
+          return {
+            ...p,
+            status: cls.status || 'normal',
             confidence: cls.confidence,
-            packet_id: packetId,
+            prediction: cls.prediction,
+            destination_port: cls.destination_port ?? p.destination_port,
           };
-          return [alert, ...prev].slice(0, 50);
-        });
-      }
+        }
+        return p;
+      }));
     });
 
-    socket.on('system_log', (log) => {
-      const newLog = {
+    // Alerts are never batched or sampled
+    socket.on('new_alert', (alertData) => {
+      const status = alertData.status;
+      const packetId = alertData.packet_id;
+
+      setStats(prev => ({
+        ...prev,
+        suspiciousPackets: prev.suspiciousPackets + (status === 'suspicious' ? 1 : 0),
+        maliciousPackets: prev.maliciousPackets + (status === 'malicious' ? 1 : 0),
+        alerts: prev.alerts + 1,
+      }));
+
+      setAlerts(prev => {
+        const alert = {
+          id: packetId || Math.random().toString(36).substr(2, 9),
+          timestamp: new Date().toISOString(),
+          message: `${status.toUpperCase()} traffic detected from ${alertData.src || 'unknown'} (port ${alertData.destination_port ?? 'unknown'})`,
+          severity: status === 'malicious' ? 'high' : 'medium',
+          confidence: alertData.confidence,
+          packet_id: packetId,
+          alert_id: alertData.id,
+          count: alertData.count || 1,
+        };
+        return [alert, ...prev].slice(0, 50);
+      });
+    });
+
+    // Repeats of an open alert update its count instead of adding new alerts
+    const updateAggregate = (alertData) => {
+      setAlerts(prev => prev.map(a => (a.alert_id === alertData.id ? {
+        ...a,
+        count: alertData.count,
+        confidence: alertData.max_confidence ?? a.confidence,
+        severity: alertData.status === 'malicious' ? 'high' : a.severity,
+        closed: alertData.aggregation_state === 'closed',
+      } : a)));
+    };
+    socket.on('alert_update', updateAggregate);
+    socket.on('alert_closed', updateAggregate);
+
+    socket.on('system_log_batch', ({ events }) => {
+      const newLogs = events.map(log => ({
         ...log,
         id: Math.random().toString(36).substr(2, 9)
-      };
-      setLogs(prevLogs => [newLog, ...prevLogs].slice(0, 50));
+      })).reverse();
+      setLogs(prevLogs => [...newLogs, ...prevLogs].slice(0, 50));
     });
 
     return () => {
@@ -328,6 +355,7 @@ function App() {
                       <p className="text-sm font-medium text-red-800">{alert.message}</p>
                       <p className="text-xs text-red-600 mt-1">
                         {new Date(alert.timestamp).toLocaleTimeString()}
+                        {alert.count > 1 && ` · ${alert.count} events${alert.closed ? ' (closed)' : ''}`}
                       </p>
                     </div>
                     <button
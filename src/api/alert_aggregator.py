@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Alert Aggregation for the Hybrid AI-IDS API
+Folds repeated alerts for the same (src, dst, attack type) into one
+aggregate alert that is opened, periodically updated and closed.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+
+STATUS_RANK = {'suspicious': 1, 'malicious': 2}
+
+class AlertAggregator:
+    """Time-windowed alert aggregation with a bounded, expiring state table.
+
+    observe() returns the lifecycle events to publish for an alert:
+    ('open', aggregate) for the first alert of a key, ('update', aggregate)
+    at most every update_interval seconds (or immediately when the status
+    escalates), and nothing otherwise. An aggregate closes once no alert
+    for its key was seen for window seconds, or when the table is full and
+    it is the least recently seen; expire() returns those ('close', ...)
+    events. The aggregate is a plain alert dict carrying count, first_seen,
+    last_seen, max_confidence and aggregation_state.
+    """
+
+    def __init__(self, window=60.0, update_interval=10.0, max_entries=10000):
+        self.window = window
+        self.update_interval = update_interval
+        self.max_entries = max_entries
+        self._active = OrderedDict()    # key -> [aggregate, last published time], oldest last_seen first
+        self._lock = threading.Lock()
+        self.alerts_in = 0
+        self.events_out = 0
+        self.evicted = 0
+
+    @staticmethod
+    def key(alert):
+        return (alert.get('src'), alert.get('dst'), alert.get('prediction'))
+
+    def observe(self, alert, now=None):
+        """Fold an alert into its aggregate; returns a list of (kind, aggregate) events."""
+        now = time.time() if now is None else now
+        confidence = float(alert.get('confidence') or 0.0)
+        key = self.key(alert)
+        closed = self._expire(now)
+        events = []
+        with self._lock:
+            self.alerts_in += 1
+            entry = self._active.get(key)
+            if entry is None:
+                aggregate = dict(alert)
+                aggregate.update({
+                    'count': 1,
+                    'first_seen': now,
+                    'last_seen': now,
+                    'max_confidence': confidence,
+                    'aggregation_state': 'open',
+                })
+                self._active[key] = [aggregate, now]
+                events.append(('open', aggregate))
+                if len(self._active) > self.max_entries:
+                    _, (evicted, _) = self._active.popitem(last=False)
+                    evicted['aggregation_state'] = 'closed'
+                    self.evicted += 1
+                    events.append(('close', evicted))
+            else:
+                aggregate, published = entry
+                self._active.move_to_end(key)
+                aggregate['count'] += 1
+                aggregate['last_seen'] = now
+                aggregate['max_confidence'] = max(aggregate['max_confidence'], confidence)
+                escalated = STATUS_RANK.get(alert.get('status'), 0) > STATUS_RANK.get(aggregate.get('status'), 0)
+                if escalated:
+                    aggregate['status'] = alert['status']
+                if escalated or now - published >= self.update_interval:
+                    entry[1] = now
+                    events.append(('update', aggregate))
+            self.events_out += len(events)
+        return closed + events
+
+    def expire(self, now=None):
+        """Close aggregates idle for longer than the window; returns ('close', aggregate) events."""
+        return self._expire(time.time() if now is None else now)
+
+    def _expire(self, now):
+        events = []
+        with self._lock:
+            while self._active:
+                key, (aggregate, _) = next(iter(self._active.items()))
+                if now - aggregate['last_seen'] < self.window:
+                    break
+                del self._active[key]
+                aggregate['aggregation_state'] = 'closed'
+                events.append(('close', aggregate))
+            self.events_out += len(events)
+        return events
+
+    def stats(self):
+        with self._lock:
+            return {
+                'active': len(self._active),
+                'alerts_in': self.alerts_in,
+                'events_out': self.events_out,
+                'evicted': self.evicted,
+                # Raw alerts per published alert event
+                'reduction_ratio': self.alerts_in / self.events_out if self.events_out else 0.0,
+            }
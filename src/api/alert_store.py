@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Alert Store for the Hybrid AI-IDS API
+Persists alerts to an embedded SQLite database (WAL mode) with batched
+background inserts, and keeps the most recent alerts in memory for the
+dashboard.
+"""
+
+import json
+import time
+import sqlite3
+import threading
+from collections import deque
+from pathlib import Path
+from ids_logging import get_logger
+
+logger = get_logger('alert_store')
+
+# Columns that /api/alerts can filter on with equality
+FILTER_COLUMNS = ('src', 'dst', 'status', 'prediction')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    id INTEGER PRIMARY KEY,
+    timestamp REAL NOT NULL,
+    src TEXT,
+    dst TEXT,
+    destination_port INTEGER,
+    status TEXT,
+    prediction INTEGER,
+    confidence REAL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_alerts_timestamp ON alerts (timestamp);
+CREATE INDEX IF NOT EXISTS idx_alerts_src ON alerts (src);
+CREATE INDEX IF NOT EXISTS idx_alerts_dst ON alerts (dst);
+CREATE INDEX IF NOT EXISTS idx_alerts_status ON alerts (status);
+CREATE INDEX IF NOT EXISTS idx_alerts_prediction ON alerts (prediction);
+"""
+
+def _as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class AlertStore:
+    """Alert history backed by SQLite with an in-memory hot tail.
+
+    add() assigns the alert id, appends to the hot tail and queues the
+    alert; a writer thread inserts queued alerts in one transaction per
+    batch. Until open() is called the store is memory-only; call it before
+    the first add() so ids continue from the stored history.
+
+    query() serves recent unfiltered pages from the hot tail and everything
+    else from the indexed table, merged with alerts not yet written.
+    Results are in ascending id order: since_id pages forward from a cursor,
+    before_id pages backwards, and with neither the newest alerts are
+    returned.
+
+    A batch that fails to write is retried after flush_interval, up to
+    write_attempts times, and then dropped from persistence (it stays in
+    the hot tail). At most max_pending alerts wait for the writer; beyond
+    that the oldest unwritten alerts are dropped, so a failing database
+    cannot grow memory without bound.
+    """
+
+    def __init__(self, db_path, hot_size=100, batch_size=500, flush_interval=0.5, write_attempts=3,
+                 max_pending=100000):
+        self.db_path = Path(db_path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.write_attempts = write_attempts
+        self.max_pending = max_pending
+        self.hot = deque(maxlen=hot_size)
+        self._next_id = 1
+        self._pending = []
+        self._inflight = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._local = threading.local()
+        self._writer = None
+        self._closed = False
+        self._opened = False
+        self.persisted = 0
+        self.batches_written = 0
+        self.write_failures = 0
+        self.dropped = 0
+
+    # --- Lifecycle ---
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def open(self):
+        """Create the database if needed, load the recent tail and start the writer."""
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        last_id = conn.execute('SELECT MAX(id) FROM alerts').fetchone()[0] or 0
+        rows = conn.execute('SELECT data FROM alerts ORDER BY id DESC LIMIT ?', (self.hot.maxlen,)).fetchall()
+        with self._lock:
+            self._next_id = last_id + 1
+            self.hot.clear()
+            self.hot.extend(json.loads(row[0]) for row in reversed(rows))
+            self._opened = True
+        self._writer = threading.Thread(target=self._write_loop, args=(conn,), daemon=True)
+        self._writer.start()
+
+    def close(self, timeout=10.0):
+        """Write everything still queued and stop the writer, waiting at most timeout seconds."""
+        with self._wakeup:
+            self._closed = True
+            self._wakeup.notify()
+        if self._writer is not None:
+            self._writer.join(timeout)
+            if self._writer.is_alive():
+                logger.warning("Alert writer did not finish within %.1fs; %d alerts not persisted",
+                               timeout, self.stats()['pending'])
+            self._writer = None
+
+    # --- Writes ---
+
+    def add(self, alert):
+        """Store an alert dict, assigning alert['id']; returns the id."""
+        with self._lock:
+            alert['id'] = self._next_id
+            self._next_id += 1
+            alert.setdefault('timestamp', time.time())
+            self.hot.append(alert)
+            if self._opened:
+                self._pending.append(alert)
+                self._trim_pending()
+                if len(self._pending) >= self.batch_size:
+                    self._wakeup.notify()
+        return alert['id']
+
+    def update(self, alert):
+        """Queue a rewrite of an alert added earlier and since modified in place."""
+        with self._lock:
+            if self._opened:
+                self._pending.append(alert)
+                self._trim_pending()
+
+    def _trim_pending(self):
+        # Called with the lock held; trims a batch at a time to keep appends cheap
+        excess = len(self._pending) - self.max_pending
+        if excess > 0:
+            excess = min(len(self._pending), max(excess, self.batch_size))
+            del self._pending[:excess]
+            self.dropped += excess
+
+    def _write_loop(self, conn):
+        attempts = 0
+        while True:
+            with self._wakeup:
+                # After a failed write, wait before retrying even if more alerts are queued
+                if attempts or (not self._pending and not self._closed):
+                    self._wakeup.wait(self.flush_interval)
+                batch, self._pending = self._pending, []
+                self._inflight = batch
+                closed = self._closed
+            if batch:
+                try:
+                    rows = [self._row(alert) for alert in batch]
+                    with conn:
+                        conn.executemany('INSERT OR REPLACE INTO alerts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+                except Exception:
+                    attempts += 1
+                    retry = attempts < self.write_attempts
+                    logger.exception("Writing %d alerts failed (attempt %d of %d)%s", len(batch), attempts,
+                                     self.write_attempts, '' if retry else '; dropping them')
+                    with self._lock:
+                        self._inflight = []
+                        self.write_failures += 1
+                        if retry:
+                            self._pending[:0] = batch
+                            self._trim_pending()
+                        else:
+                            self.dropped += len(batch)
+                            attempts = 0
+                else:
+                    attempts = 0
+                    with self._lock:
+                        self._inflight = []
+                        self.persisted += len(batch)
+                        self.batches_written += 1
+            if closed:
+                with self._lock:
+                    if not self._pending:
+                        break
+        conn.close()
+
+    @staticmethod
+    def _row(alert):
+        return (
+            alert['id'], alert['timestamp'], alert.get('src'), alert.get('dst'),
+            _as_int(alert.get('destination_port')), alert.get('status'),
+            _as_int(alert.get('prediction')), alert.get('confidence'),
+            json.dumps(alert, default=str),
+        )
+
+    # --- Reads ---
+
+    def _reader(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def query(self, since_id=None, before_id=None, limit=20, start_time=None, end_time=None, **filters):
+        """Return up to limit alerts in ascending id order (see class docstring)."""
+        unknown = set(filters) - set(FILTER_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown alert filters: {sorted(unknown)}")
+        filters = {k: v for k, v in filters.items() if v is not None}
+        limit = max(0, int(limit))
+
+        with self._lock:
+            hot = list(self.hot)
+            unwritten = self._inflight + self._pending
+            opened = self._opened
+
+        # Fast path: recent unfiltered pages are always in the hot tail
+        if not filters and start_time is None and end_time is None and before_id is None:
+            if since_id is None and (limit <= len(hot) or not opened):
+                return hot[-limit:] if limit else []
+            if since_id is not None and (not opened or (hot and since_id >= hot[0]['id'] - 1)):
+                return [a for a in hot if a['id'] > since_id][:limit]
+
+        def matches(alert):
+            if since_id is not None and alert['id'] <= since_id:
+                return False
+            if before_id is not None and alert['id'] >= before_id:
+                return False
+            if start_time is not None and alert['timestamp'] < start_time:
+                return False
+            if end_time is not None and alert['timestamp'] > end_time:
+                return False
+            return all(alert.get(k) == v for k, v in filters.items())
+
+        if not opened:
+            found = [a for a in hot if matches(a)]
+        else:
+            clauses, params = [], []
+            if since_id is not None:
+                clauses.append('id > ?')
+                params.append(since_id)
+            if before_id is not None:
+                clauses.append('id < ?')
+                params.append(before_id)
+            if start_time is not None:
+                clauses.append('timestamp >= ?')
+                params.append(start_time)
+            if end_time is not None:
+                clauses.append('timestamp <= ?')
+                params.append(end_time)
+            for column, value in filters.items():
+                clauses.append(f'{column} = ?')
+                params.append(value)
+            where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+            order = 'ASC' if since_id is not None else 'DESC'
+            rows = self._reader().execute(
+                f'SELECT data FROM alerts {where} ORDER BY id {order} LIMIT ?', params + [limit]
+            ).fetchall()
+            found = {alert['id']: alert for alert in map(json.loads, (row[0] for row in rows))}
+            # The hot tail also holds alerts whose write was dropped
+            found.update((a['id'], a) for a in hot if matches(a))
+            found.update((a['id'], a) for a in unwritten if matches(a))
+            found = list(found.values())
+
+        found.sort(key=lambda a: a['id'])
+        if since_id is not None:
+            return found[:limit]
+        return found[-limit:] if limit else []
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hot': len(self.hot),
+                'pending': len(self._pending) + len(self._inflight),
+                'persisted': self.persisted,
+                'batches_written': self.batches_written,
+                'write_failures': self.write_failures,
+                'dropped': self.dropped,
+                'last_id': self._next_id - 1,
+            }
+
+
+def benchmark(alerts=200000, db_path='/tmp/ids_alert_store_benchmark.db'):
+    """Measure ingest rate and query latency on a large alert table."""
+    import os
+    import random
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    store = AlertStore(db_path)
+    store.open()
+    rng = random.Random(1)
+    start = time.perf_counter()
+    for i in range(alerts):
+        store.add({
+            'src': f'10.0.{rng.randint(0, 255)}.{rng.randint(1, 254)}', 'dst': '192.168.1.10',
+            'destination_port': rng.choice([22, 53, 80, 443]), 'status': rng.choice(['suspicious', 'malicious']),
+            'prediction': rng.randint(0, 8), 'confidence': rng.random(),
+        })
+    add_rate = alerts / (time.perf_counter() - start)
+    store.close()
+    print(f"add(): {add_rate:,.0f} alerts/s; {store.stats()['persisted']:,} persisted in {store.batches_written} batches")
+
+    store = AlertStore(db_path)
+    store.open()
+    for name, kwargs in [
+        ('newest 20 (hot tail)', {}),
+        ('since_id cursor, 100', {'since_id': alerts // 2, 'limit': 100}),
+        ('before_id cursor, 100', {'before_id': alerts // 3, 'limit': 100}),
+        ('status + prediction filter', {'status': 'malicious', 'prediction': 3, 'limit': 50}),
+        ('src filter', {'src': '10.0.1.1', 'limit': 50}),
+    ]:
+        start = time.perf_counter()
+        for _ in range(100):
+            store.query(**kwargs)
+        print(f"{name}: {(time.perf_counter() - start) * 10:.3f} ms/query")
+    store.close()
+
+if __name__ == "__main__":
+    benchmark()
@@ -3,13 +3,32 @@
 Flask API for the Hybrid AI-IDS
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_socketio import SocketIO, emit
-import joblib
-import pandas as pd
+import numpy as np
 from pathlib import Path
 from collections import deque, defaultdict
 import time
+import atexit
+import logging
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'monitors'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from threat_intel import ThreatIntelIndex
+from ids_logging import configure_logging, get_logger
+from event_batcher import EventBatcher
+from subscriptions import SubscriptionManager
+from alert_store import AlertStore
+from alert_aggregator import AlertAggregator
+from incident_correlator import IncidentCorrelator
+from rolling_stats import TrafficStats
+from metrics import REGISTRY, CONTENT_TYPE, Counter, Gauge, Histogram
+from model_reloader import ModelReloader
+from models.model_registry import ModelRegistry
+
+logger = get_logger('api')
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'secret!'
@@ -17,75 +36,161 @@ socketio = SocketIO(app, cors_allowed_origins="*")
 
 API_VERSION = "dns-heuristics-v1"
 
+# --- Dashboard event batching ---
+# High-rate events are sent as one '<event>_batch' frame per type per interval;
+# new_alert is always sent immediately
+EVENT_FLUSH_INTERVAL_MS = 100
+EVENT_SAMPLING_CAPS = {'new_packet': 200, 'classification': 200, 'system_log': 50}
+# Clients may 'subscribe' with filters; events are only sent to matching clients
+subscriptions = SubscriptionManager(socketio)
+event_batcher = EventBatcher(socketio, flush_interval=EVENT_FLUSH_INTERVAL_MS / 1000,
+                             caps=EVENT_SAMPLING_CAPS, router=subscriptions)
+
 # --- Load Model ---
+# Versions published to the registry are loaded, warmed up and swapped in
+# between requests; MODEL_PATH is only used while the registry is empty
+MODEL_REGISTRY_PATH = Path('models/registry')
+MODEL_REGISTRY_POLL_SECONDS = 5
 MODEL_PATH = Path('models/random_forest_model.joblib')
-model = None
+# 'r' memory-maps the compiled (flat array) forest, shared by all API workers and
+# evaluated by the vectorized engine; None unpickles the sklearn joblib file
+MODEL_MMAP_MODE = 'r'
+# Score with the version's screening model first and escalate uncertain or
+# rule-flagged requests to the full model (versions without a screen use the full model)
+MODEL_CASCADE = True
+model_reloader = ModelReloader(ModelRegistry(MODEL_REGISTRY_PATH), fallback_path=MODEL_PATH,
+                               check_interval=MODEL_REGISTRY_POLL_SECONDS, mmap_mode=MODEL_MMAP_MODE,
+                               use_cascade=MODEL_CASCADE)
+
+# --- Threat Intel ---
+# IP/CIDR indicators; a match marks the request malicious without model inference
+THREAT_INTEL_PATH = Path('data/threat_intel/ip_indicators.txt')
+threat_intel = None
 
-# --- In-memory storage for alerts ---
-# In a real application, you would use a database
-alert_store = deque(maxlen=100) # Store the last 100 alerts
+# --- Alert storage ---
+# SQLite (WAL) history with batched background inserts; the newest alerts stay in memory
+ALERT_DB_PATH = Path('data/alerts.db')
+ALERT_HOT_SIZE = 100
+alert_store = AlertStore(ALERT_DB_PATH, hot_size=ALERT_HOT_SIZE)
+
+# --- Alert aggregation ---
+# Alerts for the same (src, dst, attack type) are folded into one aggregate alert
+# that is opened, updated at most every ALERT_UPDATE_INTERVAL_SECONDS, and closed
+# after ALERT_AGGREGATION_WINDOW_SECONDS without new alerts
+ALERT_AGGREGATION_WINDOW_SECONDS = 60
+ALERT_UPDATE_INTERVAL_SECONDS = 10
+ALERT_AGGREGATION_MAX_ENTRIES = 10000
+alert_aggregator = AlertAggregator(window=ALERT_AGGREGATION_WINDOW_SECONDS,
+                                   update_interval=ALERT_UPDATE_INTERVAL_SECONDS,
+                                   max_entries=ALERT_AGGREGATION_MAX_ENTRIES)
+
+# --- Incident correlation ---
+# Alerts sharing an IP, DNS base domain or destination service within the window form one incident
+INCIDENT_WINDOW_SECONDS = 300
+incident_correlator = IncidentCorrelator(window=INCIDENT_WINDOW_SECONDS)
 packet_count = 0
 alert_count = 0
 
+# Per-second counters with 1m/5m/1h rollups and top talkers for /api/stats
+traffic_stats = TrafficStats()
+
 # Track destination ports per source over a short window for simple port-scan detection
 recent_ports_by_src = defaultdict(lambda: deque(maxlen=2000))
 
+# --- Metrics (Prometheus text format on /metrics) ---
+STAGE_SECONDS = Histogram('ids_api_stage_seconds', 'Time spent in each /predict stage', ['stage'])
+PARSE_SECONDS = STAGE_SECONDS.labels('json_parse')
+FEATURE_VECTOR_SECONDS = STAGE_SECONDS.labels('feature_vector')
+INFERENCE_SECONDS = STAGE_SECONDS.labels('inference')
+RULES_SECONDS = STAGE_SECONDS.labels('rules')
+# Dashboard events and logging; alert stages only run for suspicious or malicious packets
+EMIT_SECONDS = STAGE_SECONDS.labels('emit')
+CORRELATE_SECONDS = STAGE_SECONDS.labels('correlate')
+AGGREGATE_SECONDS = STAGE_SECONDS.labels('aggregate')
+PUBLISH_ALERT_SECONDS = STAGE_SECONDS.labels('publish_alert')
+REQUESTS_TOTAL = Counter('ids_api_requests_total', 'Prediction requests received')
+ERRORS_TOTAL = Counter('ids_api_errors_total', 'Prediction requests that failed')
+ALERTS_TOTAL = Counter('ids_api_alerts_total', 'Raw alerts raised, by status', ['status'])
+Gauge('ids_api_portscan_sources', 'Sources tracked by the port-scan rule').set_function(lambda: len(recent_ports_by_src))
+Gauge('ids_api_model_reload_seconds', 'Load plus warm-up time of the active model version').set_function(
+    lambda: model_reloader.last_reload['reload_ms'] / 1000)
+
+def cascade_escalation_rate():
+    """Escalation rate of the active cascade; 0 when no model is loaded or it has no cascade."""
+    active_model = model_reloader.active
+    if active_model is None or active_model.cascade is None:
+        return 0.0
+    return active_model.cascade.stats()['escalation_rate']
+
+Gauge('ids_api_cascade_escalation_ratio', 'Share of requests the screening model escalated to the full model').set_function(
+    cascade_escalation_rate)
+
 def load_model():
-    """Load the trained model."""
-    global model
-    if MODEL_PATH.exists():
-        print(f"Loading model from {MODEL_PATH}...")
-        model = joblib.load(MODEL_PATH)
-        print("Model loaded successfully.")
+    """Load the current model version and watch the registry for new ones."""
+    model_reloader.load()
+    model_reloader.start_watching()
+
+def load_threat_intel():
+    """Load the threat intel feed (if present) and watch it for changes."""
+    global threat_intel
+    if THREAT_INTEL_PATH.exists():
+        threat_intel = ThreatIntelIndex(THREAT_INTEL_PATH)
+        threat_intel.start_watching()
     else:
-        print(f"Error: Model not found at {MODEL_PATH}")
+        logger.info("No threat intel feed found at %s", THREAT_INTEL_PATH)
 
 import datetime
 
+def publish_alert_event(kind, alert):
+    """Store and emit one aggregate alert lifecycle event ('open', 'update' or 'close')."""
+    if kind == 'open':
+        alert_store.add(alert)
+        incident_correlator.attach_alert(alert['incident_id'], alert['id'])
+        subscriptions.emit('new_alert', alert)
+        # Emit system log for alert
+        event_batcher.emit('system_log', {
+            'timestamp': datetime.datetime.now().isoformat(),
+            'level': 'WARNING',
+            'message': f"Threat detected ({alert['status']}) from {alert.get('src') or 'unknown'} "
+                       f"to port {alert.get('destination_port') if alert.get('destination_port') is not None else 'unknown'}"
+        })
+    else:
+        # The incident may have been merged into another one since the alert opened
+        alert['incident_id'] = incident_correlator.resolve(alert['incident_id']) or alert['incident_id']
+        alert_store.update(alert)
+        subscriptions.emit('alert_update' if kind == 'update' else 'alert_closed', alert)
+
+def expire_alert_aggregates():
+    """Background task closing aggregates that went quiet."""
+    while True:
+        socketio.sleep(1)
+        for kind, alert in alert_aggregator.expire():
+            publish_alert_event(kind, alert)
+
 # ... (keep existing imports)
 
 @app.route('/predict', methods=['POST'])
 def predict():
     """Receive log data, make a prediction, and emit an alert if necessary."""
     global alert_count
-    if model is None:
+    # One model version per request, even if a new one is swapped in meanwhile
+    active_model = model_reloader.active
+    if active_model is None:
         return jsonify({'error': 'Model is not loaded'}), 500
 
+    REQUESTS_TOTAL.inc()
+    started = time.perf_counter()
     try:
         data = request.get_json()
-        
-        # Create a DataFrame with all required columns, filling missing ones with 0
-        # This is a temporary fix for the demo
-        if hasattr(model, 'feature_names_in_'):
-            full_data = {feature: 0 for feature in model.feature_names_in_}
-        else:
-            # Fallback if model has no feature_names_in_
-            full_data = {f'feature_{i}': 0 for i in range(78)}
-        
-        full_data.update(data) # Overwrite with the features we received
-
-        df = pd.DataFrame([full_data])
-        
-        # Ensure the DataFrame columns match the model's training data
-        if hasattr(model, 'feature_names_in_'):
-            df = df[model.feature_names_in_]
-
-        prediction = model.predict(df)
-        prediction_proba = model.predict_proba(df)
-
-        result = {
-            'prediction': int(prediction[0]),
-            'confidence': max(prediction_proba[0])
-        }
-
-        # Debug output
-        print(f"Prediction: {result['prediction']}, Confidence: {result['confidence']:.3f}")
+        PARSE_SECONDS.observe(time.perf_counter() - started)
 
         src_ip = data.get('src')
         dst_ip = data.get('dst')
         dst_port = data.get('destination_port', data.get('dst_port'))
         packet_id = data.get('packet_id')
 
+        # Rules run before inference: packets they flag always get the full model
+        stage_start = time.perf_counter()
         # Simple heuristic: many distinct destination ports in short time => suspicious
         suspicious_by_rule = False
         unique_ports = 0
@@ -100,18 +205,68 @@ def predict():
             if unique_ports >= 30:  # Increased threshold from 10 to 30
                 suspicious_by_rule = True
 
-        # Determine severity from model output + heuristics
-        confidence = float(result['confidence'])
-        pred = int(result['prediction'])
         features = data
         # DNS Tunneling Detection
         is_dns_tunneling = bool(features.get('is_dns_tunneling', False))
         dns_tunneling_confidence = float(features.get('dns_tunneling_confidence', 0) or 0)
         dns_tunneling_score = float(features.get('dns_tunneling_score', 0) or 0)
+        # Payload signature matches on this packet
+        signature_matches = list(features.get('signature_matches') or [])
+        rule_flagged = suspicious_by_rule or is_dns_tunneling or bool(signature_matches)
+        rules_seconds = time.perf_counter() - stage_start
+
+        # Threat intel short-circuit: a known-bad endpoint needs no model inference
+        intel_match = None
+        if threat_intel is not None:
+            intel_match = threat_intel.match(src_ip) or threat_intel.match(dst_ip)
+        if intel_match is None and data.get('threat_intel_match'):
+            intel_match = data.get('threat_intel_indicator', 'threat-intel')
+
+        if intel_match is not None:
+            result = {'prediction': 0, 'confidence': 1.0}
+        else:
+            # One float32 row in the model's feature order, filling missing features with 0
+            # This is a temporary fix for the demo
+            stage_start = time.perf_counter()
+            model = active_model.model
+            batch = np.array([[data.get(feature) or 0 for feature in active_model.feature_names]],
+                             dtype=np.float32)
+            stage_end = time.perf_counter()
+            FEATURE_VECTOR_SECONDS.observe(stage_end - stage_start)
+
+            if active_model.cascade is not None:
+                # Screening model first; uncertain or rule-flagged rows go to the full model
+                prediction_proba = active_model.cascade.predict_proba(batch, flagged=[rule_flagged])
+            else:
+                prediction_proba = model.predict_proba(batch)
+            prediction = model.classes_[prediction_proba.argmax(axis=1)]
+            inference_seconds = time.perf_counter() - stage_end
+            INFERENCE_SECONDS.observe(inference_seconds)
+            model_reloader.record_inference(active_model, inference_seconds)
+
+            result = {
+                'prediction': int(prediction[0]),
+                'confidence': max(prediction_proba[0])
+            }
+
+            logger.debug("Prediction: %s, Confidence: %.3f", result['prediction'], result['confidence'])
+
+        # Determine severity from model output + heuristics
+        stage_start = time.perf_counter()
+        confidence = float(result['confidence'])
+        pred = int(result['prediction'])
         pred_out = pred
         
         # Determine status
-        if pred != 0:
+        if intel_match is not None:
+            status = "malicious"
+            severity = "high"
+            pred_out = 7  # Custom threat intel match class
+        elif signature_matches:
+            status = "malicious"
+            severity = "high"
+            pred_out = 8  # Custom payload signature class
+        elif pred != 0:
             status = "malicious"
             severity = "high"
         elif is_dns_tunneling and dns_tunneling_confidence >= 0.7:
@@ -128,8 +283,11 @@ def predict():
             status = "normal"
             severity = "low"
 
+        stage_end = time.perf_counter()
+        RULES_SECONDS.observe(rules_seconds + stage_end - stage_start)
+
         # Emit classification event (always)
-        socketio.emit('classification', {
+        event_batcher.emit('classification', {
             'packet_id': packet_id,
             'src': src_ip,
             'dst': dst_ip,
@@ -142,29 +300,38 @@ def predict():
             'dns_tunneling': is_dns_tunneling,
             'dns_tunneling_score': dns_tunneling_score,
             'dns_tunneling_confidence': dns_tunneling_confidence,
+            'threat_intel': intel_match,
+            'signature_matches': signature_matches,
             'api_version': API_VERSION,
         })
 
-        print(
-            f"[DECISION] status={status} pred_out={pred_out} conf={confidence:.3f} "
-            f"port={dst_port} portscan={suspicious_by_rule} unique_ports_10s={unique_ports} "
-            f"dns_tunneling={is_dns_tunneling} dns_conf={dns_tunneling_confidence:.3f} dns_score={dns_tunneling_score}"
+        # Normal decisions are debug-only; detections are rate-limited per status
+        logger.log(
+            logging.DEBUG if status == 'normal' else logging.WARNING,
+            "[DECISION] status=%s pred_out=%s conf=%.3f port=%s portscan=%s unique_ports_10s=%s "
+            "dns_tunneling=%s dns_conf=%.3f dns_score=%s",
+            status, pred_out, confidence, dst_port, suspicious_by_rule, unique_ports,
+            is_dns_tunneling, dns_tunneling_confidence, dns_tunneling_score,
+            extra={'rate_key': ('decision', status)},
         )
 
         # Emit system log for prediction
-        socketio.emit('system_log', {
+        event_batcher.emit('system_log', {
             'timestamp': datetime.datetime.now().isoformat(),
             'level': 'INFO',
             'message': f"Prediction processed for port {dst_port if dst_port is not None else 'unknown'} - Result: {pred_out} ({status})"
         })
 
+        stage_start = time.perf_counter()
+        EMIT_SECONDS.observe(stage_start - stage_end)
+
         # If suspicious or malicious is detected, emit an alert to the dashboard
         if status in ('suspicious', 'malicious'):
             alert_count += 1
+            ALERTS_TOTAL.labels(status).inc()
             alert_data = {
                 **result,
                 **data,
-                'id': alert_count,
                 'status': status,
                 'destination_port': dst_port,
                 'prediction': pred_out,
@@ -173,16 +340,22 @@ def predict():
                 'dns_tunneling': is_dns_tunneling,
                 'dns_tunneling_score': dns_tunneling_score,
                 'dns_tunneling_confidence': dns_tunneling_confidence,
+                'threat_intel': intel_match,
+                'signature_matches': signature_matches,
             }
-            alert_store.append(alert_data)
-            socketio.emit('new_alert', alert_data)
-            
-            # Emit system log for alert
-            socketio.emit('system_log', {
-                'timestamp': datetime.datetime.now().isoformat(),
-                'level': 'WARNING',
-                'message': f"Threat detected ({status}) from {src_ip if src_ip is not None else 'unknown'} to port {dst_port if dst_port is not None else 'unknown'}"
-            })
+            alert_data['incident_id'] = incident_correlator.observe(alert_data)
+            correlated = time.perf_counter()
+            CORRELATE_SECONDS.observe(correlated - stage_start)
+            events = alert_aggregator.observe(alert_data)
+            aggregated = time.perf_counter()
+            AGGREGATE_SECONDS.observe(aggregated - correlated)
+            # Alert store enqueue and Socket.IO emits
+            for kind, alert in events:
+                publish_alert_event(kind, alert)
+            PUBLISH_ALERT_SECONDS.observe(time.perf_counter() - aggregated)
+
+        finished = time.perf_counter()
+        traffic_stats.record_prediction(status, finished - started)
 
         return jsonify({
             **result,
@@ -193,12 +366,15 @@ def predict():
             'dns_tunneling': is_dns_tunneling,
             'dns_tunneling_score': dns_tunneling_score,
             'dns_tunneling_confidence': dns_tunneling_confidence,
+            'threat_intel': intel_match,
+            'signature_matches': signature_matches,
             'api_version': API_VERSION,
+            'model_version': active_model.version,
         })
 
     except Exception as e:
-        # For debugging, print the actual error
-        print(f"Prediction error: {e}")
+        ERRORS_TOTAL.inc()
+        logger.warning("Prediction error: %s", e)
         return jsonify({'error': str(e)}), 400
 
 # ... (keep the rest of the file the same)
@@ -209,29 +385,108 @@ def get_stats():
     return jsonify({
         'total_packets': packet_count,
         'total_alerts': alert_count,
+        'event_batching': event_batcher.stats(),
+        'alert_store': alert_store.stats(),
+        'alert_aggregation': alert_aggregator.stats(),
+        'incidents': incident_correlator.stats(),
+        'windows': traffic_stats.snapshot(),
     })
 
+@app.route('/api/model', methods=['GET'])
+def get_model():
+    """Active model version and metadata, reload timings and post-swap latency."""
+    return jsonify(model_reloader.stats())
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus scrape endpoint."""
+    return Response(REGISTRY.generate(), content_type=CONTENT_TYPE)
+
 @app.route('/api/alerts', methods=['GET'])
 def get_alerts():
-    """Provide a list of recent alerts."""
-    limit = request.args.get('limit', 20, type=int)
-    return jsonify(list(alert_store)[-limit:])
+    """Provide alerts, newest first page by default.
+
+    Query parameters: limit, since_id / before_id cursors, src, dst, status,
+    prediction, start_time, end_time (epoch seconds).
+    """
+    args = request.args
+    limit = min(args.get('limit', 20, type=int), 1000)
+    try:
+        alerts = alert_store.query(
+            since_id=args.get('since_id', type=int),
+            before_id=args.get('before_id', type=int),
+            limit=limit,
+            start_time=args.get('start_time', type=float),
+            end_time=args.get('end_time', type=float),
+            src=args.get('src'),
+            dst=args.get('dst'),
+            status=args.get('status'),
+            prediction=args.get('prediction', type=int),
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(alerts)
+
+@app.route('/api/incidents', methods=['GET'])
+def get_incidents():
+    """Provide the most recently active incidents (closed ones too with ?include_closed=1)."""
+    limit = min(request.args.get('limit', 50, type=int), 1000)
+    include_closed = request.args.get('include_closed', 0, type=int) == 1
+    return jsonify(incident_correlator.incidents(limit=limit, include_closed=include_closed))
+
+@app.route('/api/incidents/<int:incident_id>', methods=['GET'])
+def get_incident(incident_id):
+    """Provide one incident by id, following merges."""
+    incident = incident_correlator.get(incident_id)
+    if incident is None:
+        return jsonify({'error': 'Incident not found'}), 404
+    return jsonify(incident)
+
+@app.route('/api/subscriptions', methods=['GET'])
+def get_subscriptions():
+    """Per-client subscription filters and sent/filtered event counters."""
+    return jsonify(subscriptions.stats())
 
 @socketio.on('connect')
 def handle_connect():
-    print('Client connected')
+    subscriptions.add_client(request.sid)
+    logger.info('Client connected')
 
 @socketio.on('disconnect')
 def handle_disconnect():
-    print('Client disconnected')
+    subscriptions.remove_client(request.sid)
+    logger.info('Client disconnected')
+
+@socketio.on('subscribe')
+def handle_subscribe(spec):
+    """Filter this client's events, e.g. {'min_severity': 'medium', 'cidrs': ['10.0.0.0/8'],
+    'ports': [53], 'event_types': ['classification', 'new_alert']}."""
+    try:
+        subscription = subscriptions.subscribe(request.sid, spec)
+    except (ValueError, TypeError) as e:
+        emit('subscription_error', {'error': str(e)})
+        return
+    emit('subscribed', subscription.spec())
+
+@socketio.on('unsubscribe')
+def handle_unsubscribe():
+    subscriptions.unsubscribe(request.sid)
+    emit('subscribed', None)
 
 @socketio.on('stream_packet')
 def handle_packet_stream(packet_data):
     """Receives packet data from the sniffer and broadcasts it to clients."""
     global packet_count
     packet_count += 1
-    emit('new_packet', packet_data, broadcast=True)
+    traffic_stats.record_packet(packet_data.get('src'), int(packet_data.get('length') or 0))
+    event_batcher.emit('new_packet', packet_data)
 
 if __name__ == '__main__':
+    configure_logging()
     load_model()
+    load_threat_intel()
+    alert_store.open()
+    atexit.register(alert_store.close)
+    event_batcher.start()
+    socketio.start_background_task(expire_alert_aggregates)
     socketio.run(app, debug=True, host='0.0.0.0', port=5000)
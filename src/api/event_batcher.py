@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Socket.IO event batching for the Hybrid AI-IDS API
+Buffers high-rate dashboard events and sends one frame per event type
+every flush interval instead of one WebSocket message per packet.
+"""
+
+import random
+import threading
+from ids_logging import get_logger
+
+logger = get_logger('event_batcher')
+
+class EventBatcher:
+    """Coalesces events per type and flushes them as '<event>_batch' frames.
+
+    Each frame carries {'events': [...], 'count': n}, where count is the
+    number of events seen since the last flush. When more than the type's
+    cap arrive in one interval, a uniform reservoir sample of cap events is
+    kept, so count can be larger than len(events). If a router is given
+    (e.g. a SubscriptionManager), frames go through router.emit_batch
+    instead of being broadcast.
+    """
+
+    def __init__(self, socketio, flush_interval=0.1, caps=None, default_cap=100, router=None):
+        self.socketio = socketio
+        self.router = router
+        self.flush_interval = flush_interval
+        self.caps = dict(caps or {})
+        self.default_cap = default_cap
+        self._buffers = {}       # event -> [sampled events, events seen]
+        self._lock = threading.Lock()
+        self._rng = random.Random()
+        self._task = None
+        self.events_buffered = 0
+        self.events_sampled_out = 0
+        self.frames_sent = 0
+        self.flush_errors = 0
+
+    def emit(self, event, data):
+        """Queue an event for the next batched frame."""
+        with self._lock:
+            buffer = self._buffers.get(event)
+            if buffer is None:
+                buffer = self._buffers[event] = [[], 0]
+            events = buffer[0]
+            buffer[1] += 1
+            self.events_buffered += 1
+            cap = self.caps.get(event, self.default_cap)
+            if len(events) < cap:
+                events.append(data)
+                return
+            # Reservoir sampling keeps a uniform sample of this interval's events
+            self.events_sampled_out += 1
+            slot = self._rng.randrange(buffer[1])
+            if slot < cap:
+                events[slot] = data
+
+    def flush(self):
+        """Send everything buffered so far, one frame per event type."""
+        with self._lock:
+            buffers, self._buffers = self._buffers, {}
+        for event, (events, count) in buffers.items():
+            if self.router is not None:
+                self.router.emit_batch(event, events, count)
+            else:
+                self.socketio.emit(f'{event}_batch', {'events': events, 'count': count})
+            self.frames_sent += 1
+
+    def _run(self):
+        while True:
+            self.socketio.sleep(self.flush_interval)
+            # A failed flush drops that interval's frames; the task keeps running
+            try:
+                self.flush()
+            except Exception:
+                self.flush_errors += 1
+                logger.exception("Event batch flush failed")
+
+    def start(self):
+        """Start the periodic flush as a Socket.IO background task."""
+        if self._task is None:
+            self._task = self.socketio.start_background_task(self._run)
+
+    def stats(self):
+        return {
+            'events_buffered': self.events_buffered,
+            'events_sampled_out': self.events_sampled_out,
+            'frames_sent': self.frames_sent,
+            'flush_errors': self.flush_errors,
+        }
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Incident Correlation for the Hybrid AI-IDS API
+Groups alerts that share entities (IP addresses, DNS base domains,
+destination services) within a sliding time window into incidents, using
+union-find so each alert costs a few near-constant-time operations.
+"""
+
+import time
+import threading
+from itertools import islice
+from collections import OrderedDict, Counter, deque
+
+STATUS_RANK = {'suspicious': 1, 'malicious': 2}
+
+def alert_entities(alert):
+    """Entities an alert can be linked through."""
+    entities = []
+    for field in ('src', 'dst'):
+        if alert.get(field):
+            entities.append(('ip', alert[field]))
+    if alert.get('dns_base_domain'):
+        entities.append(('domain', alert['dns_base_domain']))
+    if alert.get('dst') and alert.get('destination_port') is not None:
+        entities.append(('service', alert['dst'], int(alert['destination_port'])))
+    return entities
+
+
+class IncidentCorrelator:
+    """Streaming union-find over alert entities with expiry.
+
+    Every entity (and incident) remembers when it was last seen. An alert
+    joins the incidents of all its entities that were seen within window
+    seconds, merging them if there are several (union by size, with path
+    halving), or starts a new incident. Entities and incidents idle for
+    longer than the window are expired from the front of last-seen ordered
+    tables, and both tables are capped, so memory stays bounded. Alerts get
+    the incident id current at the time; resolve() maps an id that was
+    later merged into another incident to the surviving one, until the
+    union-find forest is compacted (when merged ids outgrow the tables).
+    """
+
+    def __init__(self, window=300.0, max_entities=100000, max_incidents=20000, closed_history=200,
+                 max_entities_listed=50, max_alerts_listed=100):
+        self.window = window
+        self.max_entities = max_entities
+        self.max_incidents = max_incidents
+        self.max_entities_listed = max_entities_listed
+        self.max_alerts_listed = max_alerts_listed
+        self._entities = OrderedDict()   # entity -> [incident id, last seen], oldest first
+        self._incidents = OrderedDict()  # root incident id -> incident dict, oldest first
+        self._parent = {}                # incident id -> parent incident id
+        self._members = {}               # root incident id -> ids merged into it (for cleanup)
+        self.closed = deque(maxlen=closed_history)
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self.alerts_correlated = 0
+        self.merges = 0
+
+    def _find(self, incident_id):
+        parent = self._parent
+        if incident_id not in parent:
+            return None
+        while parent[incident_id] != incident_id:
+            parent[incident_id] = parent[parent[incident_id]]
+            incident_id = parent[incident_id]
+        return incident_id
+
+    def _new_incident(self, now):
+        incident_id = self._next_id
+        self._next_id += 1
+        self._parent[incident_id] = incident_id
+        self._members[incident_id] = [incident_id]
+        self._incidents[incident_id] = {
+            'incident_id': incident_id,
+            'first_seen': now,
+            'last_seen': now,
+            'alert_count': 0,
+            'status': None,
+            'predictions': Counter(),
+            'entities': [],
+            'alert_ids': deque(maxlen=self.max_alerts_listed),
+            'merged_ids': deque(maxlen=self.max_alerts_listed),
+        }
+        if len(self._incidents) > self.max_incidents:
+            self._close(next(iter(self._incidents)))
+        return incident_id
+
+    def _union(self, a, b):
+        """Merge incident roots a and b; returns the surviving root."""
+        if len(self._members[a]) < len(self._members[b]):
+            a, b = b, a
+        self._parent[b] = a
+        self._members[a].extend(self._members.pop(b))
+        survivor, absorbed = self._incidents[a], self._incidents.pop(b)
+        survivor['first_seen'] = min(survivor['first_seen'], absorbed['first_seen'])
+        survivor['alert_count'] += absorbed['alert_count']
+        survivor['predictions'].update(absorbed['predictions'])
+        if STATUS_RANK.get(absorbed['status'], 0) > STATUS_RANK.get(survivor['status'], 0):
+            survivor['status'] = absorbed['status']
+        for entity in absorbed['entities']:
+            if len(survivor['entities']) >= self.max_entities_listed:
+                break
+            if entity not in survivor['entities']:
+                survivor['entities'].append(entity)
+        survivor['alert_ids'].extend(absorbed['alert_ids'])
+        survivor['merged_ids'].append(b)
+        survivor['merged_ids'].extend(absorbed['merged_ids'])
+        self.merges += 1
+        return a
+
+    def _close(self, root):
+        incident = self._incidents.pop(root)
+        for member in self._members.pop(root):
+            del self._parent[member]
+        self.closed.append(incident)
+
+    def _compact(self):
+        """Point every entity at its root and forget merged ids."""
+        for entry in self._entities.values():
+            entry[0] = self._find(entry[0])
+        self._parent = {root: root for root in self._incidents}
+        self._members = {root: [root] for root in self._incidents}
+
+    def _expire(self, now):
+        cutoff = now - self.window
+        entities = self._entities
+        while entities and (next(iter(entities.values()))[1] < cutoff or len(entities) > self.max_entities):
+            entities.popitem(last=False)
+        incidents = self._incidents
+        while incidents and next(iter(incidents.values()))['last_seen'] < cutoff:
+            self._close(next(iter(incidents)))
+        if len(self._parent) > self.max_entities + self.max_incidents:
+            self._compact()
+
+    def observe(self, alert, now=None):
+        """Correlate one alert; returns its incident id."""
+        now = time.time() if now is None else now
+        entities = alert_entities(alert)
+        with self._lock:
+            self._expire(now)
+            root = None
+            for entity in entities:
+                entry = self._entities.get(entity)
+                other = self._find(entry[0]) if entry is not None else None
+                if other is None:
+                    continue
+                root = other if root is None or root == other else self._union(root, other)
+            if root is None:
+                root = self._new_incident(now)
+
+            incident = self._incidents[root]
+            incident['last_seen'] = now
+            incident['alert_count'] += 1
+            incident['predictions'][alert.get('prediction')] += 1
+            if STATUS_RANK.get(alert.get('status'), 0) > STATUS_RANK.get(incident['status'], 0):
+                incident['status'] = alert['status']
+            self._incidents.move_to_end(root)
+
+            for entity in entities:
+                entry = self._entities.get(entity)
+                if entry is None:
+                    self._entities[entity] = [root, now]
+                    if len(incident['entities']) < self.max_entities_listed:
+                        incident['entities'].append(entity)
+                else:
+                    entry[0] = root
+                    entry[1] = now
+                    self._entities.move_to_end(entity)
+            self.alerts_correlated += 1
+        return root
+
+    def attach_alert(self, incident_id, alert_id):
+        """Record a stored alert id on its incident."""
+        with self._lock:
+            root = self._find(incident_id)
+            if root is not None:
+                self._incidents[root]['alert_ids'].append(alert_id)
+
+    def resolve(self, incident_id):
+        """Current incident id for an id that may have been merged away (None once expired)."""
+        with self._lock:
+            return self._find(incident_id)
+
+    @staticmethod
+    def _summary(incident, state):
+        return {
+            **incident,
+            'state': state,
+            'predictions': {str(k): v for k, v in incident['predictions'].items()},
+            'entities': [':'.join(str(part) for part in entity) for entity in incident['entities']],
+            'alert_ids': list(incident['alert_ids']),
+            'merged_ids': list(incident['merged_ids']),
+        }
+
+    def incidents(self, limit=50, include_closed=False, now=None):
+        """Most recently active incidents first."""
+        with self._lock:
+            self._expire(time.time() if now is None else now)
+            # Summaries are built only for the incidents returned
+            result = [self._summary(i, 'active') for i in islice(reversed(self._incidents.values()), limit)]
+            if include_closed and len(result) < limit:
+                result.extend(self._summary(i, 'closed') for i in islice(reversed(self.closed), limit - len(result)))
+        return result
+
+    def get(self, incident_id):
+        """An incident by any of its ids, active or recently closed."""
+        with self._lock:
+            root = self._find(incident_id)
+            if root is not None:
+                return self._summary(self._incidents[root], 'active')
+            for incident in reversed(self.closed):
+                if incident['incident_id'] == incident_id or incident_id in incident['merged_ids']:
+                    return self._summary(incident, 'closed')
+        return None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'active_incidents': len(self._incidents),
+                'tracked_entities': len(self._entities),
+                'alerts_correlated': self.alerts_correlated,
+                'merges': self.merges,
+            }
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Model Hot Reload for the Hybrid AI-IDS API
+Watches the model registry, loads and warms up new versions off the
+request path, and swaps them in with a single assignment.
+"""
+
+import time
+import threading
+import joblib
+import numpy as np
+from ids_logging import get_logger
+from models.flat_forest import used_features
+from models.random_forest_model import RandomForestModel
+
+logger = get_logger('model_reloader')
+
+class ActiveModel:
+    """One loaded model version; never mutated after the swap."""
+
+    __slots__ = ('model', 'version', 'metadata', 'feature_names', 'used_features', 'cascade', 'loaded_at')
+
+    def __init__(self, model, version, metadata, feature_names, cascade=None):
+        # BaseModel around the loaded estimator: predict_proba takes float32 batches
+        self.model = model
+        self.version = version
+        self.metadata = metadata
+        self.feature_names = feature_names
+        # Features the model splits on (None if unknown); lets the sniffer skip the rest
+        self.used_features = used_features(model.model)
+        # Optional CascadeModel: screening model first, self.model only when uncertain
+        self.cascade = cascade
+        self.loaded_at = time.time()
+
+
+class ModelReloader:
+    """Background loader for registry versions with atomic swaps.
+
+    Requests read .active once and use that snapshot throughout, so a
+    swap happens between requests, never inside one. A new version is
+    loaded, checked against its metadata and warmed up with predictions
+    on warmup_rows zero rows (thread pools, lazy allocations) before it
+    becomes active; a version that fails is logged and skipped until the
+    registry points at another one. If the registry is empty the legacy
+    fallback_path joblib file is used. With mmap_mode, forests are opened
+    from their memory-mapped flat arrays (shared by all API processes).
+    With use_cascade, a version's screening stage (if it has one) is
+    loaded too.
+
+    The first post_swap_window inference latencies of each version are
+    kept so the cost of a swap is visible next to the previous version's.
+    """
+
+    def __init__(self, registry, fallback_path=None, check_interval=5.0, warmup_rows=(1, 32),
+                 post_swap_window=200, mmap_mode=None, use_cascade=False):
+        self.registry = registry
+        self.mmap_mode = mmap_mode
+        self.use_cascade = use_cascade
+        self.fallback_path = fallback_path
+        self.check_interval = check_interval
+        self.warmup_rows = warmup_rows
+        self.post_swap_window = post_swap_window
+        self.active = None
+        self._failed_version = None
+        self._watcher = None
+        self._lock = threading.Lock()
+        self.reloads = 0
+        self.failures = 0
+        self.last_reload = None
+        self._post_swap = []
+        self._previous_post_swap = None
+
+    # --- Loading ---
+
+    def _prepare(self, model, version, metadata, cascade=None):
+        feature_names = list(metadata.get('feature_names') or getattr(model.model, 'feature_names_in_', []))
+        expected = getattr(model.model, 'feature_names_in_', None)
+        if expected is not None and list(expected) != feature_names:
+            raise ValueError(f"Feature names in metadata do not match model {version}")
+        if not feature_names:
+            # Fallback if the model has no feature names
+            feature_names = [f'feature_{i}' for i in range(78)]
+        return ActiveModel(model, version, metadata, feature_names, cascade)
+
+    def _warm_up(self, candidate):
+        for rows in self.warmup_rows:
+            batch = np.zeros((rows, len(candidate.feature_names)), dtype=np.float32)
+            candidate.model.predict_proba(batch)
+            if candidate.cascade is not None:
+                candidate.cascade.predict_proba(batch)
+        if candidate.cascade is not None:
+            candidate.cascade.reset_stats()
+
+    def load(self, version=None):
+        """Load, warm up and activate a registry version (default: the current one)."""
+        with self._lock:
+            version = version or self.registry.current_version()
+            started = time.perf_counter()
+            cascade = None
+            if version is None:
+                if self.active is not None or self.fallback_path is None or not self.fallback_path.exists():
+                    if self.active is None:
+                        logger.error("No model in registry %s or at %s", self.registry.root, self.fallback_path)
+                    return False
+                logger.info("Model registry empty, loading model from %s...", self.fallback_path)
+                model, metadata, version = RandomForestModel(), {}, str(self.fallback_path)
+                model.model = joblib.load(self.fallback_path)
+            else:
+                logger.info("Loading model version %s...", version)
+                model = RandomForestModel()
+                model.model, metadata = self.registry.load(version, mmap_mode=self.mmap_mode)
+                if self.use_cascade:
+                    cascade = self.registry.load_cascade(version, model)
+            loaded = time.perf_counter()
+            candidate = self._prepare(model, version, metadata, cascade)
+            self._warm_up(candidate)
+            finished = time.perf_counter()
+
+            previous = self.active
+            self._previous_post_swap = self._post_swap
+            self._post_swap = []
+            self.active = candidate
+            self.reloads += 1
+            self.last_reload = {
+                'version': version,
+                'previous_version': previous.version if previous is not None else None,
+                'at': time.time(),
+                'load_ms': (loaded - started) * 1000,
+                'warmup_ms': (finished - loaded) * 1000,
+                'reload_ms': (finished - started) * 1000,
+            }
+        logger.info("Model %s active (load %.1f ms, warm-up %.1f ms)", version,
+                    self.last_reload['load_ms'], self.last_reload['warmup_ms'])
+        return True
+
+    def maybe_reload(self):
+        """Activate the registry's current version if it changed."""
+        version = None
+        try:
+            version = self.registry.current_version()
+            if version is None or version == self._failed_version:
+                return False
+            if self.active is not None and version == self.active.version:
+                return False
+            return self.load(version)
+        except Exception as e:
+            self.failures += 1
+            self._failed_version = version
+            logger.error("Model reload of %s failed, keeping %s: %s", version,
+                         self.active.version if self.active is not None else None, e)
+            return False
+
+    def start_watching(self):
+        """Poll the registry from a daemon thread and swap in new versions."""
+        if self._watcher is not None:
+            return
+
+        def watch():
+            while True:
+                time.sleep(self.check_interval)
+                self.maybe_reload()
+
+        self._watcher = threading.Thread(target=watch, name='model-registry-watcher', daemon=True)
+        self._watcher.start()
+
+    # --- Post-swap latency ---
+
+    def record_inference(self, active, seconds):
+        """Record an inference latency for the version that served it."""
+        samples = self._post_swap
+        if active is not self.active or len(samples) >= self.post_swap_window:
+            return
+        samples.append(seconds)
+        if len(samples) == self.post_swap_window:
+            summary = self._latency_summary(samples)
+            logger.info("Model %s post-swap latency over %d requests: p50 %.2f ms, p99 %.2f ms, max %.2f ms",
+                        active.version, len(samples), summary['p50_ms'], summary['p99_ms'], summary['max_ms'])
+
+    @staticmethod
+    def _latency_summary(samples):
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        return {
+            'requests': len(ordered),
+            'p50_ms': ordered[len(ordered) // 2] * 1000,
+            'p99_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000,
+            'max_ms': ordered[-1] * 1000,
+        }
+
+    def stats(self):
+        active = self.active
+        return {
+            'version': active.version if active is not None else None,
+            'loaded_at': active.loaded_at if active is not None else None,
+            'metadata': active.metadata if active is not None else None,
+            'used_features': active.used_features if active is not None else None,
+            'cascade': active.cascade.stats() if active is not None and active.cascade is not None else None,
+            'available_versions': self.registry.versions(),
+            'reloads': self.reloads,
+            'failures': self.failures,
+            'last_reload': self.last_reload,
+            'post_swap_latency': self._latency_summary(list(self._post_swap)),
+            'previous_post_swap_latency': self._latency_summary(list(self._previous_post_swap or [])),
+        }
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Rolling Statistics for the Hybrid AI-IDS API
+Per-second ring-buffer counters with incrementally maintained 1m/5m/1h
+totals, and a decayed heavy-hitters sketch for top talkers.
+"""
+
+import math
+import time
+import threading
+
+WINDOWS = {'1m': 60, '5m': 300, '1h': 3600}
+
+class RollingCounters:
+    """Named per-second counters with running sums over fixed windows.
+
+    Each series is a ring buffer of one-second buckets covering the
+    longest window. add() updates the current bucket and every window sum;
+    when the clock moves on, the buckets that leave each window are
+    subtracted from its sum. Both are O(number of windows), and totals()
+    only copies the sums.
+    """
+
+    def __init__(self, names, windows=None):
+        self.windows = dict(windows or WINDOWS)
+        self.horizon = max(self.windows.values())
+        self.names = list(names)
+        self._buckets = {name: [0.0] * self.horizon for name in self.names}
+        self._sums = {label: dict.fromkeys(self.names, 0.0) for label in self.windows}
+        self._second = int(time.time())
+        self._lock = threading.Lock()
+
+    def _advance(self, second):
+        steps = second - self._second
+        if steps <= 0:
+            return
+        if steps >= self.horizon:
+            # Idle for longer than every window: start from zero
+            for name in self.names:
+                self._buckets[name] = [0.0] * self.horizon
+            for sums in self._sums.values():
+                for name in sums:
+                    sums[name] = 0.0
+            self._second = second
+            return
+        horizon = self.horizon
+        for s in range(self._second + 1, second + 1):
+            for label, width in self.windows.items():
+                sums = self._sums[label]
+                leaving = (s - width) % horizon
+                for name in self.names:
+                    sums[name] -= self._buckets[name][leaving]
+            slot = s % horizon
+            for name in self.names:
+                self._buckets[name][slot] = 0.0
+        self._second = second
+
+    def add(self, name, value=1, now=None):
+        second = int(time.time() if now is None else now)
+        with self._lock:
+            self._advance(second)
+            if second < self._second:
+                # Late event: count it in the current second
+                second = self._second
+            self._buckets[name][second % self.horizon] += value
+            for sums in self._sums.values():
+                sums[name] += value
+
+    def totals(self, now=None):
+        """{window label: {name: total}} for the windows ending now."""
+        with self._lock:
+            self._advance(int(time.time() if now is None else now))
+            return {label: dict(sums) for label, sums in self._sums.items()}
+
+
+class DecayedHeavyHitters:
+    """Space-Saving top-k sketch with exponentially decayed counts.
+
+    Weights use forward decay with time constant tau, so a key sending at a
+    steady rate r scores about r * tau - the same as a sliding window of
+    tau seconds. Counts are kept relative to a landmark time and rescaled
+    when the growth factor gets large. Updating a tracked key is O(1);
+    a new key in a full sketch replaces the smallest entry (O(capacity)).
+    """
+
+    def __init__(self, tau, capacity=64):
+        self.tau = tau
+        self.capacity = capacity
+        self._counts = {}
+        self._landmark = time.time()
+        self._lock = threading.Lock()
+
+    def _weight(self, now):
+        exponent = (now - self._landmark) / self.tau
+        if exponent > 50:
+            # Rescale to keep the stored counts in floating-point range
+            scale = math.exp(-exponent)
+            self._counts = {k: c * scale for k, c in self._counts.items()}
+            self._landmark = now
+            exponent = 0.0
+        return math.exp(exponent)
+
+    def add(self, key, value=1, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            weighted = value * self._weight(now)
+            counts = self._counts
+            if key in counts:
+                counts[key] += weighted
+            elif len(counts) < self.capacity:
+                counts[key] = weighted
+            else:
+                smallest = min(counts, key=counts.get)
+                counts[key] = counts.pop(smallest) + weighted
+
+    def top(self, n=10, now=None):
+        """The n heaviest keys as (key, decayed count), heaviest first."""
+        now = time.time() if now is None else now
+        with self._lock:
+            scale = 1.0 / self._weight(now)
+            ranked = sorted(self._counts.items(), key=lambda item: item[1], reverse=True)[:n]
+        return [(key, count * scale) for key, count in ranked]
+
+
+class TrafficStats:
+    """Rolling packet, prediction, alert and latency statistics for the API."""
+
+    SERIES = ('packets', 'bytes', 'predictions', 'alerts_suspicious', 'alerts_malicious',
+              'prediction_latency_total')
+
+    def __init__(self, windows=None, top_talkers=10):
+        self.windows = dict(windows or WINDOWS)
+        self.top_talkers = top_talkers
+        self.counters = RollingCounters(self.SERIES, self.windows)
+        self.talkers = {label: DecayedHeavyHitters(width) for label, width in self.windows.items()}
+
+    def record_packet(self, src, length, now=None):
+        now = time.time() if now is None else now
+        self.counters.add('packets', 1, now)
+        self.counters.add('bytes', length, now)
+        if src:
+            for sketch in self.talkers.values():
+                sketch.add(src, length, now)
+
+    def record_prediction(self, status, latency_seconds, now=None):
+        now = time.time() if now is None else now
+        self.counters.add('predictions', 1, now)
+        self.counters.add('prediction_latency_total', latency_seconds, now)
+        if status in ('suspicious', 'malicious'):
+            self.counters.add(f'alerts_{status}', 1, now)
+
+    def snapshot(self, now=None):
+        now = time.time() if now is None else now
+        totals = self.counters.totals(now)
+        result = {}
+        for label, width in self.windows.items():
+            sums = totals[label]
+            predictions = sums['predictions']
+            result[label] = {
+                'packets': int(sums['packets']),
+                'packets_per_second': sums['packets'] / width,
+                'bytes': int(sums['bytes']),
+                'predictions': int(predictions),
+                'alerts': {
+                    'suspicious': int(sums['alerts_suspicious']),
+                    'malicious': int(sums['alerts_malicious']),
+                },
+                'mean_prediction_latency_ms': sums['prediction_latency_total'] / predictions * 1000 if predictions else 0.0,
+                'top_talkers': [
+                    {'src': src, 'bytes': round(count)}
+                    for src, count in self.talkers[label].top(self.top_talkers, now)
+                ],
+            }
+        return result
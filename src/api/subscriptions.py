@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Dashboard subscriptions for the Hybrid AI-IDS API
+Lets Socket.IO clients subscribe with filters so the server only sends
+them the events they display.
+"""
+
+import threading
+from flask_socketio import join_room, leave_room
+from threat_intel import CIDRMatcher
+
+SEVERITY_RANK = {'low': 0, 'medium': 1, 'high': 2}
+STATUS_SEVERITY = {'normal': 'low', 'suspicious': 'medium', 'malicious': 'high'}
+LEVEL_SEVERITY = {'DEBUG': 'low', 'INFO': 'low', 'WARNING': 'medium', 'ERROR': 'high', 'CRITICAL': 'high'}
+
+UNFILTERED_ROOM = 'subscription:all'
+
+def event_severity(data):
+    """Severity rank of an event from its severity, status or log level field."""
+    severity = data.get('severity')
+    if severity is None:
+        severity = STATUS_SEVERITY.get(data.get('status')) or LEVEL_SEVERITY.get(data.get('level'), 'low')
+    return SEVERITY_RANK.get(severity, 0)
+
+def _items(name, values):
+    if isinstance(values, (str, bytes, dict)) or not hasattr(values, '__iter__'):
+        raise ValueError(f"{name} must be a list")
+    return list(values)
+
+def _strings(name, values):
+    values = _items(name, values)
+    if not all(isinstance(v, str) for v in values):
+        raise ValueError(f"{name} must be a list of strings")
+    return values
+
+def _port(value):
+    """Port number from an int or numeric string; rejects bools, floats and out-of-range values."""
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError(f"Invalid port: {value!r}")
+    try:
+        port = int(value)
+    except ValueError:
+        raise ValueError(f"Invalid port: {value!r}") from None
+    if not 0 <= port <= 65535:
+        raise ValueError(f"Invalid port: {value!r}")
+    return port
+
+
+class SubscriptionFilter:
+    """Event predicate compiled once from a client's filter spec.
+
+    Spec keys (all optional): min_severity ('low'/'medium'/'high'), cidrs
+    (matched against src or dst), ports (matched against destination_port)
+    and event_types. Events missing a field that a filter needs do not match.
+    """
+
+    def __init__(self, min_severity='low', cidrs=None, ports=None, event_types=None):
+        if min_severity not in SEVERITY_RANK:
+            raise ValueError(f"Unknown severity: {min_severity}")
+        self.min_severity = min_severity
+        self.cidrs = sorted(_strings('cidrs', cidrs)) if cidrs else None
+        self.ports = frozenset(_port(p) for p in _items('ports', ports)) if ports else None
+        self.event_types = frozenset(_strings('event_types', event_types)) if event_types else None
+        self._min_rank = SEVERITY_RANK[min_severity]
+        self._cidr_matcher = CIDRMatcher(self.cidrs) if self.cidrs else None
+
+    @classmethod
+    def from_spec(cls, spec):
+        unknown = set(spec) - {'min_severity', 'cidrs', 'ports', 'event_types'}
+        if unknown:
+            raise ValueError(f"Unknown filter keys: {sorted(unknown)}")
+        return cls(**spec)
+
+    @property
+    def key(self):
+        """Canonical identity: clients with equal filters share a room."""
+        return (
+            self.min_severity,
+            tuple(self.cidrs or ()),
+            tuple(sorted(self.ports or ())),
+            tuple(sorted(self.event_types or ())),
+        )
+
+    def spec(self):
+        return {
+            'min_severity': self.min_severity,
+            'cidrs': self.cidrs,
+            'ports': sorted(self.ports) if self.ports else None,
+            'event_types': sorted(self.event_types) if self.event_types else None,
+        }
+
+    def accepts_type(self, event):
+        return self.event_types is None or event in self.event_types
+
+    def matches(self, data):
+        if self._min_rank and event_severity(data) < self._min_rank:
+            return False
+        if self.ports is not None:
+            try:
+                port = int(data.get('destination_port'))
+            except (TypeError, ValueError):
+                return False
+            if port not in self.ports:
+                return False
+        if self._cidr_matcher is not None:
+            matcher = self._cidr_matcher
+            if not (data.get('src') in matcher or data.get('dst') in matcher):
+                return False
+        return True
+
+
+class SubscriptionManager:
+    """Fans events out to Socket.IO rooms, one room per distinct filter.
+
+    Clients start in an unfiltered room that receives everything. A
+    subscribed client joins the room for its filter; each event batch is
+    matched once per room rather than once per client, and serialized once
+    per room. Per-client sent/filtered event counters are kept for stats().
+    """
+
+    def __init__(self, socketio, namespace='/'):
+        self.socketio = socketio
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._clients = {}     # sid -> {'room', 'sent', 'filtered'}
+        self._groups = {}      # room -> [SubscriptionFilter, set of sids]
+
+    def add_client(self, sid):
+        with self._lock:
+            self._clients[sid] = {'room': UNFILTERED_ROOM, 'sent': 0, 'filtered': 0}
+        join_room(UNFILTERED_ROOM, sid=sid, namespace=self.namespace)
+
+    def remove_client(self, sid):
+        with self._lock:
+            client = self._clients.pop(sid, None)
+            if client is not None:
+                self._leave_group(sid, client['room'])
+
+    def subscribe(self, sid, spec):
+        """Apply a filter spec to a client; raises ValueError on a bad spec."""
+        subscription = SubscriptionFilter.from_spec(spec or {})
+        room = f'subscription:{subscription.key!r}'
+        with self._lock:
+            client = self._clients.setdefault(sid, {'room': UNFILTERED_ROOM, 'sent': 0, 'filtered': 0})
+            old_room = client['room']
+            self._leave_group(sid, old_room)
+            group = self._groups.setdefault(room, [subscription, set()])
+            group[1].add(sid)
+            client['room'] = room
+        leave_room(old_room, sid=sid, namespace=self.namespace)
+        join_room(room, sid=sid, namespace=self.namespace)
+        return subscription
+
+    def unsubscribe(self, sid):
+        """Return a client to the unfiltered room."""
+        with self._lock:
+            client = self._clients.get(sid)
+            if client is None or client['room'] == UNFILTERED_ROOM:
+                return
+            old_room = client['room']
+            self._leave_group(sid, old_room)
+            client['room'] = UNFILTERED_ROOM
+        leave_room(old_room, sid=sid, namespace=self.namespace)
+        join_room(UNFILTERED_ROOM, sid=sid, namespace=self.namespace)
+
+    def _leave_group(self, sid, room):
+        group = self._groups.get(room)
+        if group is not None:
+            group[1].discard(sid)
+            if not group[1]:
+                del self._groups[room]
+
+    def _count(self, sids, sent, filtered):
+        for sid in sids:
+            client = self._clients.get(sid)
+            if client is not None:
+                client['sent'] += sent
+                client['filtered'] += filtered
+
+    def emit(self, event, data):
+        """Send a single event to every client whose filter matches it."""
+        with self._lock:
+            groups = [(room, group[0], tuple(group[1])) for room, group in self._groups.items()]
+            unfiltered = [sid for sid, c in self._clients.items() if c['room'] == UNFILTERED_ROOM]
+            self._count(unfiltered, 1, 0)
+        if unfiltered:
+            self.socketio.emit(event, data, to=UNFILTERED_ROOM, namespace=self.namespace)
+        for room, subscription, sids in groups:
+            if subscription.accepts_type(event) and subscription.matches(data):
+                self.socketio.emit(event, data, to=room, namespace=self.namespace)
+                with self._lock:
+                    self._count(sids, 1, 0)
+            else:
+                with self._lock:
+                    self._count(sids, 0, 1)
+
+    def emit_batch(self, event, events, count):
+        """Send a batched frame, filtered per room (used by EventBatcher)."""
+        frame = f'{event}_batch'
+        with self._lock:
+            groups = [(room, group[0], tuple(group[1])) for room, group in self._groups.items()]
+            unfiltered = [sid for sid, c in self._clients.items() if c['room'] == UNFILTERED_ROOM]
+            self._count(unfiltered, len(events), 0)
+        if unfiltered:
+            self.socketio.emit(frame, {'events': events, 'count': count}, to=UNFILTERED_ROOM, namespace=self.namespace)
+        for room, subscription, sids in groups:
+            if subscription.accepts_type(event):
+                matching = [data for data in events if subscription.matches(data)]
+            else:
+                matching = []
+            if matching:
+                # Scale the unsampled total by the matching share of the sample
+                scaled = round(count * len(matching) / len(events))
+                self.socketio.emit(frame, {'events': matching, 'count': scaled}, to=room, namespace=self.namespace)
+            with self._lock:
+                self._count(sids, len(matching), len(events) - len(matching))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'clients': len(self._clients),
+                'filter_groups': len(self._groups),
+                'per_client': {
+                    sid: {
+                        'filter': self._groups[c['room']][0].spec() if c['room'] in self._groups else None,
+                        'sent': c['sent'],
+                        'filtered': c['filtered'],
+                    }
+                    for sid, c in self._clients.items()
+                },
+            }
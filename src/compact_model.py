@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Model Compaction Pipeline for Hybrid AI-IDS
+Searches smaller forests (fewer trees, capped depth, top-k features, or a
+student distilled from the trained forest), reports the accuracy-latency-
+memory Pareto frontier and saves the best model within a latency budget.
+"""
+
+import copy
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.model_selection import train_test_split
+from models.flat_forest import FlatForest
+from performance_tester import measure_latency
+
+# p99 single-row latency budget (compiled engine, as served by the API)
+LATENCY_BUDGET_MS = 2.0
+# Search space
+TREE_SUBSETS = [10, 25, 50]
+RETRAIN_TREES = [10, 25]
+RETRAIN_DEPTHS = [8, 12, 16]
+TOP_K_FEATURES = [10, 20]
+DISTILL_TREES = [10, 25]
+DISTILL_DEPTHS = [8, 12]
+# Perturbed copies of the training set labelled by the teacher for distillation
+DISTILL_AUGMENT_COPIES = 1
+DISTILL_NOISE = 0.05
+LATENCY_SAMPLES = 200
+
+def tree_subset(forest, n_trees):
+    """The first n_trees of a fitted forest (trees are independent, so any subset is a forest)."""
+    subset = copy.copy(forest)
+    subset.estimators_ = forest.estimators_[:n_trees]
+    subset.n_estimators = n_trees
+    return subset
+
+def distill(teacher, X_train, n_estimators, max_depth, random_state=42):
+    """Student forest fitted to the teacher's labels on the training rows and perturbed copies."""
+    rng = np.random.default_rng(random_state)
+    scale = X_train.std().to_numpy() * DISTILL_NOISE
+    frames = [X_train]
+    for _ in range(DISTILL_AUGMENT_COPIES):
+        frames.append(X_train + rng.normal(0.0, 1.0, X_train.shape) * scale)
+    X_distill = pd.concat(frames, ignore_index=True)
+    y_distill = teacher.predict(X_distill)
+    student = RandomForestClassifier(n_estimators=n_estimators, max_depth=max_depth,
+                                     random_state=random_state, n_jobs=-1)
+    return student.fit(X_distill, y_distill)
+
+def evaluate(name, model, X_test, y_test):
+    """Held-out quality, compiled single-row latency and compiled size of a candidate."""
+    columns = list(model.feature_names_in_)
+    X_eval = X_test[columns]
+    compiled = FlatForest.from_sklearn(model)
+    y_pred = compiled.predict(X_eval)
+    timings = []
+    for i in np.linspace(0, len(X_eval) - 1, LATENCY_SAMPLES).astype(int):
+        timings.append(measure_latency(compiled.predict_proba, X_eval.iloc[[i]], 5)[0])
+    nbytes = sum(a.nbytes for a in (compiled.feature, compiled.threshold, compiled.children, compiled.value))
+    return {
+        'candidate': name,
+        'trees': compiled.n_estimators,
+        'nodes': compiled.n_nodes,
+        'max_depth': compiled.max_depth,
+        'features': len(columns),
+        'accuracy': accuracy_score(y_test, y_pred),
+        'f1_weighted': f1_score(y_test, y_pred, average='weighted'),
+        'p50_ms': float(np.median(timings)),
+        'p99_ms': float(np.percentile(timings, 99)),
+        'size_mb': nbytes / 2**20,
+    }
+
+def pareto_frontier(results):
+    """Candidates not dominated on (f1_weighted up, p99_ms down, size_mb down)."""
+    def dominates(a, b):
+        no_worse = a['f1_weighted'] >= b['f1_weighted'] and a['p99_ms'] <= b['p99_ms'] and a['size_mb'] <= b['size_mb']
+        better = a['f1_weighted'] > b['f1_weighted'] or a['p99_ms'] < b['p99_ms'] or a['size_mb'] < b['size_mb']
+        return no_worse and better
+    return results.assign(pareto=[
+        not any(dominates(other, row) for _, other in results.iterrows())
+        for _, row in results.iterrows()
+    ])
+
+def main():
+    """Main function to run the model compaction pipeline."""
+    print("Starting Model Compaction Pipeline")
+    print("="*60)
+
+    # --- 1. Load Data and Teacher Model ---
+    processed_data_path = Path('../data/processed/processed_cicids2017.parquet')
+    models_path = Path('../models/')
+    teacher_path = models_path / 'random_forest_optimized_model.joblib'
+    if not teacher_path.exists():
+        teacher_path = models_path / 'random_forest_model.joblib'
+
+    if not processed_data_path.exists() or not teacher_path.exists():
+        print("Error: Processed data or trained model not found.")
+        print("Please run the preprocessing and training scripts first.")
+        return
+
+    df = pd.read_parquet(processed_data_path)
+    X = df.drop(columns=['label'])
+    y = df['label']
+
+    # Use the same split as in training
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+
+    print(f"Loading teacher model from {teacher_path}...")
+    teacher = joblib.load(teacher_path)
+
+    # --- 2. Build Candidates ---
+    candidates = [('teacher', lambda: teacher)]
+    for n_trees in TREE_SUBSETS:
+        if n_trees < len(teacher.estimators_):
+            candidates.append((f'subset_{n_trees}', lambda n=n_trees: tree_subset(teacher, n)))
+    for n_trees in RETRAIN_TREES:
+        for depth in RETRAIN_DEPTHS:
+            candidates.append((f'rf_{n_trees}_depth{depth}', lambda n=n_trees, d=depth: RandomForestClassifier(
+                n_estimators=n, max_depth=d, random_state=42, n_jobs=-1).fit(X_train, y_train)))
+    ranked_features = X_train.columns[np.argsort(teacher.feature_importances_)[::-1]]
+    for k in TOP_K_FEATURES:
+        if k < X_train.shape[1]:
+            columns = list(ranked_features[:k])
+            candidates.append((f'top{k}_features', lambda c=columns: RandomForestClassifier(
+                n_estimators=max(RETRAIN_TREES), max_depth=max(RETRAIN_DEPTHS), random_state=42,
+                n_jobs=-1).fit(X_train[c], y_train)))
+    for n_trees in DISTILL_TREES:
+        for depth in DISTILL_DEPTHS:
+            candidates.append((f'distilled_{n_trees}_depth{depth}',
+                               lambda n=n_trees, d=depth: distill(teacher, X_train, n, d)))
+
+    # --- 3. Evaluate ---
+    print(f"\nEvaluating {len(candidates)} candidates on {len(X_test)} held-out rows...")
+    models, results = {}, []
+    for name, build in candidates:
+        start_time = time.perf_counter()
+        models[name] = build()
+        result = evaluate(name, models[name], X_test, y_test)
+        result['build_s'] = time.perf_counter() - start_time
+        results.append(result)
+        print(f"  - {name:<24} f1 {result['f1_weighted']:.4f}  p99 {result['p99_ms']:7.3f} ms  "
+              f"{result['size_mb']:8.2f} MB  ({result['trees']} trees, {result['features']} features)")
+
+    results = pareto_frontier(pd.DataFrame(results))
+    frontier = results[results.pareto].sort_values('p99_ms')
+    print("\nPareto frontier (F1 vs p99 latency vs size):")
+    print(frontier[['candidate', 'accuracy', 'f1_weighted', 'p50_ms', 'p99_ms', 'size_mb']].to_string(index=False))
+    frontier_path = models_path / 'compaction_frontier.csv'
+    results.to_csv(frontier_path, index=False)
+    print(f"\nAll candidates saved to {frontier_path}")
+
+    # --- 4. Save the Best Model Within the Budget ---
+    within_budget = results[results.p99_ms <= LATENCY_BUDGET_MS]
+    if within_budget.empty:
+        print(f"\nNo candidate meets the p99 budget of {LATENCY_BUDGET_MS} ms; nothing saved.")
+        return
+    best = within_budget.sort_values(['f1_weighted', 'p99_ms'], ascending=[False, True]).iloc[0]
+    print(f"\nBest within p99 <= {LATENCY_BUDGET_MS} ms: {best.candidate} "
+          f"(f1 {best.f1_weighted:.4f}, p99 {best.p99_ms:.3f} ms, {best.size_mb:.2f} MB)")
+
+    compact_model_path = models_path / 'random_forest_compact_model.joblib'
+    joblib.dump(models[best.candidate], compact_model_path)
+    print(f"Compact model saved to {compact_model_path}")
+
+    print("\n" + "="*60)
+    print("Model compaction complete.")
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@
 Model Evaluation Pipeline for Hybrid AI-IDS
 """
 
+import numpy as np
 import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
@@ -12,6 +13,16 @@ from sklearn.metrics import classification_report, confusion_matrix, accuracy_sc
 
 # Import models
 from models.random_forest_model import RandomForestModel
+from models.ensemble_model import EnsembleModel
+
+# Backends fused by the ensemble evaluation (those not found are left out)
+ENSEMBLE_BACKENDS = {
+    'random_forest': 'random_forest_model.joblib',
+    'compact_forest': 'random_forest_compact_model.joblib',
+}
+ENSEMBLE_TIMEOUT_SECONDS = 5.0
+# Rows per predict_proba call when streaming the test set through a model
+BATCH_ROWS = 1024
 
 def main():
     """Main function to run the model evaluation pipeline."""
@@ -42,7 +53,9 @@ def main():
         rf_model = RandomForestModel()
         rf_model.load(str(rf_model_path))
 
-        y_pred = rf_model.predict(X_test)
+        test_batch = rf_model.as_batch(X_test)
+        y_pred = np.concatenate([rf_model.classes_[proba.argmax(axis=1)]
+                                 for proba in rf_model.predict_batches([test_batch], BATCH_ROWS)])
 
         # --- 3. Generate Reports ---
         # --- 3. Generate Reports ---
@@ -87,6 +100,28 @@ def main():
     else:
         print("Random Forest model not found. Please train it first.")
 
+    # --- 4. Evaluate Ensemble of Available Backends ---
+    backends, inputs = {}, {}
+    for name, file_name in ENSEMBLE_BACKENDS.items():
+        if (models_path / file_name).exists():
+            backend = RandomForestModel()
+            backend.load(str(models_path / file_name))
+            backends[name] = backend
+            # Backends may be trained on a subset of the columns (e.g. top-k features)
+            columns = [X_test.columns.get_loc(f) for f in backend.feature_names]
+            inputs[name] = lambda batch, columns=np.array(columns): batch[:, columns]
+    if len(backends) > 1:
+        print(f"\n--- Evaluating Ensemble ({', '.join(backends)}) ---")
+        ensemble = EnsembleModel(backends, classes=sorted(y.unique()), timeout=ENSEMBLE_TIMEOUT_SECONDS,
+                                 inputs=inputs)
+        test_batch = X_test.to_numpy(dtype=np.float32)
+        y_pred = np.concatenate([ensemble.classes_[proba.argmax(axis=1)]
+                                 for proba in ensemble.predict_batches([test_batch], BATCH_ROWS)])
+        print(f"Ensemble accuracy: {accuracy_score(y_test, y_pred):.4f}")
+        for name, backend in ensemble.stats()['backends'].items():
+            print(f"  - {name:<16} p50 {backend['p50_ms']:8.2f} ms, p99 {backend['p99_ms']:8.2f} ms per "
+                  f"{BATCH_ROWS}-row batch, timeouts {backend['timeouts']}, skipped {backend['skipped']}")
+
     print("\n" + "="*60)
     print("Phase 4: Model Development (Evaluation) complete.")
 
@@ -5,24 +5,91 @@ Defines the common interface for all detection models.
 """
 
 from abc import ABC, abstractmethod
+import numpy as np
 import pandas as pd
 
 class BaseModel(ABC):
-    """Abstract base class for detection models."""
+    """Abstract base class for detection models.
+
+    Every backend scores the same kind of input: float32 matrices of shape
+    [rows, *input_shape] whose last axis follows feature_names (the
+    declared input schema). as_batch() converts DataFrames and flat rows
+    to that form; predict_proba() and predict_batches() never print.
+    """
+
+    # Declared input schema (None: not known until trained or loaded);
+    # input_shape defaults to one vector of len(feature_names)
+    feature_names = None
+    input_shape = None
 
     def __init__(self):
         self.model = None
 
+    def row_shape(self):
+        """Shape of one input row, without the batch axis."""
+        if self.input_shape is not None:
+            return tuple(self.input_shape)
+        return (len(self.feature_names),) if self.feature_names is not None else None
+
+    def input_schema(self):
+        return {
+            'feature_names': list(self.feature_names) if self.feature_names is not None else None,
+            'input_shape': self.row_shape(),
+            'dtype': 'float32',
+        }
+
+    def as_batch(self, X) -> np.ndarray:
+        """X (DataFrame, matrix or single row) as a float32 [rows, *input_shape] matrix.
+
+        DataFrame columns are selected in feature_names order; flat rows of
+        the right size are reshaped to input_shape.
+        """
+        if isinstance(X, pd.DataFrame):
+            if self.feature_names is not None:
+                X = X[list(self.feature_names)]
+            X = X.to_numpy()
+        batch = np.asarray(X, dtype=np.float32)
+        if batch.ndim == 1:
+            batch = batch.reshape(1, -1)
+        shape = self.row_shape()
+        if shape is not None and batch.shape[1:] != shape:
+            if int(np.prod(batch.shape[1:])) != int(np.prod(shape)):
+                raise ValueError(f"Expected rows of shape {shape}, got {batch.shape[1:]}")
+            batch = batch.reshape((len(batch),) + shape)
+        return batch
+
     @abstractmethod
     def train(self, X_train: pd.DataFrame, y_train: pd.Series):
         """Trains the model."""
         pass
 
     @abstractmethod
-    def predict(self, X_test: pd.DataFrame) -> pd.Series:
-        """Makes predictions on new data."""
+    def predict_proba(self, batch: np.ndarray) -> np.ndarray:
+        """Class probabilities [rows, classes] for a float32 batch (see as_batch)."""
         pass
 
+    def predict(self, X_test) -> np.ndarray:
+        """Makes predictions on new data."""
+        return self.classes_[np.argmax(self.predict_proba(self.as_batch(X_test)), axis=1)]
+
+    def predict_batches(self, iterable, batch_size=1024):
+        """Streams predict_proba over an iterable of rows or matrices.
+
+        Items are regrouped into batches of batch_size rows (the last one
+        may be shorter); yields one probability matrix per batch.
+        """
+        pending, rows = [], 0
+        for item in iterable:
+            item = self.as_batch(item)
+            pending.append(item)
+            rows += len(item)
+            while rows >= batch_size:
+                batch = np.concatenate(pending) if len(pending) > 1 else pending[0]
+                yield self.predict_proba(batch[:batch_size])
+                pending, rows = [batch[batch_size:]], rows - batch_size
+        if rows:
+            yield self.predict_proba(np.concatenate(pending))
+
     @abstractmethod
     def save(self, file_path: str):
         """Saves the trained model to a file."""
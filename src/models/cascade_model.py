@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Early-Exit Cascade for Hybrid AI-IDS
+A small screening forest over a few features scores every row; only rows
+it is unsure about, or that rules flagged, go on to the full model.
+"""
+
+import time
+import threading
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from .base_model import BaseModel
+from .flat_forest import FlatForest, estimator_input
+
+class CascadeModel(BaseModel):
+    """Two-stage classifier: screening model first, full model on escalation.
+
+    A row exits after the screen when the screen gives the benign class a
+    probability of at least exit_threshold and the row is not flagged;
+    every other row (the uncertainty band below the threshold, predicted
+    attacks and rule-flagged rows) is rescored by the full model. Outputs
+    use the full model's class order; inputs follow its feature_names.
+
+    Every audit_every-th early exit is also scored by the full model, so
+    stats() can report how often the cascade agrees with full-model-only
+    scoring, next to the escalation rate and per-stage latency.
+    """
+
+    def __init__(self, full_model, screen_model=None, screen_features=None, exit_threshold=0.98,
+                 benign_class=0, n_screen_features=10, n_estimators=10, max_depth=6, audit_every=100):
+        super().__init__()
+        self.full_model = full_model
+        self.model = screen_model
+        self._set_screen_features(screen_features)
+        self.exit_threshold = exit_threshold
+        self.benign_class = benign_class
+        self.n_screen_features = n_screen_features
+        self.n_estimators = n_estimators
+        self.max_depth = max_depth
+        self.audit_every = audit_every
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    @property
+    def classes_(self):
+        return self.full_model.classes_
+
+    @property
+    def feature_names(self):
+        return self.full_model.feature_names
+
+    def _set_screen_features(self, screen_features):
+        self.screen_features = list(screen_features) if screen_features is not None else None
+        # Columns of the screen's features in the full model's input
+        self._screen_columns = None
+        if self.screen_features is not None:
+            names = list(self.feature_names)
+            self._screen_columns = np.array([names.index(f) for f in self.screen_features])
+
+    def reset_stats(self):
+        self.rows = 0
+        self.escalated = 0
+        self.flagged = 0
+        self.audited = 0
+        self.audit_agreements = 0
+        self.screen_seconds = 0.0
+        self.full_seconds = 0.0
+        self._exits_since_audit = 0
+
+    def train(self, X_train: pd.DataFrame, y_train: pd.Series):
+        """Trains the screening model on the full model's most important features."""
+        print("Training cascade screening model...")
+        importances = self.full_model.model.feature_importances_
+        ranked = np.argsort(importances)[::-1][:self.n_screen_features]
+        self._set_screen_features([str(X_train.columns[i]) for i in sorted(ranked)])
+        self.model = RandomForestClassifier(n_estimators=self.n_estimators, max_depth=self.max_depth,
+                                            random_state=42, n_jobs=-1)
+        self.model.fit(X_train[self.screen_features], y_train)
+        print(f"Training complete ({len(self.screen_features)} features).")
+
+    def compile(self):
+        """Flattens the screening forest for vectorized inference (same probabilities)."""
+        if not isinstance(self.model, FlatForest):
+            self.model = FlatForest.from_sklearn(self.model)
+        return self
+
+    def _screen_proba(self, batch):
+        """Screen probabilities in the full model's class order."""
+        proba = self.model.predict_proba(estimator_input(self.model, batch[:, self._screen_columns]))
+        full_classes = list(self.full_model.classes_)
+        aligned = np.zeros((len(batch), len(full_classes)))
+        for column, cls in enumerate(self.model.classes_):
+            aligned[:, full_classes.index(cls)] = proba[:, column]
+        return aligned
+
+    def predict_proba(self, batch: np.ndarray, flagged=None) -> np.ndarray:
+        """Class probabilities; flagged marks rows that must get the full model."""
+        clock = time.perf_counter
+        started = clock()
+        batch = self.as_batch(batch)
+        proba = self._screen_proba(batch)
+        screened = clock()
+        benign_column = list(self.full_model.classes_).index(self.benign_class)
+        escalate = proba[:, benign_column] < self.exit_threshold
+        if flagged is not None:
+            flagged = np.asarray(flagged, dtype=bool)
+            escalate |= flagged
+
+        with self._lock:
+            # Audit a sample of early exits against the full model
+            exits = np.flatnonzero(~escalate)
+            audit = exits[(self._exits_since_audit + np.arange(1, len(exits) + 1)) % self.audit_every == 0]
+            self._exits_since_audit = (self._exits_since_audit + len(exits)) % self.audit_every
+
+        rescore = np.flatnonzero(escalate)
+        full_rows = np.concatenate([rescore, audit])
+        if len(full_rows):
+            full_proba = self.full_model.predict_proba(batch[full_rows])
+            agreements = int((full_proba[len(rescore):].argmax(axis=1) == proba[audit].argmax(axis=1)).sum())
+            proba[rescore] = full_proba[:len(rescore)]
+        else:
+            agreements = 0
+        finished = clock()
+
+        with self._lock:
+            self.rows += len(batch)
+            self.escalated += len(rescore)
+            self.flagged += int(flagged.sum()) if flagged is not None else 0
+            self.audited += len(audit)
+            self.audit_agreements += agreements
+            self.screen_seconds += screened - started
+            self.full_seconds += finished - screened
+        return proba
+
+    def predict(self, X_test, flagged=None) -> np.ndarray:
+        """Makes predictions through the cascade."""
+        return self.classes_[self.predict_proba(X_test, flagged).argmax(axis=1)]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'rows': self.rows,
+                'escalation_rate': self.escalated / self.rows if self.rows else 0.0,
+                'flagged_rows': self.flagged,
+                'audited_exits': self.audited,
+                'audit_agreement': self.audit_agreements / self.audited if self.audited else None,
+                'mean_screen_ms': self.screen_seconds / self.rows * 1000 if self.rows else 0.0,
+                # Full-model time spread over all rows, i.e. what each row costs on average
+                'mean_full_ms_per_row': self.full_seconds / self.rows * 1000 if self.rows else 0.0,
+            }
+
+    def save(self, file_path: str):
+        """Saves the screening model and cascade settings (the full model is saved separately)."""
+        print(f"Saving screening model to {file_path}...")
+        joblib.dump({
+            'screen_model': self.model,
+            'screen_features': self.screen_features,
+            'exit_threshold': self.exit_threshold,
+            'benign_class': self.benign_class,
+        }, file_path)
+
+    def load(self, file_path: str):
+        """Loads the screening model and cascade settings."""
+        print(f"Loading screening model from {file_path}...")
+        state = joblib.load(file_path)
+        self.model = state['screen_model']
+        self._set_screen_features(state['screen_features'])
+        self.exit_threshold = state['exit_threshold']
+        self.benign_class = state['benign_class']
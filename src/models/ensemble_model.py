@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Parallel Ensemble for Hybrid AI-IDS
+Scores one batch with several backends (random forest, LSTM, GNN, ...)
+concurrently in a thread pool and fuses their class probabilities.
+"""
+
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+from .base_model import BaseModel
+
+class EnsembleModel(BaseModel):
+    """Concurrent ensemble over backends that expose predict_proba.
+
+    backends maps a name to a fitted model; inputs optionally maps a name
+    to a function turning the shared batch into that backend's input (e.g.
+    LSTM windows or a flow graph). Every backend gets its own worker and
+    the same batch; a backend that has not answered after its timeout
+    (timeouts[name], default timeout seconds) is left out of this batch's
+    fusion, and skipped while its late call is still running, so a slow
+    or stuck model degrades the ensemble instead of blocking it.
+
+    fusion='weighted' averages the answering backends' probabilities with
+    weights (default 1 each). fusion='stacking' feeds all backends'
+    probabilities to a logistic regression fitted by train(); a batch
+    with missing backends falls back to the weighted average.
+    """
+
+    def __init__(self, backends, classes, weights=None, fusion='weighted', timeout=0.05, timeouts=None,
+                 inputs=None, latency_window=1000):
+        super().__init__()
+        if fusion not in ('weighted', 'stacking'):
+            raise ValueError(f"Unknown fusion: {fusion}")
+        for name, backend in backends.items():
+            if not hasattr(backend, 'predict_proba'):
+                raise TypeError(f"Backend {name} has no predict_proba")
+        self.backends = dict(backends)
+        self.classes_ = np.asarray(classes)
+        self.weights = {name: 1.0 for name in self.backends}
+        self.weights.update(weights or {})
+        self.fusion = fusion
+        self.timeout = timeout
+        self.timeouts = dict(timeouts or {})
+        self.inputs = dict(inputs or {})
+        self.model = None  # stacking meta-model
+        self._pool = ThreadPoolExecutor(max_workers=len(self.backends), thread_name_prefix='ensemble')
+        self._stalled = {}  # name -> future of a call that missed its timeout
+        self._lock = threading.Lock()
+        self._latency = {name: deque(maxlen=latency_window) for name in self.backends}
+        self._counts = {name: {'calls': 0, 'timeouts': 0, 'skipped': 0, 'errors': 0} for name in self.backends}
+        self.batches = 0
+        self.degraded_batches = 0
+
+    # --- Backends ---
+
+    def _score(self, name, X):
+        """Runs in the pool: one backend's probabilities in the ensemble's class order."""
+        backend = self.backends[name]
+        started = time.perf_counter()
+        try:
+            batch = self.inputs[name](X) if name in self.inputs else X
+            proba = np.asarray(backend.predict_proba(batch), dtype=np.float64)
+        finally:
+            with self._lock:
+                self._latency[name].append(time.perf_counter() - started)
+        backend_classes = getattr(backend, 'classes_', None)
+        if backend_classes is None or np.array_equal(backend_classes, self.classes_):
+            return proba
+        aligned = np.zeros((len(proba), len(self.classes_)))
+        for column, cls in enumerate(backend_classes):
+            aligned[:, np.flatnonzero(self.classes_ == cls)[0]] = proba[:, column]
+        return aligned
+
+    def backend_proba(self, X):
+        """{name: probabilities} for the backends that answered within their timeout."""
+        started = time.perf_counter()
+        futures = {}
+        with self._lock:
+            for name in self.backends:
+                stalled = self._stalled.get(name)
+                if stalled is not None:
+                    if not stalled.done():
+                        self._counts[name]['skipped'] += 1
+                        continue
+                    del self._stalled[name]
+                self._counts[name]['calls'] += 1
+                futures[name] = self._pool.submit(self._score, name, X)
+
+        results = {}
+        for name, future in futures.items():
+            remaining = started + self.timeouts.get(name, self.timeout) - time.perf_counter()
+            try:
+                results[name] = future.result(timeout=max(remaining, 0.0))
+            except FutureTimeout:
+                with self._lock:
+                    self._counts[name]['timeouts'] += 1
+                    self._stalled[name] = future
+            except Exception:
+                with self._lock:
+                    self._counts[name]['errors'] += 1
+        with self._lock:
+            self.batches += 1
+            if len(results) < len(self.backends):
+                self.degraded_batches += 1
+        return results
+
+    # --- Fusion ---
+
+    def _weighted(self, results):
+        total = sum(self.weights[name] for name in results)
+        return sum(self.weights[name] * proba for name, proba in results.items()) / total
+
+    def _stack_features(self, results):
+        return np.hstack([results[name] for name in self.backends])
+
+    def train(self, X_train: pd.DataFrame, y_train: pd.Series):
+        """Fits the stacking meta-model on the backends' probabilities.
+
+        The backends must already be fitted, and X_train should be rows
+        they were not trained on, or the meta-model learns their training fit.
+        """
+        print("Training ensemble stacking model...")
+        results = {name: self._score(name, X_train) for name in self.backends}
+        self.model = LogisticRegression(max_iter=1000)
+        self.model.fit(self._stack_features(results), y_train)
+        print("Training complete.")
+
+    def predict_proba(self, X):
+        results = self.backend_proba(X)
+        if not results:
+            raise TimeoutError("No ensemble backend answered within its timeout")
+        if self.fusion == 'stacking' and self.model is not None and len(results) == len(self.backends):
+            proba = self.model.predict_proba(self._stack_features(results))
+            fused = np.zeros((len(proba), len(self.classes_)))
+            for column, cls in enumerate(self.model.classes_):
+                fused[:, np.flatnonzero(self.classes_ == cls)[0]] = proba[:, column]
+            return fused
+        return self._weighted(results)
+
+    def predict(self, X):
+        """Makes predictions with the fused probabilities."""
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+    def stats(self):
+        with self._lock:
+            backends = {}
+            for name in self.backends:
+                samples = sorted(self._latency[name])
+                backends[name] = {
+                    **self._counts[name],
+                    'weight': self.weights[name],
+                    'p50_ms': samples[len(samples) // 2] * 1000 if samples else None,
+                    'p99_ms': samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000 if samples else None,
+                }
+            return {
+                'fusion': self.fusion,
+                'batches': self.batches,
+                'degraded_batches': self.degraded_batches,
+                'backends': backends,
+            }
+
+    def save(self, file_path: str):
+        """Saves the fusion settings and stacking model (backends are saved separately)."""
+        print(f"Saving ensemble to {file_path}...")
+        joblib.dump({
+            'weights': self.weights,
+            'fusion': self.fusion,
+            'timeout': self.timeout,
+            'timeouts': self.timeouts,
+            'stacker': self.model,
+        }, file_path)
+
+    def load(self, file_path: str):
+        """Loads the fusion settings and stacking model."""
+        print(f"Loading ensemble from {file_path}...")
+        state = joblib.load(file_path)
+        self.weights.update(state['weights'])
+        self.fusion = state['fusion']
+        self.timeout = state['timeout']
+        self.timeouts = state['timeouts']
+        self.model = state['stacker']
+
+
+def benchmark(n_samples=40000, n_features=40, batch_rows=256, batches=25, stacking_rows=2000):
+    """Per-backend latency and fused accuracy, with and without a backend that misses its timeout."""
+    from sklearn.ensemble import RandomForestClassifier, ExtraTreesClassifier
+    from sklearn.model_selection import train_test_split
+    from .flat_forest import FlatForest
+
+    rng = np.random.default_rng(0)
+    X = rng.random((n_samples, n_features))
+    y = (X[:, 0] + rng.normal(0, 0.3, n_samples) > 0.5).astype(int) + (X[:, 1] > 0.8)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.25, random_state=42)
+    forest = RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=-1).fit(X_train, y_train)
+    extra = ExtraTreesClassifier(n_estimators=100, random_state=42, n_jobs=-1).fit(X_train, y_train)
+
+    class Stalled:
+        """A backend that occasionally stalls (e.g. a GNN waiting on graph construction)."""
+        classes_ = forest.classes_
+
+        def __init__(self):
+            self.calls = 0
+
+        def predict_proba(self, X):
+            self.calls += 1
+            if self.calls % 5 == 0:
+                time.sleep(0.5)
+            return forest.predict_proba(X)
+
+    configurations = [
+        ('forest only', {'forest': FlatForest.from_sklearn(forest)}, 'weighted'),
+        ('weighted', {'forest': FlatForest.from_sklearn(forest), 'extra_trees': FlatForest.from_sklearn(extra)},
+         'weighted'),
+        ('stacking', {'forest': FlatForest.from_sklearn(forest), 'extra_trees': FlatForest.from_sklearn(extra)},
+         'stacking'),
+        ('with stalls', {'forest': FlatForest.from_sklearn(forest), 'stalled': Stalled()}, 'weighted'),
+    ]
+    for label, backends, fusion in configurations:
+        ensemble = EnsembleModel(backends, forest.classes_, fusion=fusion, timeout=0.2)
+        if fusion == 'stacking':
+            ensemble.train(X_test[-stacking_rows:], y_test[-stacking_rows:])
+        correct, timings = 0, []
+        for i in range(batches):
+            rows = slice(i * batch_rows, (i + 1) * batch_rows)
+            started = time.perf_counter()
+            correct += int((ensemble.predict(X_test[rows]) == y_test[rows]).sum())
+            timings.append(time.perf_counter() - started)
+        stats = ensemble.stats()
+        print(f"{label:<12} accuracy {correct / (batches * batch_rows):.4f}, "
+              f"batch p50 {np.median(timings) * 1000:7.2f} ms, max {max(timings) * 1000:7.2f} ms, "
+              f"degraded {stats['degraded_batches']}/{stats['batches']}")
+        for name, backend in stats['backends'].items():
+            print(f"    {name:<12} p50 {backend['p50_ms']:7.2f} ms, p99 {backend['p99_ms']:7.2f} ms, "
+                  f"timeouts {backend['timeouts']}, skipped {backend['skipped']}")
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Flat Forest Inference for Hybrid AI-IDS
+Compiles a fitted sklearn forest into contiguous NumPy arrays evaluated
+for all trees and rows at once. The arrays are stored as plain .npy files
+that can be opened with mmap_mode='r', so processes loading the same
+artifact share one page-cache copy instead of unpickling a private heap
+copy each.
+
+Layout of an artifact directory:
+
+    forest.json          classes, feature names, tree roots, depth, shapes
+    feature.npy          split feature per node (int32, 0 at leaves)
+    threshold.npy        split threshold per node (float64)
+    children.npy         [left, right] node indices, global across trees (int32, self at leaves)
+    value.npy            class probabilities per node (float64)
+    importances.npy      feature importances of the forest
+"""
+
+import os
+import json
+import time
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+FORMAT_VERSION = 2
+META_FILE = 'forest.json'
+ARRAYS = ('feature', 'threshold', 'children', 'value', 'importances')
+# Rows evaluated per traversal pass; keeps the (rows x trees) node matrix in cache
+CHUNK_ROWS = 2048
+# Traversal steps between drops of (row, tree) pairs that reached a leaf
+COMPACT_EVERY = 4
+
+def is_flat_forest(path) -> bool:
+    return (Path(path) / META_FILE).exists()
+
+def used_features(model):
+    """Names of the features a tree model splits on, or None if that is unknown."""
+    names = getattr(model, 'feature_names_in_', None)
+    if names is None:
+        return None
+    if isinstance(model, FlatForest):
+        internal = model.children[:, 0] != np.arange(model.n_nodes)
+        indices = np.unique(model.feature[internal])
+    elif hasattr(model, 'estimators_') or hasattr(model, 'tree_'):
+        trees = [model] if hasattr(model, 'tree_') else np.ravel(model.estimators_)
+        indices = np.unique(np.concatenate([t.tree_.feature[t.tree_.feature >= 0] for t in trees]))
+    else:
+        return None
+    return [str(names[i]) for i in indices]
+
+def estimator_input(estimator, batch):
+    """batch in the form the estimator's predict_proba takes without a feature-name warning.
+
+    FlatForest takes the float32 matrix as is; sklearn estimators fitted
+    on a DataFrame get one back with their feature names as columns.
+    """
+    names = getattr(estimator, 'feature_names_in_', None)
+    if names is None or isinstance(estimator, FlatForest):
+        return batch
+    return pd.DataFrame(batch, columns=names)
+
+
+class FlatForest:
+    """Random forest classifier evaluated from flat node arrays.
+
+    Node arrays of all trees are concatenated; roots holds each tree's
+    first node and child indices are global. Traversal advances every
+    (row, tree) pair one level per step with a few array gathers - no
+    per-tree or per-row Python loop. Leaves point at themselves, so a
+    finished pair stays put; every few steps finished pairs are dropped
+    from the working set, so the cost follows the actual path lengths
+    rather than the deepest tree.
+
+    Inference follows sklearn: inputs are cast to float32, a sample goes
+    left when X[feature] <= threshold, and the forest probability is the
+    mean of the trees' normalized leaf values. Exposes predict,
+    predict_proba, classes_, feature_names_in_, n_features_in_ and
+    feature_importances_, so it can stand in for the sklearn estimator at
+    inference time.
+    """
+
+    def __init__(self, feature, threshold, children, value, roots, max_depth, classes, n_features,
+                 feature_names=None, importances=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.value = value
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.max_depth = max_depth
+        self.classes_ = np.asarray(classes)
+        self.n_classes_ = len(self.classes_)
+        self.n_features_in_ = n_features
+        if feature_names is not None:
+            self.feature_names_in_ = np.asarray(feature_names, dtype=object)
+        self.feature_importances_ = importances
+
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    # --- Conversion ---
+
+    @classmethod
+    def from_sklearn(cls, estimator):
+        """Flatten a fitted RandomForestClassifier (or any forest of DecisionTreeClassifiers)."""
+        if getattr(estimator, 'n_outputs_', 1) != 1:
+            raise ValueError("Only single-output forests can be flattened")
+        features, thresholds, children, values, roots = [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for tree in (t.tree_ for t in estimator.estimators_):
+            nodes = np.arange(offset, offset + tree.node_count, dtype=np.int32)
+            leaf = tree.children_left < 0
+            value = tree.value[:, 0, :].astype(np.float64)
+            totals = value.sum(axis=1, keepdims=True)
+            totals[totals == 0] = 1.0
+            roots.append(offset)
+            features.append(np.where(leaf, 0, tree.feature).astype(np.int32))
+            thresholds.append(tree.threshold.astype(np.float64))
+            children.append(np.stack([
+                np.where(leaf, nodes, tree.children_left + offset),
+                np.where(leaf, nodes, tree.children_right + offset),
+            ], axis=1).astype(np.int32))
+            values.append(value / totals)
+            max_depth = max(max_depth, tree.max_depth)
+            offset += tree.node_count
+        return cls(
+            np.concatenate(features), np.concatenate(thresholds), np.concatenate(children),
+            np.concatenate(values), roots, max_depth, estimator.classes_, estimator.n_features_in_,
+            getattr(estimator, 'feature_names_in_', None),
+            getattr(estimator, 'feature_importances_', None),
+        )
+
+    def verify(self, estimator, X, atol=1e-9):
+        """Max absolute probability difference to the sklearn estimator; ValueError above atol."""
+        error = float(np.abs(self.predict_proba(X) - estimator.predict_proba(X)).max())
+        if error > atol:
+            raise ValueError(f"Flat forest deviates from sklearn by {error:.3g} (tolerance {atol:.3g})")
+        return error
+
+    # --- Storage ---
+
+    def save(self, path):
+        """Write the artifact directory (atomically replacing an existing one)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta = {
+            'format_version': FORMAT_VERSION,
+            'roots': self.roots.tolist(),
+            'max_depth': self.max_depth,
+            'classes': self.classes_.tolist(),
+            'feature_names': list(map(str, self.feature_names_in_)) if hasattr(self, 'feature_names_in_') else None,
+            'n_features': self.n_features_in_,
+            'n_nodes': self.n_nodes,
+            'n_classes': self.n_classes_,
+        }
+        staging = Path(tempfile.mkdtemp(prefix=f'.{path.name}-', dir=path.parent))
+        try:
+            for name in ARRAYS:
+                array = self.feature_importances_ if name == 'importances' else getattr(self, name)
+                if array is not None:
+                    np.save(staging / f'{name}.npy', np.ascontiguousarray(array))
+            with open(staging / META_FILE, 'w') as f:
+                json.dump(meta, f, default=str)
+            if path.exists():
+                shutil.rmtree(path)
+            os.rename(staging, path)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+    @classmethod
+    def load(cls, path, mmap_mode='r'):
+        """Open an artifact; with mmap_mode='r' the node arrays are mapped, not read."""
+        path = Path(path)
+        with open(path / META_FILE) as f:
+            meta = json.load(f)
+        if meta.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported flat forest format: {meta.get('format_version')}")
+        arrays = {}
+        for name in ARRAYS:
+            file_path = path / f'{name}.npy'
+            arrays[name] = np.load(file_path, mmap_mode=mmap_mode) if file_path.exists() else None
+        return cls(arrays['feature'], arrays['threshold'], arrays['children'], arrays['value'], meta['roots'],
+                   meta['max_depth'], meta['classes'], meta['n_features'], meta['feature_names'],
+                   arrays['importances'])
+
+    # --- Inference ---
+
+    def _as_array(self, X):
+        if isinstance(X, pd.DataFrame):
+            if hasattr(self, 'feature_names_in_'):
+                X = X[self.feature_names_in_]
+            X = X.to_numpy()
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected {self.n_features_in_} features, got {X.shape[1]}")
+        return X
+
+    def leaves(self, X):
+        """Leaf node index reached in every tree, shape (rows, trees)."""
+        X = self._as_array(X)
+        n_rows, n_trees = len(X), len(self.roots)
+        flat_x = X.ravel()
+        feature, threshold = self.feature, self.threshold
+        children = self.children.reshape(-1)
+        # Pairs are tree-major so neighbouring pairs walk the same tree's nodes;
+        # x_offsets locate each pair's row in the flattened input
+        nodes = np.repeat(self.roots, n_rows)
+        x_offsets = np.tile(np.arange(n_rows, dtype=np.int32) * np.int32(X.shape[1]), n_trees)
+        pending = np.arange(len(nodes), dtype=np.int32)
+        result = np.empty(len(nodes), dtype=np.int32)
+        for depth in range(self.max_depth):
+            go_right = flat_x.take(x_offsets + feature.take(nodes)) > threshold.take(nodes)
+            nodes = children.take(nodes * 2 + go_right)
+            if depth % COMPACT_EVERY == COMPACT_EVERY - 1:
+                done = children.take(nodes * 2) == nodes
+                if done.any():
+                    result[pending[done]] = nodes[done]
+                    keep = ~done
+                    nodes, x_offsets, pending = nodes[keep], x_offsets[keep], pending[keep]
+                    if not len(nodes):
+                        break
+        result[pending] = nodes
+        return result.reshape(n_trees, n_rows).T
+
+    def predict_proba(self, X):
+        X = self._as_array(X)
+        if len(X) <= CHUNK_ROWS:
+            return self.value[self.leaves(X)].mean(axis=1)
+        return np.concatenate([self.value[self.leaves(X[i:i + CHUNK_ROWS])].mean(axis=1)
+                               for i in range(0, len(X), CHUNK_ROWS)])
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def _rss_kb():
+    """(total RSS, private anonymous RSS) of this process in kB (Linux)."""
+    fields = {}
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                key, _, rest = line.partition(':')
+                if key in ('VmRSS', 'RssAnon'):
+                    fields[key] = int(rest.split()[0])
+    except OSError:
+        return None, None
+    return fields.get('VmRSS'), fields.get('RssAnon')
+
+def _load_worker(kind, path, sample, queue):
+    import joblib
+    before_total, before_anon = _rss_kb()
+    start = time.perf_counter()
+    model = joblib.load(path) if kind == 'joblib' else FlatForest.load(path)
+    loaded = time.perf_counter()
+    model.predict_proba(sample)
+    first_prediction = time.perf_counter()
+    total, anon = _rss_kb()
+    queue.put((kind, (loaded - start) * 1000, (first_prediction - loaded) * 1000,
+               (total - before_total) / 1024 if total else None, (anon - before_anon) / 1024 if anon else None))
+
+def benchmark(n_estimators=100, n_samples=50000, n_features=78, workers=4):
+    """Load time and per-worker memory: joblib heap copies vs memory-mapped flat arrays."""
+    import joblib
+    import multiprocessing
+    from sklearn.ensemble import RandomForestClassifier
+
+    rng = np.random.default_rng(0)
+    X = rng.random((n_samples, n_features))
+    y = (X[:, 0] + rng.normal(0, 0.3, n_samples) > 0.5).astype(int) + (X[:, 1] > 0.8)
+    forest = RandomForestClassifier(n_estimators=n_estimators, random_state=42, n_jobs=-1).fit(X, y)
+    flat = FlatForest.from_sklearn(forest)
+    flat.verify(forest, X[:1000])
+
+    directory = Path(tempfile.mkdtemp())
+    try:
+        joblib.dump(forest, directory / 'forest.joblib')
+        flat.save(directory / 'forest')
+        size_mb = sum(f.stat().st_size for f in (directory / 'forest').iterdir()) / 2**20
+        print(f"Forest: {n_estimators} trees, {flat.n_nodes} nodes, {size_mb:.1f} MB of arrays, "
+              f"joblib file {(directory / 'forest.joblib').stat().st_size / 2**20:.1f} MB")
+
+        context = multiprocessing.get_context('spawn')
+        for kind, path in [('joblib', directory / 'forest.joblib'), ('mmap', directory / 'forest')]:
+            queue = context.Queue()
+            processes = [context.Process(target=_load_worker, args=(kind, path, X[:1], queue))
+                         for _ in range(workers)]
+            for p in processes:
+                p.start()
+            results = [queue.get() for _ in processes]
+            for p in processes:
+                p.join()
+            load_ms = np.mean([r[1] for r in results])
+            first_ms = np.mean([r[2] for r in results])
+            rss = [r[3] for r in results if r[3] is not None]
+            anon = [r[4] for r in results if r[4] is not None]
+            print(f"  {kind:<6} x{workers}: load {load_ms:8.1f} ms, first prediction {first_ms:7.1f} ms, "
+                  f"RSS +{np.mean(rss) if rss else float('nan'):6.1f} MB/worker, "
+                  f"private +{np.mean(anon) if anon else float('nan'):6.1f} MB/worker")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+if __name__ == "__main__":
+    benchmark()
@@ -4,9 +4,11 @@ Graph Neural Network (GNN) Model for Hybrid AI-IDS
 Models relationships between network and system entities.
 """
 
+import numpy as np
 import torch
 import torch.nn.functional as F
 from torch_geometric.nn import GCNConv
+from torch_geometric.data import Data
 from .base_model import BaseModel
 
 class GNNModel(BaseModel, torch.nn.Module):
@@ -14,6 +16,10 @@ class GNNModel(BaseModel, torch.nn.Module):
 
     def __init__(self, num_node_features, num_classes):
         super().__init__()
+        self.num_classes = num_classes
+        self.classes_ = np.arange(num_classes)
+        # Input rows are node feature vectors
+        self.input_shape = (num_node_features,)
         # Define GNN layers
         self.conv1 = GCNConv(num_node_features, 16)
         self.conv2 = GCNConv(16, num_classes)
@@ -34,11 +40,17 @@ class GNNModel(BaseModel, torch.nn.Module):
         # This method is a placeholder for the training logic.
         pass
 
-    def predict(self, data):
-        """Makes predictions using the trained GNN model."""
-        print("Making predictions with GNN model...")
-        # Placeholder for prediction logic.
-        pass
+    def predict_proba(self, batch: np.ndarray, edge_index=None) -> np.ndarray:
+        """Node class probabilities for a float32 [nodes, features] batch.
+
+        edge_index ([2, edges]) connects the nodes; without it every node
+        is scored on its own features.
+        """
+        if edge_index is None:
+            edge_index = torch.empty((2, 0), dtype=torch.long)
+        data = Data(x=torch.from_numpy(np.ascontiguousarray(batch, dtype=np.float32)), edge_index=edge_index)
+        with torch.no_grad():
+            return self.forward(data).exp().numpy()
 
     def save(self, file_path: str):
         """Saves the trained PyTorch model."""
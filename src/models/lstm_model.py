@@ -9,14 +9,19 @@ import numpy as np
 from tensorflow.keras.models import Sequential, load_model
 from tensorflow.keras.layers import LSTM, Dense, Dropout
 from .base_model import BaseModel
+from .lstm_stream import LSTMCellStack
 
 class LSTMModel(BaseModel):
     """LSTM-based model for intrusion detection."""
 
-    def __init__(self, input_shape, num_classes):
+    def __init__(self, input_shape, num_classes, feature_names=None):
         super().__init__()
-        self.input_shape = input_shape
+        # [timesteps, features]; flat rows of timesteps * features values are reshaped
+        self.input_shape = tuple(input_shape)
         self.num_classes = num_classes
+        self.classes_ = np.arange(num_classes)
+        # Per-timestep feature names (the last input axis)
+        self.feature_names = feature_names
         self.model = self._build_model()
 
     def _build_model(self):
@@ -40,10 +45,15 @@ class LSTMModel(BaseModel):
         self.model.fit(X_train, y_train, epochs=epochs, batch_size=batch_size, **kwargs)
         print("Training complete.")
 
-    def predict(self, X_test: np.ndarray) -> np.ndarray:
-        """Makes predictions using the trained LSTM model."""
-        print("Making predictions with LSTM model...")
-        return np.argmax(self.model.predict(X_test), axis=1)
+    def predict_proba(self, batch: np.ndarray) -> np.ndarray:
+        """Softmax output for a float32 [samples, timesteps, features] batch."""
+        return self.model.predict(batch, verbose=0)
+
+    def export_stream(self, file_path: str):
+        """Saves the weights as an LSTMCellStack .npz for per-flow streaming inference."""
+        print(f"Exporting streaming weights to {file_path}...")
+        LSTMCellStack.from_keras(self.model, self.feature_names, timesteps=self.input_shape[0]).save(file_path)
+        print("Streaming weights exported.")
 
     def save(self, file_path: str):
         """Saves the trained Keras model."""
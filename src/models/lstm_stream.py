@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Streaming LSTM Inference for Hybrid AI-IDS
+Scores live flows one packet at a time: each flow's LSTM hidden and cell
+state is kept in a bounded cache, and one tick steps the recurrent cell
+for every flow that received a packet, as a single batched NumPy update.
+Rescoring the whole window for each new packet costs timesteps cell
+steps; a streaming step costs one.
+
+The model is trained on windows of timesteps packets from a zero state,
+so a flow's state restarts every timesteps packets: each score covers
+the packets since the last restart, and every timesteps-th packet gets
+exactly the full-window score of the last timesteps packets. Scores in
+between are those of the window so far, not of a sliding window.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+import numpy as np
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+def _softmax(x):
+    e = np.exp(x - x.max(axis=1, keepdims=True))
+    return e / e.sum(axis=1, keepdims=True)
+
+ACTIVATIONS = {
+    'linear': lambda x: x,
+    'relu': lambda x: np.maximum(x, 0.0),
+    'sigmoid': _sigmoid,
+    'tanh': np.tanh,
+    'softmax': _softmax,
+}
+
+
+class LSTMCellStack:
+    """NumPy inference copy of a stacked LSTM classifier (see LSTMModel).
+
+    lstm_layers holds (kernel [inputs, 4 * units], recurrent_kernel
+    [units, 4 * units], bias [4 * units]) per LSTM layer with Keras gate
+    order (input, forget, cell, output), tanh activation and sigmoid
+    recurrent activation; dense_layers holds (kernel, bias, activation)
+    applied to the last layer's hidden state. Dropout is inactive at
+    inference and has no weights. timesteps is the training window length
+    (None if unknown). Saved as a plain .npz file, so serving needs neither
+    TensorFlow nor the Keras model file.
+    """
+
+    def __init__(self, lstm_layers, dense_layers, feature_names=None, timesteps=None):
+        self.lstm_layers = [tuple(np.asarray(w, dtype=np.float32) for w in layer) for layer in lstm_layers]
+        self.dense_layers = [(np.asarray(k, dtype=np.float32), np.asarray(b, dtype=np.float32), activation)
+                             for k, b, activation in dense_layers]
+        self.feature_names = list(feature_names) if feature_names is not None else None
+        self.timesteps = int(timesteps) if timesteps is not None else None
+        self.units = [recurrent.shape[0] for _, recurrent, _ in self.lstm_layers]
+        self.n_features = self.lstm_layers[0][0].shape[0]
+        self.classes_ = np.arange(self.dense_layers[-1][0].shape[1])
+
+    @classmethod
+    def from_keras(cls, model, feature_names=None, timesteps=None):
+        lstm_layers, dense_layers = [], []
+        for layer in model.layers:
+            kind = type(layer).__name__
+            if kind == 'LSTM':
+                lstm_layers.append(layer.get_weights())
+            elif kind == 'Dense':
+                kernel, bias = layer.get_weights()
+                dense_layers.append((kernel, bias, layer.activation.__name__))
+        return cls(lstm_layers, dense_layers, feature_names, timesteps)
+
+    def save(self, path):
+        arrays = {}
+        for i, (kernel, recurrent, bias) in enumerate(self.lstm_layers):
+            arrays.update({f'lstm{i}_kernel': kernel, f'lstm{i}_recurrent': recurrent, f'lstm{i}_bias': bias})
+        for i, (kernel, bias, activation) in enumerate(self.dense_layers):
+            arrays.update({f'dense{i}_kernel': kernel, f'dense{i}_bias': bias,
+                           f'dense{i}_activation': np.array(activation)})
+        if self.feature_names is not None:
+            arrays['feature_names'] = np.array(self.feature_names)
+        if self.timesteps is not None:
+            arrays['timesteps'] = np.array(self.timesteps)
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            lstm_layers, dense_layers, i = [], [], 0
+            while f'lstm{i}_kernel' in arrays:
+                lstm_layers.append((arrays[f'lstm{i}_kernel'], arrays[f'lstm{i}_recurrent'], arrays[f'lstm{i}_bias']))
+                i += 1
+            i = 0
+            while f'dense{i}_kernel' in arrays:
+                dense_layers.append((arrays[f'dense{i}_kernel'], arrays[f'dense{i}_bias'],
+                                     str(arrays[f'dense{i}_activation'])))
+                i += 1
+            feature_names = [str(f) for f in arrays['feature_names']] if 'feature_names' in arrays else None
+            timesteps = int(arrays['timesteps']) if 'timesteps' in arrays else None
+        return cls(lstm_layers, dense_layers, feature_names, timesteps)
+
+    def zero_state(self, rows):
+        """(h, c): one [rows, units] array per LSTM layer."""
+        return ([np.zeros((rows, u), dtype=np.float32) for u in self.units],
+                [np.zeros((rows, u), dtype=np.float32) for u in self.units])
+
+    def step(self, x, h, c):
+        """Advance every row by one timestep; returns the new (h, c) lists."""
+        new_h, new_c = [], []
+        for (kernel, recurrent, bias), h_prev, c_prev in zip(self.lstm_layers, h, c):
+            z = x @ kernel + h_prev @ recurrent + bias
+            i, f, g, o = np.split(z, 4, axis=1)
+            c_next = _sigmoid(f) * c_prev + _sigmoid(i) * np.tanh(g)
+            x = _sigmoid(o) * np.tanh(c_next)
+            new_h.append(x)
+            new_c.append(c_next)
+        return new_h, new_c
+
+    def head(self, h_last):
+        """Class probabilities from the last LSTM layer's hidden state."""
+        x = h_last
+        for kernel, bias, activation in self.dense_layers:
+            x = ACTIVATIONS[activation](x @ kernel + bias)
+        return x
+
+    def predict_proba(self, windows):
+        """Full-window scoring of [rows, timesteps, features], as the Keras model does."""
+        windows = np.asarray(windows, dtype=np.float32)
+        h, c = self.zero_state(len(windows))
+        for t in range(windows.shape[1]):
+            h, c = self.step(windows[:, t], h, c)
+        return self.head(h[-1])
+
+
+class StreamingLSTM:
+    """Per-flow streaming inference over an LSTMCellStack.
+
+    States live in preallocated [max_flows, units] arrays; a flow gets a
+    slot (zero state) on its first packet and keeps it until evict() -
+    called when the flow expires - or until it is the least recently used
+    flow and a new one needs the slot. submit() queues a packet's feature
+    vector; tick() steps all queued flows at once and returns their class
+    probabilities. A flow with several queued packets is stepped once per
+    packet, in order.
+
+    A flow's state restarts from zero every timesteps packets (default
+    cell.timesteps; see the module docstring). With timesteps=None the
+    state runs over the whole flow, and scores after the first window no
+    longer match anything the model was trained on.
+    """
+
+    def __init__(self, cell, max_flows=65536, timesteps=None):
+        self.cell = cell
+        self.max_flows = max_flows
+        self.timesteps = timesteps if timesteps is not None else cell.timesteps
+        self.h, self.c = cell.zero_state(max_flows)
+        self._age = np.zeros(max_flows, dtype=np.intp)  # packets since the slot's last restart
+        self._slots = OrderedDict()  # flow_id -> slot, least recently used first
+        self._free = list(range(max_flows - 1, -1, -1))
+        self._queue = []
+        self._lock = threading.Lock()
+        self.steps = 0
+        self.ticks = 0
+        self.evicted_expired = 0
+        self.evicted_lru = 0
+        self.window_restarts = 0
+        self.step_seconds = 0.0
+
+    def __len__(self):
+        return len(self._slots)
+
+    def _slot(self, flow_id):
+        slot = self._slots.get(flow_id)
+        if slot is not None:
+            self._slots.move_to_end(flow_id)
+            return slot
+        if self._free:
+            slot = self._free.pop()
+        else:
+            _, slot = self._slots.popitem(last=False)
+            self.evicted_lru += 1
+        for h, c in zip(self.h, self.c):
+            h[slot] = 0.0
+            c[slot] = 0.0
+        self._age[slot] = 0
+        self._slots[flow_id] = slot
+        return slot
+
+    def evict(self, flow_id):
+        """Drop a flow's state (call on flow expiry)."""
+        with self._lock:
+            slot = self._slots.pop(flow_id, None)
+            if slot is not None:
+                self._free.append(slot)
+                self.evicted_expired += 1
+
+    def submit(self, flow_id, vector):
+        """Queue one packet's feature vector for the next tick."""
+        with self._lock:
+            self._queue.append((flow_id, vector))
+
+    def tick(self):
+        """Step every queued packet; returns {flow_id: probabilities after its last packet}."""
+        with self._lock:
+            queue, self._queue = self._queue, []
+        results = {}
+        # One batched step per round; round k holds each flow's k-th queued packet
+        while queue:
+            seen, batch, rest = set(), [], []
+            for item in queue:
+                (rest if item[0] in seen else batch).append(item)
+                seen.add(item[0])
+            results.update(self.step([flow_id for flow_id, _ in batch], [vector for _, vector in batch]))
+            queue = rest
+        return results
+
+    def step(self, flow_ids, vectors):
+        """One timestep for distinct flows; returns {flow_id: probabilities}."""
+        if len(flow_ids) > self.max_flows:
+            raise ValueError(f"{len(flow_ids)} flows in one step, cache holds {self.max_flows}")
+        started = time.perf_counter()
+        x = np.asarray(vectors, dtype=np.float32).reshape(len(flow_ids), self.cell.n_features)
+        with self._lock:
+            slots = np.fromiter((self._slot(flow_id) for flow_id in flow_ids), dtype=np.intp, count=len(flow_ids))
+            h, c = [h[slots] for h in self.h], [c[slots] for c in self.c]
+            age = self._age[slots]
+            if self.timesteps:
+                # Flows that completed a window start the next one from zero state
+                restart = age >= self.timesteps
+                if restart.any():
+                    for state in h + c:
+                        state[restart] = 0.0
+                    age[restart] = 0
+                    self.window_restarts += int(restart.sum())
+            self._age[slots] = age + 1
+            h, c = self.cell.step(x, h, c)
+            for layer, (h_new, c_new) in enumerate(zip(h, c)):
+                self.h[layer][slots] = h_new
+                self.c[layer][slots] = c_new
+        proba = self.cell.head(h[-1])
+        with self._lock:
+            self.steps += len(flow_ids)
+            self.ticks += 1
+            self.step_seconds += time.perf_counter() - started
+        return dict(zip(flow_ids, proba))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'flows': len(self._slots),
+                'max_flows': self.max_flows,
+                'timesteps': self.timesteps,
+                'steps': self.steps,
+                'batched_steps': self.ticks,
+                'mean_flows_per_step': self.steps / self.ticks if self.ticks else 0.0,
+                'mean_step_us_per_flow': self.step_seconds / self.steps * 1e6 if self.steps else 0.0,
+                'evicted_expired': self.evicted_expired,
+                'evicted_lru': self.evicted_lru,
+                'window_restarts': self.window_restarts,
+            }
+
+
+def _random_cell(n_features, n_classes, rng):
+    """Untrained stack with LSTMModel's architecture (LSTM 64, LSTM 32, Dense 16, softmax)."""
+    def weights(*shape):
+        return rng.normal(0, 1 / np.sqrt(shape[0]), shape)
+    lstm_layers = [(weights(n_features, 256), weights(64, 256), np.zeros(256)),
+                   (weights(64, 128), weights(32, 128), np.zeros(128))]
+    dense_layers = [(weights(32, 16), np.zeros(16), 'relu'), (weights(16, n_classes), np.zeros(n_classes), 'softmax')]
+    return LSTMCellStack(lstm_layers, dense_layers)
+
+def benchmark(n_features=78, n_classes=8, timesteps=10, flows_per_tick=(1, 64, 1024), ticks=50):
+    """Window-bounded streaming scores, and per-packet latency vs rescoring each flow's last timesteps packets."""
+    rng = np.random.default_rng(0)
+    cell = _random_cell(n_features, n_classes, rng)
+
+    # Three windows per flow: every timesteps-th packet scores exactly its
+    # full window, packets in between score the window so far
+    packets = rng.normal(size=(32, 3 * timesteps, n_features)).astype(np.float32)
+    stream = StreamingLSTM(cell, max_flows=64, timesteps=timesteps)
+    unbounded = StreamingLSTM(cell, max_flows=64)
+    window_error = prefix_error = 0.0
+    for t in range(3 * timesteps):
+        streamed = stream.step(list(range(32)), packets[:, t])
+        streamed = np.array([streamed[i] for i in range(32)])
+        carried = unbounded.step(list(range(32)), packets[:, t])
+        start = t - t % timesteps
+        error = np.abs(streamed - cell.predict_proba(packets[:, start:t + 1])).max()
+        if (t + 1) % timesteps == 0:
+            window_error = max(window_error, error)
+        else:
+            prefix_error = max(prefix_error, error)
+    carried = np.array([carried[i] for i in range(32)])
+    print(f"Streaming vs full-window probabilities over {3 * timesteps} packets: "
+          f"max difference {window_error:.2e} at window ends, {prefix_error:.2e} within windows")
+    print(f"State carried over the whole flow (no restarts) vs the last window after {3 * timesteps} packets: "
+          f"max difference {np.abs(carried - cell.predict_proba(packets[:, -timesteps:])).max():.2e}")
+
+    for n_flows in flows_per_tick:
+        stream = StreamingLSTM(cell, max_flows=n_flows, timesteps=timesteps)
+        windows = rng.normal(size=(n_flows, timesteps, n_features)).astype(np.float32)
+        flow_ids = list(range(n_flows))
+        stream_timings, window_timings = [], []
+        for _ in range(ticks):
+            vectors = rng.normal(size=(n_flows, n_features)).astype(np.float32)
+            start_time = time.perf_counter()
+            stream.step(flow_ids, vectors)
+            stream_timings.append(time.perf_counter() - start_time)
+            windows = np.concatenate([windows[:, 1:], vectors[:, None]], axis=1)
+            start_time = time.perf_counter()
+            cell.predict_proba(windows)
+            window_timings.append(time.perf_counter() - start_time)
+        stream_us = np.median(stream_timings) / n_flows * 1e6
+        window_us = np.median(window_timings) / n_flows * 1e6
+        print(f"  {n_flows:>5} flows/tick: streaming {stream_us:8.1f} us/packet, "
+              f"window rescoring {window_us:8.1f} us/packet ({window_us / stream_us:.1f}x)")
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Model Registry for Hybrid AI-IDS
+Versioned model artifacts with metadata (feature names, class map,
+training data hash) in a plain directory tree:
+
+    models/registry/<version>/model.joblib
+    models/registry/<version>/metadata.json
+    models/registry/<version>/forest/       (forests: flat arrays, see FlatForest)
+    models/registry/<version>/cascade.joblib (optional screening stage, see CascadeModel)
+    models/registry/ACTIVE              (optional: pins a version)
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import joblib
+import pandas as pd
+from pathlib import Path
+from .flat_forest import FlatForest
+from .cascade_model import CascadeModel
+
+REGISTRY_PATH = Path('models/registry')
+MODEL_FILE = 'model.joblib'
+METADATA_FILE = 'metadata.json'
+FOREST_DIR = 'forest'
+CASCADE_FILE = 'cascade.joblib'
+ACTIVE_FILE = 'ACTIVE'
+
+def dataset_hash(df: pd.DataFrame) -> str:
+    """Content hash of a training DataFrame (values, index and column names)."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([str(c) for c in df.columns]).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    return digest.hexdigest()
+
+
+class ModelRegistry:
+    """Directory of versioned model artifacts.
+
+    A version is only visible once complete: publish() writes it into a
+    temporary directory next to the others and renames it into place.
+    Versions are named v0001, v0002, ... so they sort by age; the current
+    version is the one named in the ACTIVE file if present, else the newest.
+    """
+
+    def __init__(self, root=REGISTRY_PATH):
+        self.root = Path(root)
+
+    def versions(self):
+        """Complete versions, oldest first."""
+        if not self.root.is_dir():
+            return []
+        return sorted(
+            entry.name for entry in self.root.iterdir()
+            if entry.is_dir() and not entry.name.startswith('.') and (entry / METADATA_FILE).exists()
+        )
+
+    def current_version(self):
+        """The pinned version if ACTIVE names one, else the newest; None if empty."""
+        versions = self.versions()
+        pin = self.root / ACTIVE_FILE
+        if pin.exists():
+            pinned = pin.read_text().strip()
+            if pinned in versions:
+                return pinned
+        return versions[-1] if versions else None
+
+    def _next_version(self):
+        numbers = [int(v[1:]) for v in self.versions() if v[:1] == 'v' and v[1:].isdigit()]
+        return f"v{max(numbers, default=0) + 1:04d}"
+
+    def publish(self, model, feature_names, class_map, training_data_hash, version=None, cascade=None, **extra):
+        """Store a fitted model (and optionally its CascadeModel screen) with metadata; returns the version name."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        version = version or self._next_version()
+        if (self.root / version).exists():
+            raise ValueError(f"Model version already exists: {version}")
+        metadata = {
+            'version': version,
+            'created_at': time.time(),
+            'model_type': type(model).__name__,
+            'feature_names': [str(f) for f in feature_names],
+            'class_map': {str(k): v for k, v in class_map.items()},
+            'training_data_hash': training_data_hash,
+            'cascade': {
+                'screen_features': cascade.screen_features,
+                'exit_threshold': cascade.exit_threshold,
+            } if cascade is not None else None,
+            **extra,
+        }
+        staging = Path(tempfile.mkdtemp(prefix=f'.{version}-', dir=self.root))
+        try:
+            joblib.dump(model, staging / MODEL_FILE)
+            if hasattr(model, 'estimators_') and hasattr(model, 'classes_'):
+                FlatForest.from_sklearn(model).save(staging / FOREST_DIR)
+            if cascade is not None:
+                cascade.save(staging / CASCADE_FILE)
+            with open(staging / METADATA_FILE, 'w') as f:
+                json.dump(metadata, f, indent=2, default=str)
+            os.rename(staging, self.root / version)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return version
+
+    def activate(self, version):
+        """Pin the current version (None removes the pin)."""
+        pin = self.root / ACTIVE_FILE
+        if version is None:
+            pin.unlink(missing_ok=True)
+            return
+        if version not in self.versions():
+            raise ValueError(f"Unknown model version: {version}")
+        staging = pin.with_name(ACTIVE_FILE + '.tmp')
+        staging.write_text(version + '\n')
+        os.replace(staging, pin)
+
+    def metadata(self, version):
+        with open(self.root / version / METADATA_FILE) as f:
+            return json.load(f)
+
+    def load(self, version, mmap_mode=None):
+        """(model, metadata) for a version.
+
+        With mmap_mode (e.g. 'r') a forest is opened from its flat arrays,
+        shared through the page cache, instead of unpickled.
+        """
+        forest = self.root / version / FOREST_DIR
+        if mmap_mode and forest.exists():
+            return FlatForest.load(forest, mmap_mode=mmap_mode), self.metadata(version)
+        return joblib.load(self.root / version / MODEL_FILE), self.metadata(version)
+
+    def load_cascade(self, version, full_model, **kwargs):
+        """The version's CascadeModel around full_model, or None if it has no screen.
+
+        full_model is a BaseModel (e.g. RandomForestModel). The screen is
+        compiled to a FlatForest when the full model's estimator is one, so
+        both stages run on the same engine.
+        """
+        path = self.root / version / CASCADE_FILE
+        if not path.exists():
+            return None
+        cascade = CascadeModel(full_model, **kwargs)
+        cascade.load(path)
+        if isinstance(full_model.model, FlatForest):
+            cascade.compile()
+        return cascade
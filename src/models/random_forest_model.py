@@ -3,10 +3,12 @@
 Random Forest Model for Hybrid AI-IDS
 """
 
+import numpy as np
 import pandas as pd
 import joblib
 from sklearn.ensemble import RandomForestClassifier
 from .base_model import BaseModel
+from .flat_forest import FlatForest, is_flat_forest, estimator_input
 
 class RandomForestModel(BaseModel):
     """Random Forest classifier for intrusion detection."""
@@ -26,19 +28,47 @@ class RandomForestModel(BaseModel):
         self.model.fit(X_train, y_train)
         print("Training complete.")
 
-    def predict(self, X_test: pd.DataFrame) -> pd.Series:
-        """Makes predictions using the trained model."""
-        print("Making predictions with Random Forest model...")
-        return self.model.predict(X_test)
+    @property
+    def feature_names(self):
+        names = getattr(self.model, 'feature_names_in_', None)
+        return list(names) if names is not None else None
 
-    def save(self, file_path: str):
-        """Saves the trained model to a file."""
+    @property
+    def classes_(self):
+        return self.model.classes_
+
+    def predict_proba(self, batch: np.ndarray) -> np.ndarray:
+        """Class probabilities for a float32 batch (see BaseModel.as_batch)."""
+        return self.model.predict_proba(estimator_input(self.model, batch))
+
+    def compile(self) -> FlatForest:
+        """Flattens the trained forest for vectorized inference (same probabilities)."""
+        if isinstance(self.model, FlatForest):
+            return self.model
+        return FlatForest.from_sklearn(self.model)
+
+    def save(self, file_path: str, mmap: bool = False):
+        """Saves the trained model to a file.
+
+        With mmap=True file_path is a directory of flat .npy tree arrays
+        (see FlatForest) that load() can memory-map.
+        """
         print(f"Saving model to {file_path}...")
-        joblib.dump(self.model, file_path)
+        if mmap:
+            self.compile().save(file_path)
+        else:
+            joblib.dump(self.model, file_path)
         print("Model saved.")
 
-    def load(self, file_path: str):
-        """Loads a trained model from a file."""
+    def load(self, file_path: str, mmap_mode: str = 'r'):
+        """Loads a trained model from a file.
+
+        A flat forest directory is opened with mmap_mode ('r' shares the
+        page cache between processes; None reads it into memory).
+        """
         print(f"Loading model from {file_path}...")
-        self.model = joblib.load(file_path)
+        if is_flat_forest(file_path):
+            self.model = FlatForest.load(file_path, mmap_mode=mmap_mode)
+        else:
+            self.model = joblib.load(file_path)
         print("Model loaded.")
@@ -6,9 +6,12 @@ import numpy as np
 from scapy.all import DNS, DNSQR, UDP, Raw
 
 class DNSAnalyzer:
-    def __init__(self):
+    def __init__(self, allowlist=None):
         self.dns_stats = {}
         self.domain_patterns = {}
+        # Optional DomainAllowlist; matching queries skip the string analysis
+        self.allowlist = allowlist
+        self.allowlisted_queries = 0
         
     def extract_dns_features(self, packet):
         """Extract DNS-specific features for tunneling detection"""
@@ -44,8 +47,20 @@ class DNSAnalyzer:
         features['dns_query_type'] = query.qtype
         features['dns_response_code'] = int(getattr(dns_layer, 'rcode', 0) or 0)
         
-        # Domain analysis
         domain = query.qname.decode('utf-8', errors='ignore').rstrip('.')
+
+        # Fast path: known-benign domains only update the frequency counters
+        if self.allowlist is not None and self.allowlist.matches(domain):
+            self.allowlisted_queries += 1
+            features['domain_length'] = len(domain)
+            features['dns_allowlisted'] = True
+            features.update(self._analyze_query_frequency(domain))
+            return features
+
+        # Registered-domain part, used by the API to correlate alerts
+        features['dns_base_domain'] = '.'.join(domain.split('.')[-2:])
+
+        # Domain analysis
         features.update(self._analyze_domain_structure(domain))
         
         # Entropy analysis
@@ -225,6 +240,14 @@ class DNSAnalyzer:
         
         return features
     
+    def allowlist_stats(self):
+        """Report allowlist fast-path statistics (empty if no allowlist is configured)."""
+        if self.allowlist is None:
+            return {}
+        stats = self.allowlist.stats()
+        stats['skipped_queries'] = self.allowlisted_queries
+        return stats
+
     def is_dns_tunneling(self, features):
         """Determine if DNS query looks like tunneling"""
         score = 0
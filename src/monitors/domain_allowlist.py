@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Known-benign Domain Allowlist for Hybrid AI-IDS
+Compact Bloom filter used by the DNS analyzer to skip tunneling analysis
+for queries to well-known registrable domains.
+"""
+
+import math
+import hashlib
+from pathlib import Path
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings using double hashing."""
+
+    def __init__(self, capacity, error_rate=0.001):
+        capacity = max(int(capacity), 1)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        # Optimal bit count and hash count for the requested capacity / error rate
+        self.num_bits = max(int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))), 8)
+        self.num_hashes = max(int(round(self.num_bits / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode('utf-8', errors='ignore'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, item):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        bits = self.bits
+        for pos in self._positions(item):
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def memory_bytes(self):
+        return len(self.bits)
+
+    def false_positive_rate(self):
+        """Estimate the current false-positive rate from the fraction of bits set."""
+        bits_set = sum(bin(byte).count('1') for byte in self.bits)
+        return (bits_set / self.num_bits) ** self.num_hashes
+
+
+class DomainAllowlist:
+    """Allowlist of registrable domains (e.g. google.com) backed by a Bloom filter."""
+
+    def __init__(self, domains=(), error_rate=0.001):
+        domains = {self._normalize(d) for d in domains}
+        domains.discard('')
+        self.bloom = BloomFilter(len(domains), error_rate=error_rate)
+        for domain in domains:
+            self.bloom.add(domain)
+        self.lookups = 0
+        self.hits = 0
+
+    @classmethod
+    def from_file(cls, file_path, error_rate=0.001):
+        """Load an allowlist file with one domain per line; '#' starts a comment."""
+        domains = []
+        with open(Path(file_path), 'r', encoding='utf-8', errors='ignore') as f:
+            for line in f:
+                line = line.split('#', 1)[0].strip()
+                if line:
+                    domains.append(line)
+        return cls(domains, error_rate=error_rate)
+
+    @staticmethod
+    def _normalize(domain):
+        return domain.strip().rstrip('.').lower()
+
+    def matches(self, domain):
+        """Check whether the domain or any parent domain is allowlisted."""
+        self.lookups += 1
+        parts = self._normalize(domain).split('.')
+        # Check "example.com", then "sub.example.com", ... so multi-label suffixes
+        # like "bbc.co.uk" are matched as well.
+        for i in range(len(parts) - 2, -1, -1):
+            if '.'.join(parts[i:]) in self.bloom:
+                self.hits += 1
+                return True
+        return False
+
+    def stats(self):
+        """Return size, memory and hit statistics for reporting."""
+        return {
+            'domains': len(self.bloom),
+            'memory_bytes': self.bloom.memory_bytes,
+            'hash_functions': self.bloom.num_hashes,
+            'estimated_false_positive_rate': self.bloom.false_positive_rate(),
+            'lookups': self.lookups,
+            'hits': self.hits,
+        }
@@ -10,11 +10,132 @@ from collections import defaultdict
 from scapy.all import IP, TCP, UDP
 from dns_analyzer import DNSAnalyzer
 
+# CICIDS columns the sniffer cannot measure; always 0
+ZERO_FILLED_FEATURES = [
+    'fwd_header_length.1', 'fwd_avg_bytes/bulk', 'fwd_avg_packets/bulk', 'fwd_avg_bulk_rate',
+    'bwd_avg_bytes/bulk', 'bwd_avg_packets/bulk', 'bwd_avg_bulk_rate', 'subflow_fwd_packets',
+    'subflow_fwd_bytes', 'subflow_bwd_packets', 'subflow_bwd_bytes', 'init_win_bytes_forward',
+    'init_win_bytes_backward', 'act_data_pkt_fwd', 'min_seg_size_forward', 'active_mean',
+    'active_std', 'active_max', 'active_min', 'idle_mean', 'idle_std', 'idle_max', 'idle_min',
+]
+
+# Feature groups of _calculate_features (one _features_<group> method each): the
+# features a group produces (names, or prefixes ending in '_') and the groups it
+# depends on. Accumulators are per-packet flow state that only feeds other groups.
+# The basic flow counts (flow_duration, total_*) are always computed.
+FEATURE_GROUPS = {
+    'dns': {'features': ('dns_query_length', 'dns_query_type', 'dns_response_code', 'domain_length',
+                         'dns_allowlisted', 'dns_base_domain', 'subdomain_count', 'max_subdomain_length',
+                         'numeric_ratio', 'uppercase_ratio', 'special_char_ratio', 'domain_entropy',
+                         'avg_subdomain_entropy', 'max_subdomain_entropy', 'base64_subdomain_ratio',
+                         'hex_subdomain_ratio', 'sequential_subdomain_ratio', 'queries_per_minute',
+                         'total_query_count', 'avg_subdomain_length', 'min_subdomain_length',
+                         'subdomain_length_std', 'unique_subdomain_ratio'),
+            'requires': ()},
+    'dns_tunneling': {'features': ('dns_tunneling_score', 'dns_tunneling_confidence', 'is_dns_tunneling'),
+                      'requires': ('dns',)},
+    'threat_intel': {'features': ('threat_intel_match', 'threat_intel_indicator'), 'requires': ()},
+    'signatures': {'features': ('sig_', 'signature_match_count', 'payload_bytes_scanned', 'signature_matches'),
+                   'requires': ()},
+    'http': {'features': ('http_',), 'requires': ()},  # also gates HTTP payload parsing
+    'packet_lengths': {'features': (), 'requires': ()},
+    'iat_times': {'features': (), 'requires': ()},
+    'fwd_length_stats': {'features': ('fwd_packet_length_max', 'fwd_packet_length_min', 'fwd_packet_length_mean',
+                                      'fwd_packet_length_std'),
+                         'requires': ('packet_lengths',)},
+    'bwd_length_stats': {'features': ('bwd_packet_length_max', 'bwd_packet_length_min', 'bwd_packet_length_mean',
+                                      'bwd_packet_length_std'),
+                         'requires': ('packet_lengths',)},
+    'length_stats': {'features': ('min_packet_length', 'max_packet_length', 'packet_length_mean',
+                                  'packet_length_std', 'packet_length_variance'),
+                     'requires': ('packet_lengths',)},
+    'rates': {'features': ('flow_bytes/s', 'flow_packets/s', 'fwd_packets/s', 'bwd_packets/s'), 'requires': ()},
+    'flow_iat': {'features': ('flow_iat_mean', 'flow_iat_std', 'flow_iat_max', 'flow_iat_min'),
+                 'requires': ('iat_times',)},
+    'fwd_iat': {'features': ('fwd_iat_total', 'fwd_iat_mean', 'fwd_iat_std', 'fwd_iat_max', 'fwd_iat_min'),
+                'requires': ()},
+    'bwd_iat': {'features': ('bwd_iat_total', 'bwd_iat_mean', 'bwd_iat_std', 'bwd_iat_max', 'bwd_iat_min'),
+                'requires': ()},
+    'flags': {'features': ('fwd_psh_flags', 'bwd_psh_flags', 'fwd_urg_flags', 'bwd_urg_flags', 'fin_flag_count',
+                           'syn_flag_count', 'rst_flag_count', 'psh_flag_count', 'ack_flag_count',
+                           'urg_flag_count', 'cwe_flag_count', 'ece_flag_count'),
+              'requires': ()},
+    'header_lengths': {'features': ('fwd_header_length', 'bwd_header_length'), 'requires': ()},
+    'ratios': {'features': ('down/up_ratio', 'average_packet_size', 'avg_fwd_segment_size', 'avg_bwd_segment_size'),
+               'requires': ()},
+    'zero_filled': {'features': tuple(ZERO_FILLED_FEATURES), 'requires': ()},
+}
+GROUP_ORDER = list(FEATURE_GROUPS)
+ACCUMULATORS = ('packet_lengths', 'iat_times')
+
+def feature_group(feature):
+    """The group producing a feature, or None if no group does."""
+    for group, spec in FEATURE_GROUPS.items():
+        for name in spec['features']:
+            if feature == name or (name.endswith('_') and feature.startswith(name)):
+                return group
+    return None
+
+def plan_feature_groups(used_features, required_groups=()):
+    """Groups needed for the used features plus required_groups, with their dependencies."""
+    pending = [feature_group(feature) for feature in used_features] + list(required_groups)
+    groups = set()
+    while pending:
+        group = pending.pop()
+        if group is None or group in groups:
+            continue
+        groups.add(group)
+        pending.extend(FEATURE_GROUPS[group]['requires'])
+    return groups
+
+class FeaturePlan:
+    """The feature groups one packet computes; never changed after the swap.
+
+    The extractor reads its plan once per packet, so a plan replaced by
+    set_used_features (e.g. from a registry watcher thread) is either fully
+    in effect for a packet or not at all. pruned_packets counts packets that
+    skipped this plan's skipped groups; it is the only field that changes.
+    """
+
+    __slots__ = ('groups', 'skipped_groups', 'group_methods', 'track_lengths', 'track_iat', 'track_http',
+                 'pruned_packets')
+
+    def __init__(self, extractor, groups):
+        self.groups = tuple(group for group in GROUP_ORDER if group in groups)
+        self.skipped_groups = tuple(group for group in GROUP_ORDER if group not in groups)
+        self.group_methods = tuple(getattr(extractor, f'_features_{group}') for group in self.groups
+                                   if group not in ACCUMULATORS)
+        self.track_lengths = 'packet_lengths' in groups
+        self.track_iat = 'iat_times' in groups
+        self.track_http = 'http' in groups
+        self.pruned_packets = 0
+
 class FlowFeatureExtractor:
-    def __init__(self, flow_timeout=60):
+    def __init__(self, flow_timeout=60, dns_allowlist=None, threat_intel=None, signature_engine=None,
+                 reassembler=None, http_extractor=None, calibration_packets=200):
         self.flows = defaultdict(dict)
         self.flow_timeout = flow_timeout
-        self.dns_analyzer = DNSAnalyzer()
+        self.dns_analyzer = DNSAnalyzer(allowlist=dns_allowlist)
+        # Optional ThreatIntelIndex; endpoints are matched once per new flow
+        self.threat_intel = threat_intel
+        # Optional SignatureEngine; payloads are scanned up to its per-flow byte cap
+        self.signature_engine = signature_engine
+        # Optional TCPReassembler; payload analyzers then see in-order stream chunks
+        self.reassembler = reassembler
+        # Optional HTTPFeatureExtractor; parses the first bytes of each direction
+        self.http_extractor = http_extractor
+        self.stream_analyzers = []
+        self.expiry_listeners = []
+        # Feature groups to compute (see set_used_features); every group is timed
+        # for the first calibration_packets packets to estimate what skipping saves
+        self.calibration_packets = calibration_packets
+        self._calibration_left = calibration_packets
+        self._all_group_methods = [(group, getattr(self, f'_features_{group}')) for group in GROUP_ORDER
+                                   if group not in ACCUMULATORS]
+        self.group_seconds = dict.fromkeys(GROUP_ORDER, 0.0)
+        # One FeaturePlan per distinct group set, kept so their skip counts add up
+        self._plans = {}
+        self.set_used_features(None)
         
     def _get_flow_key(self, packet):
         """Generate bidirectional flow key"""
@@ -36,8 +157,18 @@ class FlowFeatureExtractor:
                 return (dst, src, dport, sport, proto)
         return None
 
+    def _match_threat_intel(self, flow_key):
+        """Return the indicator label matching either flow endpoint, or None."""
+        if self.threat_intel is None:
+            return None
+        return self.threat_intel.match(flow_key[0]) or self.threat_intel.match(flow_key[1])
+
     def extract_features(self, packet):
-        """Extract features from packet and return flow features"""
+        """Extract features from packet and return flow features
+
+        The flow's key is included as 'flow_key' (not a model feature), so
+        callers keeping per-flow state use the same key as the extractor.
+        """
         flow_key = self._get_flow_key(packet)
         if not flow_key:
             return None
@@ -51,7 +182,11 @@ class FlowFeatureExtractor:
                 'fwd_packets': [], 'bwd_packets': [],
                 'fwd_bytes': 0, 'bwd_bytes': 0,
                 'packet_lengths': [], 'iat_times': [],
-                'flags': {'fin':0, 'syn':0, 'rst':0, 'psh':0, 'ack':0, 'urg':0, 'cwe':0, 'ece':0}
+                'flags': {'fin':0, 'syn':0, 'rst':0, 'psh':0, 'ack':0, 'urg':0, 'cwe':0, 'ece':0},
+                'threat_intel': self._match_threat_intel(flow_key),
+                'payload_scanned': 0, 'sig_states': {True: 0, False: 0},
+                'sig_matches': defaultdict(int), 'sig_new': [],
+                'http': self.http_extractor.new_state() if self.http_extractor is not None else None,
             }
         
         flow = self.flows[flow_key]
@@ -66,10 +201,13 @@ class FlowFeatureExtractor:
             
         # Extract packet info
         packet_len = len(packet)
-        flow['packet_lengths'].append(packet_len)
+        calibrating = self._calibration_left > 0
+        plan = self._plan
+        if calibrating or plan.track_lengths:
+            flow['packet_lengths'].append(packet_len)
         
         # Update inter-arrival time
-        if 'last_time' in flow:
+        if 'last_time' in flow and (calibrating or plan.track_iat):
             iat = current_time - flow['last_time']
             flow['iat_times'].append(iat)
         flow['last_time'] = current_time
@@ -93,37 +231,120 @@ class FlowFeatureExtractor:
             if flags & 0x20: flow['flags']['urg'] += 1
             if flags & 0x40: flow['flags']['cwe'] += 1
             if flags & 0x80: flow['flags']['ece'] += 1
+
+        # Payload analysis
+        flow['sig_new'] = []
+        http_extractor = self.http_extractor if calibrating or plan.track_http else None
+        if (self.signature_engine is not None or self.reassembler is not None
+                or http_extractor is not None or self.stream_analyzers):
+            chunks = self._payload_chunks(flow_key, packet, is_forward)
+            for chunk in chunks:
+                if self.signature_engine is not None:
+                    self._inspect_payload(flow, chunk, is_forward)
+                if http_extractor is not None:
+                    http_extractor.feed(flow['http'], is_forward, chunk)
+                for analyzer in self.stream_analyzers:
+                    analyzer(flow_key, is_forward, chunk)
         
         # Calculate features
-        return self._calculate_features(flow_key, packet)
+        features = self._calculate_features(flow_key, packet)
+        features['flow_key'] = flow_key
+        return features
+
+    def add_stream_analyzer(self, analyzer):
+        """Register a callback(flow_key, is_forward, chunk) for payload data"""
+        self.stream_analyzers.append(analyzer)
+
+    def add_expiry_listener(self, listener):
+        """Register a callback(flow_key) for flows removed by cleanup_old_flows"""
+        self.expiry_listeners.append(listener)
+
+    def _payload_chunks(self, flow_key, packet, is_forward):
+        """Return the payload data made available by this packet, in stream order"""
+        if TCP in packet:
+            tcp = packet[TCP]
+            payload = bytes(tcp.payload)
+            if self.reassembler is not None:
+                flags = int(tcp.flags)
+                return self.reassembler.add_segment(
+                    flow_key, is_forward, int(tcp.seq), payload,
+                    syn=bool(flags & 0x02), fin=bool(flags & 0x01), rst=bool(flags & 0x04),
+                )
+        elif UDP in packet:
+            payload = bytes(packet[UDP].payload)
+        else:
+            return []
+        return [payload] if payload else []
+
+    def _inspect_payload(self, flow, payload, is_forward):
+        """Scan a payload chunk with the signature engine, within the flow's byte budget"""
+        budget = self.signature_engine.max_bytes_per_flow - flow['payload_scanned']
+        if budget <= 0:
+            return
+
+        payload = payload[:budget]
+        flow['payload_scanned'] += len(payload)
+        # Each direction keeps its own automaton state so patterns split across packets still match
+        matches, flow['sig_states'][is_forward] = self.signature_engine.scan(payload, flow['sig_states'][is_forward])
+        for signature in matches:
+            flow['sig_matches'][signature.category] += 1
+            flow['sig_new'].append(signature.name)
+
+    def set_used_features(self, used_features, required_groups=()):
+        """Compute only the feature groups needed for used_features (None computes everything).
+
+        required_groups are computed regardless, e.g. groups read by API rules
+        rather than by the model. Takes effect with the next packet; groups
+        enabled later start from the flow state seen from then on.
+        """
+        if used_features is None:
+            groups = frozenset(GROUP_ORDER)
+        else:
+            groups = frozenset(plan_feature_groups(used_features, required_groups))
+        plan = self._plans.get(groups)
+        if plan is None:
+            plan = self._plans[groups] = FeaturePlan(self, groups)
+        # Single assignment: a packet in flight keeps the plan it started with
+        self._plan = plan
 
     def _calculate_features(self, flow_key, packet):
-        """Calculate all 78 features for the flow"""
+        """Calculate the flow features of the planned feature groups"""
         flow = self.flows[flow_key]
-        current_time = time.time()
-        
-        # Basic features
-        features = {}
-        features['destination_port'] = flow_key[3] if flow_key[2] < flow_key[3] else flow_key[2]
-        
-        # Calculate all features
         features = {}
         
         # Basic flow features (existing)
-        flow_duration = current_time - flow['start_time']
+        flow_duration = time.time() - flow['start_time']
         features['flow_duration'] = flow_duration
         features['total_fwd_packets'] = len(flow['fwd_packets'])
         features['total_bwd_packets'] = len(flow['bwd_packets'])
         features['total_length_of_fwd_packets'] = flow['fwd_bytes']
         features['total_length_of_bwd_packets'] = flow['bwd_bytes']
-        
+
+        if self._calibration_left > 0:
+            # Time every group for the first packets so skipped groups have a known cost
+            self._calibration_left -= 1
+            clock = time.perf_counter
+            for group, method in self._all_group_methods:
+                started = clock()
+                method(flow, packet, features, flow_duration)
+                self.group_seconds[group] += clock() - started
+            return features
+
+        plan = self._plan
+        for method in plan.group_methods:
+            method(flow, packet, features, flow_duration)
+        if plan.skipped_groups:
+            plan.pruned_packets += 1
+        return features
+
+    def _features_dns(self, flow, packet, features, flow_duration):
         # DNS-specific features (NEW)
-        dns_features = self.dns_analyzer.extract_dns_features(packet)
-        features.update(dns_features)
-        
-        # DNS tunneling detection (NEW)
-        if dns_features:
-            tunneling_result = self.dns_analyzer.is_dns_tunneling(dns_features)
+        features.update(self.dns_analyzer.extract_dns_features(packet))
+
+    def _features_dns_tunneling(self, flow, packet, features, flow_duration):
+        # DNS tunneling detection (NEW) - allowlisted domains are not scored
+        if 'dns_query_length' in features and not features.get('dns_allowlisted'):
+            tunneling_result = self.dns_analyzer.is_dns_tunneling(features)
             features['dns_tunneling_score'] = tunneling_result['score']
             features['dns_tunneling_confidence'] = tunneling_result['confidence']
             features['is_dns_tunneling'] = tunneling_result['is_tunneling']
@@ -131,30 +352,55 @@ class FlowFeatureExtractor:
             features['dns_tunneling_score'] = 0
             features['dns_tunneling_confidence'] = 0
             features['is_dns_tunneling'] = False
-        
-        # Packet length statistics
+
+    def _features_threat_intel(self, flow, packet, features, flow_duration):
+        # Threat intel match (computed when the flow was created)
+        features['threat_intel_match'] = flow['threat_intel'] is not None
+        if flow['threat_intel'] is not None:
+            features['threat_intel_indicator'] = flow['threat_intel']
+
+    def _features_signatures(self, flow, packet, features, flow_duration):
+        # Payload signature features
+        if self.signature_engine is not None:
+            for category in self.signature_engine.categories:
+                features[f'sig_{category}_matches'] = flow['sig_matches'][category]
+            features['signature_match_count'] = sum(flow['sig_matches'].values())
+            features['payload_bytes_scanned'] = flow['payload_scanned']
+            if flow['sig_new']:
+                features['signature_matches'] = flow['sig_new']
+
+    def _features_http(self, flow, packet, features, flow_duration):
+        # HTTP request/response features
+        if self.http_extractor is not None:
+            features.update(self.http_extractor.features(flow['http']))
+
+    def _features_fwd_length_stats(self, flow, packet, features, flow_duration):
         fwd_lengths = [packet_len for packet_len in flow['packet_lengths'] if flow['fwd_packets']] if flow['fwd_packets'] else [0]
-        bwd_lengths = [packet_len for packet_len in flow['packet_lengths'] if flow['bwd_packets']] if flow['bwd_packets'] else [0]
-        all_lengths = flow['packet_lengths'] if flow['packet_lengths'] else [0]
-        
         features['fwd_packet_length_max'] = max(fwd_lengths) if fwd_lengths else 0
         features['fwd_packet_length_min'] = min(fwd_lengths) if fwd_lengths else 0
         features['fwd_packet_length_mean'] = np.mean(fwd_lengths) if fwd_lengths else 0
         features['fwd_packet_length_std'] = np.std(fwd_lengths) if len(fwd_lengths) > 1 else 0
-        
+
+    def _features_bwd_length_stats(self, flow, packet, features, flow_duration):
+        bwd_lengths = [packet_len for packet_len in flow['packet_lengths'] if flow['bwd_packets']] if flow['bwd_packets'] else [0]
         features['bwd_packet_length_max'] = max(bwd_lengths) if bwd_lengths else 0
         features['bwd_packet_length_min'] = min(bwd_lengths) if bwd_lengths else 0
         features['bwd_packet_length_mean'] = np.mean(bwd_lengths) if bwd_lengths else 0
         features['bwd_packet_length_std'] = np.std(bwd_lengths) if len(bwd_lengths) > 1 else 0
-        
-        # Flow rates
+
+    def _features_rates(self, flow, packet, features, flow_duration):
+        # Flow and packet rates
         if flow_duration > 0:
             features['flow_bytes/s'] = (flow['fwd_bytes'] + flow['bwd_bytes']) / flow_duration
             features['flow_packets/s'] = (features['total_fwd_packets'] + features['total_bwd_packets']) / flow_duration
+            features['fwd_packets/s'] = features['total_fwd_packets'] / flow_duration
+            features['bwd_packets/s'] = features['total_bwd_packets'] / flow_duration
         else:
             features['flow_bytes/s'] = 0
             features['flow_packets/s'] = 0
-        
+            features['fwd_packets/s'] = features['bwd_packets/s'] = 0
+
+    def _features_flow_iat(self, flow, packet, features, flow_duration):
         # Inter-arrival times
         if flow['iat_times']:
             features['flow_iat_mean'] = np.mean(flow['iat_times'])
@@ -163,7 +409,8 @@ class FlowFeatureExtractor:
             features['flow_iat_min'] = min(flow['iat_times'])
         else:
             features['flow_iat_mean'] = features['flow_iat_std'] = features['flow_iat_max'] = features['flow_iat_min'] = 0
-        
+
+    def _features_fwd_iat(self, flow, packet, features, flow_duration):
         # Forward IAT
         fwd_iat = []
         if len(flow['fwd_packets']) > 1:
@@ -174,7 +421,8 @@ class FlowFeatureExtractor:
         features['fwd_iat_std'] = np.std(fwd_iat) if len(fwd_iat) > 1 else 0
         features['fwd_iat_max'] = max(fwd_iat) if fwd_iat else 0
         features['fwd_iat_min'] = min(fwd_iat) if fwd_iat else 0
-        
+
+    def _features_bwd_iat(self, flow, packet, features, flow_duration):
         # Backward IAT
         bwd_iat = []
         if len(flow['bwd_packets']) > 1:
@@ -185,31 +433,14 @@ class FlowFeatureExtractor:
         features['bwd_iat_std'] = np.std(bwd_iat) if len(bwd_iat) > 1 else 0
         features['bwd_iat_max'] = max(bwd_iat) if bwd_iat else 0
         features['bwd_iat_min'] = min(bwd_iat) if bwd_iat else 0
-        
+
+    def _features_flags(self, flow, packet, features, flow_duration):
         # Flags
         features['fwd_psh_flags'] = flow['flags']['psh']
         features['bwd_psh_flags'] = flow['flags']['psh']
         features['fwd_urg_flags'] = flow['flags']['urg']
         features['bwd_urg_flags'] = flow['flags']['urg']
-        
-        # Header lengths (approximate)
-        features['fwd_header_length'] = features['total_fwd_packets'] * 40  # IP+TCP
-        features['bwd_header_length'] = features['total_bwd_packets'] * 40
-        
-        # Packet rates
-        if flow_duration > 0:
-            features['fwd_packets/s'] = features['total_fwd_packets'] / flow_duration
-            features['bwd_packets/s'] = features['total_bwd_packets'] / flow_duration
-        else:
-            features['fwd_packets/s'] = features['bwd_packets/s'] = 0
-        
-        # Packet length stats
-        features['min_packet_length'] = min(all_lengths) if all_lengths else 0
-        features['max_packet_length'] = max(all_lengths) if all_lengths else 0
-        features['packet_length_mean'] = np.mean(all_lengths) if all_lengths else 0
-        features['packet_length_std'] = np.std(all_lengths) if len(all_lengths) > 1 else 0
-        features['packet_length_variance'] = features['packet_length_std'] ** 2
-        
+
         # TCP flags
         features['fin_flag_count'] = flow['flags']['fin']
         features['syn_flag_count'] = flow['flags']['syn']
@@ -219,7 +450,22 @@ class FlowFeatureExtractor:
         features['urg_flag_count'] = flow['flags']['urg']
         features['cwe_flag_count'] = flow['flags']['cwe']
         features['ece_flag_count'] = flow['flags']['ece']
-        
+
+    def _features_header_lengths(self, flow, packet, features, flow_duration):
+        # Header lengths (approximate)
+        features['fwd_header_length'] = features['total_fwd_packets'] * 40  # IP+TCP
+        features['bwd_header_length'] = features['total_bwd_packets'] * 40
+
+    def _features_length_stats(self, flow, packet, features, flow_duration):
+        # Packet length stats
+        all_lengths = flow['packet_lengths'] if flow['packet_lengths'] else [0]
+        features['min_packet_length'] = min(all_lengths) if all_lengths else 0
+        features['max_packet_length'] = max(all_lengths) if all_lengths else 0
+        features['packet_length_mean'] = np.mean(all_lengths) if all_lengths else 0
+        features['packet_length_std'] = np.std(all_lengths) if len(all_lengths) > 1 else 0
+        features['packet_length_variance'] = features['packet_length_std'] ** 2
+
+    def _features_ratios(self, flow, packet, features, flow_duration):
         # Ratios
         if features['total_length_of_bwd_packets'] > 0 and features['total_length_of_fwd_packets'] > 0:
             features['down/up_ratio'] = features['total_length_of_bwd_packets'] / features['total_length_of_fwd_packets']
@@ -230,16 +476,28 @@ class FlowFeatureExtractor:
         features['average_packet_size'] = (flow['fwd_bytes'] + flow['bwd_bytes']) / total_packets if total_packets > 0 else 0
         features['avg_fwd_segment_size'] = features['total_length_of_fwd_packets'] / features['total_fwd_packets'] if features['total_fwd_packets'] > 0 else 0
         features['avg_bwd_segment_size'] = features['total_length_of_bwd_packets'] / features['total_bwd_packets'] if features['total_bwd_packets'] > 0 else 0
-        
+
+    def _features_zero_filled(self, flow, packet, features, flow_duration):
         # Additional features (set to 0 for simplicity)
-        for f in ['fwd_header_length.1', 'fwd_avg_bytes/bulk', 'fwd_avg_packets/bulk', 'fwd_avg_bulk_rate',
-                  'bwd_avg_bytes/bulk', 'bwd_avg_packets/bulk', 'bwd_avg_bulk_rate', 'subflow_fwd_packets',
-                  'subflow_fwd_bytes', 'subflow_bwd_packets', 'subflow_bwd_bytes', 'init_win_bytes_forward',
-                  'init_win_bytes_backward', 'act_data_pkt_fwd', 'min_seg_size_forward', 'active_mean',
-                  'active_std', 'active_max', 'active_min', 'idle_mean', 'idle_std', 'idle_max', 'idle_min']:
+        for f in ZERO_FILLED_FEATURES:
             features[f] = 0
-        
-        return features
+
+    def feature_plan_stats(self):
+        """Planned and skipped feature groups, with the estimated time saved by skipping."""
+        plan = self._plan
+        group_skips = dict.fromkeys(GROUP_ORDER, 0)
+        for other in list(self._plans.values()):
+            for group in other.skipped_groups:
+                group_skips[group] += other.pruned_packets
+        calibrated = self.calibration_packets - self._calibration_left
+        cost = {group: self.group_seconds[group] / calibrated if calibrated else 0.0 for group in GROUP_ORDER}
+        return {
+            'computed_groups': list(plan.groups),
+            'skipped_groups': list(plan.skipped_groups),
+            'group_skips': group_skips,
+            'group_cost_us': {group: seconds * 1e6 for group, seconds in cost.items()},
+            'estimated_seconds_saved': sum(cost[group] * skips for group, skips in group_skips.items()),
+        }
 
     def cleanup_old_flows(self):
         """Remove flows that have timed out"""
@@ -252,3 +510,7 @@ class FlowFeatureExtractor:
         
         for flow_key in expired_flows:
             del self.flows[flow_key]
+            if self.reassembler is not None:
+                self.reassembler.remove_flow(flow_key)
+            for listener in self.expiry_listeners:
+                listener(flow_key)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+HTTP Feature Extractor for Hybrid AI-IDS
+Incremental HTTP/1.x request-line, status-line and header parser that runs
+on the first bytes of each flow direction and stops after the headers.
+"""
+
+import math
+import zlib
+from collections import Counter
+
+HTTP_METHODS = {
+    b'GET': 1, b'POST': 2, b'PUT': 3, b'DELETE': 4, b'HEAD': 5,
+    b'OPTIONS': 6, b'PATCH': 7, b'CONNECT': 8, b'TRACE': 9,
+}
+
+def shannon_entropy(data):
+    """Shannon entropy (bits per symbol) of a bytes/str value"""
+    if not data:
+        return 0.0
+    length = len(data)
+    return -sum(count / length * math.log2(count / length) for count in Counter(data).values())
+
+
+class HTTPDirectionParser:
+    """Parse state for one direction of a flow.
+
+    Only the current, incomplete line is buffered; complete lines are
+    parsed and discarded.
+    """
+
+    __slots__ = ('partial', 'consumed', 'done', 'method', 'uri_length', 'uri_entropy',
+                 'header_count', 'user_agent_hash', 'status')
+
+    def __init__(self):
+        self.partial = b''
+        self.consumed = 0
+        self.done = False
+        self.method = 0
+        self.uri_length = 0
+        self.uri_entropy = 0.0
+        self.header_count = 0
+        self.user_agent_hash = 0
+        self.status = 0
+
+    def feed(self, chunk, byte_budget):
+        """Consume a chunk of stream data, never reading past byte_budget bytes"""
+        if self.done:
+            return
+        if self.consumed == 0 and not self._looks_like_http(chunk):
+            # Binary or TLS data: give up without buffering anything
+            self.done = True
+            return
+        chunk = chunk[:byte_budget - self.consumed]
+        self.consumed += len(chunk)
+
+        data = self.partial + chunk
+        lines = data.split(b'\n')
+        self.partial = lines.pop()
+        for line in lines:
+            self._parse_line(line.rstrip(b'\r'))
+            if self.done:
+                return
+
+        if self.consumed >= byte_budget:
+            self.done = True
+            self.partial = b''
+
+    @staticmethod
+    def _looks_like_http(chunk):
+        token = chunk[:8].split(b' ', 1)[0]
+        if token in HTTP_METHODS or token.startswith(b'HTTP/'):
+            return True
+        # Very short first chunk: accept any prefix of a method or "HTTP/"
+        return b' ' not in chunk[:8] and len(chunk) < 8 and any(
+            m.startswith(chunk) for m in list(HTTP_METHODS) + [b'HTTP/'])
+
+    def _parse_line(self, line):
+        if not self.method and not self.status:
+            # First line must be a request line or a status line, otherwise this is not HTTP
+            parts = line.split(b' ', 2)
+            if parts[0] in HTTP_METHODS and len(parts) == 3 and parts[2].startswith(b'HTTP/1.'):
+                self.method = HTTP_METHODS[parts[0]]
+                self.uri_length = len(parts[1])
+                self.uri_entropy = shannon_entropy(parts[1])
+            elif parts[0].startswith(b'HTTP/1.') and len(parts) >= 2 and parts[1].isdigit():
+                self.status = int(parts[1])
+            else:
+                self.done = True
+            return
+
+        if not line:
+            # Blank line ends the headers; the body is not inspected
+            self.done = True
+            return
+
+        self.header_count += 1
+        name, _, value = line.partition(b':')
+        if name.strip().lower() == b'user-agent':
+            self.user_agent_hash = zlib.crc32(value.strip())
+
+
+class HTTPFeatureExtractor:
+    """Adds HTTP request/response features to flows from their first payload bytes."""
+
+    def __init__(self, byte_budget=2048):
+        self.byte_budget = byte_budget
+        self.bytes_parsed = 0
+
+    def new_state(self):
+        """Per-flow parse state: one parser per direction"""
+        return {True: HTTPDirectionParser(), False: HTTPDirectionParser()}
+
+    def feed(self, state, is_forward, chunk):
+        parser = state[is_forward]
+        if parser.done:
+            return
+        before = parser.consumed
+        parser.feed(chunk, self.byte_budget)
+        self.bytes_parsed += parser.consumed - before
+
+    def features(self, state):
+        """Merge both directions into flow features (requests and responses may go either way)"""
+        features = {
+            'http_method': 0, 'http_uri_length': 0, 'http_uri_entropy': 0.0,
+            'http_header_count': 0, 'http_user_agent_hash': 0, 'http_response_status': 0,
+        }
+        for parser in state.values():
+            if parser.method:
+                features['http_method'] = parser.method
+                features['http_uri_length'] = parser.uri_length
+                features['http_uri_entropy'] = parser.uri_entropy
+                features['http_header_count'] = parser.header_count
+                features['http_user_agent_hash'] = parser.user_agent_hash
+            elif parser.status:
+                features['http_response_status'] = parser.status
+        return features
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Metrics for Hybrid AI-IDS
+Minimal Prometheus-compatible counters, gauges and histograms shared by
+the monitors and the API, with text exposition and a small HTTP server for
+processes that have no web framework.
+
+Counters and histograms keep one shard per thread: a thread only ever
+writes its own shard, so updates take no lock, and a scrape sums the
+shards. Bind labels once (e.g. PARSE = STAGE_SECONDS.labels('parse')) and
+call PARSE.observe(seconds) on the hot path.
+"""
+
+import math
+import time
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds, from 10 microseconds to 1 second
+LATENCY_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+                   0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+class _ShardedValues:
+    """Per-thread arrays of floats summed on read.
+
+    Shards of threads that have exited are folded into one retired array
+    when another thread creates its shard or the values are read, so
+    short-lived threads (e.g. one per request) do not pile up shards.
+    """
+
+    __slots__ = ('size', '_shards', '_threads', '_retired', '_lock')
+
+    def __init__(self, size):
+        self.size = size
+        self._shards = {}
+        self._threads = {}
+        self._retired = [0.0] * size
+        self._lock = threading.Lock()
+
+    def shard(self):
+        shard = self._shards.get(threading.get_ident())
+        if shard is None:
+            shard = self._new_shard()
+        return shard
+
+    def _new_shard(self):
+        thread = threading.current_thread()
+        with self._lock:
+            self._prune()
+            shard = self._shards[thread.ident] = [0.0] * self.size
+            self._threads[thread.ident] = thread
+        return shard
+
+    def _prune(self):
+        # Called with the lock held
+        for ident, thread in list(self._threads.items()):
+            if not thread.is_alive():
+                del self._threads[ident]
+                for i, value in enumerate(self._shards.pop(ident)):
+                    self._retired[i] += value
+
+    def totals(self):
+        with self._lock:
+            self._prune()
+            totals = list(self._retired)
+            for shard in self._shards.values():
+                for i, value in enumerate(shard):
+                    totals[i] += value
+        return totals
+
+
+class Registry:
+    """Collection of metric families rendered together."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Duplicate metric: {metric.name}")
+            self._metrics[metric.name] = metric
+
+    def generate(self):
+        """Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+REGISTRY = Registry()
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value))
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self._children[()] = self._new_child()
+        if registry is not None:
+            registry.register(self)
+
+    def labels(self, *values):
+        """Child metric for a set of label values (cache it for hot paths)."""
+        values = tuple(str(v) for v in values)
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def samples(self):
+        raise NotImplementedError
+
+
+class _CounterChild:
+    __slots__ = ('_values',)
+
+    def __init__(self):
+        self._values = _ShardedValues(1)
+
+    def inc(self, amount=1):
+        self._values.shard()[0] += amount
+
+    def value(self):
+        return self._values.totals()[0]
+
+
+class Counter(_Metric):
+    """Monotonic counter."""
+
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self._default.inc(amount)
+
+    def samples(self):
+        return [f'{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value())}'
+                for values, child in list(self._children.items())]
+
+
+class _GaugeChild:
+    __slots__ = ('_value', '_function')
+
+    def __init__(self):
+        self._value = 0.0
+        self._function = None
+
+    def set(self, value):
+        self._value = value
+
+    def set_function(self, function):
+        """Compute the value at scrape time instead."""
+        self._function = function
+
+    def value(self):
+        return float(self._function()) if self._function is not None else self._value
+
+
+class Gauge(_Metric):
+    """Value that can go up and down; set() is a single assignment."""
+
+    kind = 'gauge'
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value):
+        self._default.set(value)
+
+    def set_function(self, function):
+        self._default.set_function(function)
+
+    def samples(self):
+        lines = []
+        for values, child in list(self._children.items()):
+            try:
+                value = child.value()
+            except Exception:
+                continue
+            lines.append(f'{self.name}{_format_labels(self.labelnames, values)} {_format_value(value)}')
+        return lines
+
+
+class _HistogramChild:
+    __slots__ = ('_bounds', '_values')
+
+    def __init__(self, bounds):
+        self._bounds = bounds
+        # One slot per bucket, one for +Inf, one for the sum
+        self._values = _ShardedValues(len(bounds) + 2)
+
+    def observe(self, value):
+        shard = self._values.shard()
+        shard[bisect_left(self._bounds, value)] += 1
+        shard[-1] += value
+
+    def time(self):
+        """Context manager observing the elapsed time of its block."""
+        return _Timer(self)
+
+    def snapshot(self):
+        """(cumulative bucket counts incl. +Inf, sum, count)"""
+        totals = self._values.totals()
+        cumulative, running = [], 0.0
+        for count in totals[:-1]:
+            running += count
+            cumulative.append(running)
+        return cumulative, totals[-1], running
+
+
+class _Timer:
+    __slots__ = ('_child', '_start')
+
+    def __init__(self, child):
+        self._child = child
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._child.observe(time.perf_counter() - self._start)
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram (default buckets suit latencies in seconds)."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS, registry=REGISTRY):
+        self.bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.bounds)
+
+    def observe(self, value):
+        self._default.observe(value)
+
+    def time(self):
+        return self._default.time()
+
+    def samples(self):
+        lines = []
+        for values, child in list(self._children.items()):
+            cumulative, total, count = child.snapshot()
+            for bound, bucket_count in zip(self.bounds + (math.inf,), cumulative):
+                labels = _format_labels(self.labelnames, values, f'le="{_format_value(bound)}"')
+                lines.append(f'{self.name}_bucket{labels} {_format_value(bucket_count)}')
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {_format_value(count)}')
+        return lines
+
+
+def start_http_server(port, addr='0.0.0.0', registry=REGISTRY):
+    """Serve registry.generate() on http://addr:port/metrics from a daemon thread."""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?', 1)[0] not in ('/', '/metrics'):
+                self.send_error(404)
+                return
+            body = registry.generate().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((addr, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def benchmark(iterations=1000000):
+    """Per-call cost of the hot-path operations."""
+    registry = Registry()
+    counter = Counter('bench_total', 'Benchmark counter', registry=registry)
+    histogram = Histogram('bench_seconds', 'Benchmark histogram', ['stage'], registry=registry).labels('inference')
+
+    for name, operation in [('Counter.inc', counter.inc), ('Histogram.observe', lambda: histogram.observe(0.0003))]:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            operation()
+        elapsed = time.perf_counter() - start
+        print(f"{name}: {elapsed / iterations * 1e9:.0f} ns/call")
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        t = time.perf_counter()
+        histogram.observe(time.perf_counter() - t)
+    print(f"perf_counter() pair + observe: {(time.perf_counter() - start) / iterations * 1e9:.0f} ns/call")
+
+if __name__ == "__main__":
+    benchmark()
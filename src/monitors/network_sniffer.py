@@ -6,10 +6,30 @@ Captures network packets and extracts features for real intrusion detection
 
 import socketio
 import requests
+import os
+import sys
+import json
 import time
 import uuid
+import logging
+import threading
 from scapy.all import sniff, IP, TCP, UDP, DNS, DNSQR, conf
 from feature_extractor import FlowFeatureExtractor
+from domain_allowlist import DomainAllowlist
+from threat_intel import ThreatIntelIndex
+from traffic_bypass import TrafficBypass
+from signature_engine import SignatureEngine, load_signatures
+from tcp_reassembly import TCPReassembler
+from http_parser import HTTPFeatureExtractor
+from packet_dedup import PacketDeduplicator
+from ids_logging import configure_logging, get_logger
+from metrics import Counter, Gauge, Histogram, start_http_server
+from profiling import StageProfiler
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from models.lstm_stream import LSTMCellStack, StreamingLSTM
+
+logger = get_logger('sniffer')
 
 # Configuration
 API_URL = "http://127.0.0.1:5000/predict"
@@ -22,42 +42,185 @@ try:
 except Exception:
     pass
 
+# Packets seen on more than one interface within this window are processed once
+DEDUP_WINDOW_SECONDS = 0.05
+
+# Optional allowlist of known-benign registrable domains (one per line).
+# Queries to these domains skip DNS tunneling analysis.
+DNS_ALLOWLIST_PATH = None
+DNS_ALLOWLIST_ERROR_RATE = 0.001
+
+# Optional IP/CIDR indicator feed; reloaded automatically when the file changes
+THREAT_INTEL_PATH = None
+
+# Trusted traffic bypass: packets between these networks (optionally limited to
+# these ports) are not scored, submitted or streamed. Empty lists disable it.
+TRUSTED_SRC_CIDRS = []
+TRUSTED_DST_CIDRS = []
+TRUSTED_PORTS = []
+
+# Payload signatures: built-in set plus an optional 'name,category,pattern' file.
+# At most SIGNATURE_MAX_BYTES_PER_FLOW payload bytes are scanned per flow.
+ENABLE_PAYLOAD_SIGNATURES = True
+SIGNATURES_PATH = None
+SIGNATURE_MAX_BYTES_PER_FLOW = 4096
+
+# Optional TCP reassembly so payload analysis sees patterns split across segments
+ENABLE_TCP_REASSEMBLY = False
+REASSEMBLY_MAX_BYTES_PER_STREAM = 65536
+REASSEMBLY_MEMORY_BUDGET = 16 * 1024 * 1024
+
+# HTTP/1.x request/response features; at most HTTP_BYTE_BUDGET bytes are parsed per flow direction
+ENABLE_HTTP_FEATURES = True
+HTTP_BYTE_BUDGET = 2048
+
+# Model-driven feature pruning: only the feature groups the deployed model splits
+# on (reported by the API at MODEL_INFO_URL, re-checked every
+# FEATURE_PLAN_REFRESH_SECONDS) are computed, plus FEATURE_REQUIRED_GROUPS, which
+# the API's detection rules read, and the streaming LSTM's inputs (below).
+# Everything is computed until the API answers.
+FEATURE_PRUNING = True
+MODEL_INFO_URL = "http://127.0.0.1:5000/api/model"
+FEATURE_PLAN_REFRESH_SECONDS = 30
+FEATURE_REQUIRED_GROUPS = ['dns_tunneling', 'threat_intel', 'signatures']
+
+# Optional streaming sequence model (LSTMModel.export_stream .npz): each packet
+# advances its flow's cached LSTM state by one step; queued packets of all flows
+# are stepped together every LSTM_STREAM_TICK_MS. The state restarts after each
+# training window (the exported timesteps), as the model only saw windows that
+# long. A flow's state is dropped when the flow expires, or when
+# LSTM_STREAM_MAX_FLOWS is reached (least recently used first). Flows whose
+# non-benign probability reaches LSTM_STREAM_ALERT_THRESHOLD are reported.
+# None disables it.
+LSTM_STREAM_PATH = None
+LSTM_STREAM_MAX_FLOWS = 65536
+LSTM_STREAM_TICK_MS = 50
+LSTM_STREAM_ALERT_THRESHOLD = 0.9
+
+# Prometheus metrics are served on this port (None disables the endpoint)
+METRICS_PORT = 9101
+
+# Opt-in fine-grained packet path profiling: per-stage histograms, a summary in
+# the log every PROFILE_REPORT_INTERVAL seconds, and a cProfile capture of
+# 1 in PROFILE_SAMPLE_EVERY packets for PROFILE_CAPTURE_SECONDS on SIGUSR1
+# (Ctrl+Break on Windows), written to PROFILE_OUTPUT_DIR
+PROFILE_PACKET_PATH = False
+PROFILE_REPORT_INTERVAL = 60
+PROFILE_SAMPLE_EVERY = 10
+PROFILE_CAPTURE_SECONDS = 30
+PROFILE_OUTPUT_DIR = 'profiles'
+
 # Initialize components
 sio = socketio.Client()
-feature_extractor = FlowFeatureExtractor()
+dns_allowlist = DomainAllowlist.from_file(DNS_ALLOWLIST_PATH, DNS_ALLOWLIST_ERROR_RATE) if DNS_ALLOWLIST_PATH else None
+threat_intel = ThreatIntelIndex(THREAT_INTEL_PATH) if THREAT_INTEL_PATH else None
+signature_engine = None
+if ENABLE_PAYLOAD_SIGNATURES:
+    signatures = load_signatures(SIGNATURES_PATH) if SIGNATURES_PATH else None
+    signature_engine = SignatureEngine(signatures, max_bytes_per_flow=SIGNATURE_MAX_BYTES_PER_FLOW)
+reassembler = None
+if ENABLE_TCP_REASSEMBLY:
+    reassembler = TCPReassembler(REASSEMBLY_MAX_BYTES_PER_STREAM, REASSEMBLY_MEMORY_BUDGET)
+feature_extractor = FlowFeatureExtractor(
+    dns_allowlist=dns_allowlist,
+    threat_intel=threat_intel,
+    signature_engine=signature_engine,
+    reassembler=reassembler,
+    http_extractor=HTTPFeatureExtractor(HTTP_BYTE_BUDGET) if ENABLE_HTTP_FEATURES else None,
+)
+lstm_stream = None
+if LSTM_STREAM_PATH:
+    lstm_cell = LSTMCellStack.load(LSTM_STREAM_PATH)
+    if lstm_cell.feature_names is None:
+        logger.error("Streaming LSTM %s has no feature names; export it with LSTMModel(feature_names=...)",
+                     LSTM_STREAM_PATH)
+    else:
+        if lstm_cell.timesteps is None:
+            logger.warning("Streaming LSTM %s has no window length; flow state will run over whole flows",
+                           LSTM_STREAM_PATH)
+        lstm_stream = StreamingLSTM(lstm_cell, max_flows=LSTM_STREAM_MAX_FLOWS)
+        feature_extractor.add_expiry_listener(lstm_stream.evict)
+traffic_bypass = TrafficBypass(TRUSTED_SRC_CIDRS, TRUSTED_DST_CIDRS, TRUSTED_PORTS)
+deduplicator = PacketDeduplicator(DEDUP_WINDOW_SECONDS) if len(INTERFACES) > 1 else None
+
+# Stage metrics, matching the API's ids_api_* metrics
+STAGE_SECONDS = Histogram('ids_sniffer_stage_seconds', 'Time spent in each process_packet stage', ['stage'])
+FILTER_SECONDS = STAGE_SECONDS.labels('filter')
+FEATURES_SECONDS = STAGE_SECONDS.labels('features')
+DASHBOARD_EMIT_SECONDS = STAGE_SECONDS.labels('dashboard_emit')
+API_REQUEST_SECONDS = STAGE_SECONDS.labels('api_request')
+LSTM_TICK_SECONDS = STAGE_SECONDS.labels('lstm_tick')
+PACKETS_TOTAL = Counter('ids_sniffer_packets_total', 'Captured packets by outcome', ['result'])
+BYPASSED_PACKETS = PACKETS_TOTAL.labels('bypassed')
+DUPLICATE_PACKETS = PACKETS_TOTAL.labels('duplicate')
+NO_FEATURE_PACKETS = PACKETS_TOTAL.labels('no_features')
+SUBMITTED_PACKETS = PACKETS_TOTAL.labels('submitted')
+ERRORS_TOTAL = Counter('ids_sniffer_errors_total', 'Errors by kind', ['kind'])
+API_ERRORS = ERRORS_TOTAL.labels('api')
+PROCESSING_ERRORS = ERRORS_TOTAL.labels('processing')
+THREATS_TOTAL = Counter('ids_sniffer_threats_total', 'Non-benign API verdicts')
+LSTM_THREATS_TOTAL = Counter('ids_sniffer_lstm_threats_total', 'Flows flagged by the streaming sequence model')
+Gauge('ids_sniffer_flows', 'Flows tracked by the feature extractor').set_function(lambda: len(feature_extractor.flows))
+Gauge('ids_sniffer_dns_domains', 'DNS base domains tracked for query frequency').set_function(
+    lambda: len(feature_extractor.dns_analyzer.dns_stats))
+if lstm_stream is not None:
+    Gauge('ids_sniffer_lstm_flows', 'Flows with cached streaming LSTM state').set_function(lambda: len(lstm_stream))
+
+def encode_request(features):
+    """JSON body for the API request (same encoding requests uses for json=)"""
+    return json.dumps(features, allow_nan=False)
+
+def post_prediction(body):
+    """Send one encoded feature vector to the API's /predict endpoint"""
+    return requests.post(API_URL, data=body, headers={'Content-Type': 'application/json'}, timeout=1)
+
+profiler = None
+if PROFILE_PACKET_PATH:
+    profiler = StageProfiler(PROFILE_REPORT_INTERVAL, PROFILE_SAMPLE_EVERY, PROFILE_CAPTURE_SECONDS, PROFILE_OUTPUT_DIR)
+    profiler.instrument(traffic_bypass, 'should_bypass', 'bypass')
+    if deduplicator is not None:
+        profiler.instrument(deduplicator, 'is_duplicate', 'dedup')
+    profiler.instrument(feature_extractor, 'extract_features', 'extract_features')
+    profiler.instrument(feature_extractor, '_get_flow_key', 'flow_key')
+    profiler.instrument(feature_extractor, '_payload_chunks', 'payload_chunks')
+    if signature_engine is not None:
+        profiler.instrument(feature_extractor, '_inspect_payload', 'signature_scan')
+    if feature_extractor.http_extractor is not None:
+        profiler.instrument(feature_extractor.http_extractor, 'feed', 'http_parse')
+    profiler.instrument(feature_extractor, '_calculate_features', 'calculate_features')
+    profiler.instrument(feature_extractor.dns_analyzer, 'extract_dns_features', 'dns_features')
+    profiler.instrument(feature_extractor, 'cleanup_old_flows', 'flow_cleanup')
+    profiler.instrument(sys.modules[__name__], 'encode_request', 'json_encode')
+    profiler.instrument(sio, 'emit', 'sio_emit')
+    profiler.instrument(sys.modules[__name__], 'post_prediction', 'api_request')
 
 def process_packet(packet):
     """Process a packet and send for analysis"""
     try:
-        print(f"[DEBUG] Packet captured: {len(packet)} bytes")
+        stage_start = time.perf_counter()
+        # Trusted bulk traffic is dropped before any other work
+        if traffic_bypass.should_bypass(packet):
+            BYPASSED_PACKETS.inc()
+            return
 
-        if UDP in packet:
-            try:
-                print(f"[DEBUG] UDP ports sport={int(packet[UDP].sport)} dport={int(packet[UDP].dport)}")
-            except Exception:
-                pass
-
-        if UDP in packet and int(packet[UDP].dport) == 53:
-            if DNS in packet and DNSQR in packet:
-                qname = packet[DNSQR].qname.decode('utf-8', errors='ignore')
-                print(f"[DEBUG] DNS query captured qname={qname[:120]}")
-            else:
-                try:
-                    parsed = DNS(bytes(packet[UDP].payload))
-                    if parsed is not None and getattr(parsed, 'qd', None) is not None and getattr(parsed.qd, 'qname', None) is not None:
-                        qname = parsed.qd.qname.decode('utf-8', errors='ignore')
-                        print(f"[DEBUG] UDP/53 decoded via fallback qname={qname[:120]}")
-                    else:
-                        print("[DEBUG] UDP/53 captured but DNS layer not decoded")
-                except Exception:
-                    print("[DEBUG] UDP/53 captured but DNS layer not decoded")
+        # The same packet can arrive once per capture interface
+        if deduplicator is not None and deduplicator.is_duplicate(packet):
+            DUPLICATE_PACKETS.inc()
+            return
+        FILTER_SECONDS.observe(time.perf_counter() - stage_start)
+
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            log_packet_debug(packet)
         
         # Extract features
+        stage_start = time.perf_counter()
         features = feature_extractor.extract_features(packet)
+        FEATURES_SECONDS.observe(time.perf_counter() - stage_start)
         
         if features:
-            print(f"[DEBUG] Features extracted successfully")
-
+            # Not sent to the API; keys this packet's streaming LSTM state
+            flow_key = features.pop('flow_key')
             packet_id = uuid.uuid4().hex
             src_ip = packet[IP].src if IP in packet else None
             dst_ip = packet[IP].dst if IP in packet else None
@@ -78,16 +241,22 @@ def process_packet(packet):
             if destination_port is not None:
                 features['destination_port'] = destination_port
 
-            if 'dns_query_length' in features or destination_port == 53:
-                print(
-                    "[DEBUG] DNS features summary: "
-                    f"destination_port={features.get('destination_port')} "
-                    f"dns_query_length={features.get('dns_query_length')} "
-                    f"domain_entropy={features.get('domain_entropy')} "
-                    f"is_dns_tunneling={features.get('is_dns_tunneling')} "
-                    f"dns_conf={features.get('dns_tunneling_confidence')}"
+            if debug and ('dns_query_length' in features or destination_port == 53):
+                logger.debug(
+                    "DNS features summary: destination_port=%s dns_query_length=%s domain_entropy=%s "
+                    "is_dns_tunneling=%s dns_conf=%s",
+                    features.get('destination_port'), features.get('dns_query_length'),
+                    features.get('domain_entropy'), features.get('is_dns_tunneling'),
+                    features.get('dns_tunneling_confidence'),
                 )
             
+            if features.get('signature_matches'):
+                logger.debug("Payload signatures matched: %s", features['signature_matches'])
+
+            # Queue the packet for its flow's next streaming LSTM step
+            if lstm_stream is not None:
+                lstm_stream.submit(flow_key, [features.get(name) or 0 for name in lstm_stream.cell.feature_names])
+            
             # Create summary for dashboard
             summary = {
                 'packet_id': packet_id,
@@ -99,65 +268,198 @@ def process_packet(packet):
                 'destination_port': destination_port,
             }
             
-            print(f"[DEBUG] Sending to dashboard: {summary['src']} -> {summary['dst']}")
+            logger.debug("Sending to dashboard: %s -> %s", summary['src'], summary['dst'])
             
             # Send to dashboard
+            stage_start = time.perf_counter()
             sio.emit('stream_packet', summary)
+            DASHBOARD_EMIT_SECONDS.observe(time.perf_counter() - stage_start)
             
             # Send to API for prediction
             try:
                 if features.get('is_dns_tunneling'):
-                    print(
-                        "[DEBUG] DNS tunneling features before API: "
-                        f"is_dns_tunneling={features.get('is_dns_tunneling')} "
-                        f"dns_score={features.get('dns_tunneling_score')} "
-                        f"dns_conf={features.get('dns_tunneling_confidence')}"
+                    logger.debug(
+                        "DNS tunneling features before API: is_dns_tunneling=%s dns_score=%s dns_conf=%s",
+                        features.get('is_dns_tunneling'), features.get('dns_tunneling_score'),
+                        features.get('dns_tunneling_confidence'),
                     )
-                response = requests.post(API_URL, json=features, timeout=1)
+                SUBMITTED_PACKETS.inc()
+                stage_start = time.perf_counter()
+                body = encode_request(features)
+                response = post_prediction(body)
+                API_REQUEST_SECONDS.observe(time.perf_counter() - stage_start)
                 if response.status_code == 200:
                     result = response.json()
-                    print(f"[DEBUG] API response: {result}")
+                    logger.debug("API response: %s", result)
                     if result.get('prediction') != 0:  # If not benign
-                        print(f"⚠️  Threat detected: {result}")
+                        THREATS_TOTAL.inc()
+                        logger.warning("Threat detected: %s", result)
                 else:
-                    print(f"[DEBUG] API error: {response.status_code}")
+                    API_ERRORS.inc()
+                    logger.warning("API error: %s", response.status_code)
             except requests.exceptions.RequestException as e:
-                print(f"[DEBUG] API connection error: {e}")
+                API_ERRORS.inc()
+                logger.warning("API connection error: %s", e)
         else:
-            print(f"[DEBUG] No features extracted")
+            NO_FEATURE_PACKETS.inc()
+            logger.debug("No features extracted")
         
         # Cleanup old flows periodically
         feature_extractor.cleanup_old_flows()
         
-    except Exception as e:
-        print(f"Error processing packet: {e}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        PROCESSING_ERRORS.inc()
+        logger.exception("Error processing packet")
+
+def refresh_feature_plan(current_version=None):
+    """Apply the used features of the API's active model; returns its version."""
+    try:
+        info = requests.get(MODEL_INFO_URL, timeout=2).json()
+    except (requests.exceptions.RequestException, ValueError) as e:
+        logger.debug("Model info unavailable: %s", e)
+        return current_version
+    version = info.get('version')
+    if version != current_version:
+        used_features = info.get('used_features')
+        # The streaming LSTM reads its own inputs, which the API's model may not use
+        if used_features is not None and lstm_stream is not None:
+            used_features = list(used_features) + lstm_stream.cell.feature_names
+        feature_extractor.set_used_features(used_features, FEATURE_REQUIRED_GROUPS)
+        stats = feature_extractor.feature_plan_stats()
+        logger.info("Feature plan for model %s: computing %s; skipping %s", version,
+                    ', '.join(stats['computed_groups']), ', '.join(stats['skipped_groups']) or 'nothing')
+    return version
+
+def watch_feature_plan():
+    """Follow model swaps in the API from a daemon thread"""
+    def watch():
+        version = None
+        while True:
+            version = refresh_feature_plan(version)
+            time.sleep(FEATURE_PLAN_REFRESH_SECONDS)
+
+    threading.Thread(target=watch, name='feature-plan-watcher', daemon=True).start()
+
+def run_lstm_stream():
+    """Step the queued packets of all flows together from a daemon thread"""
+    def run():
+        while True:
+            time.sleep(LSTM_STREAM_TICK_MS / 1000)
+            stage_start = time.perf_counter()
+            try:
+                results = lstm_stream.tick()
+            except Exception:
+                PROCESSING_ERRORS.inc()
+                logger.exception("Error in streaming LSTM step")
+                continue
+            LSTM_TICK_SECONDS.observe(time.perf_counter() - stage_start)
+            for flow_key, proba in results.items():
+                # Class 0 is benign
+                if 1.0 - proba[0] >= LSTM_STREAM_ALERT_THRESHOLD:
+                    LSTM_THREATS_TOTAL.inc()
+                    logger.warning("Sequence model flags flow %s: class %d (p=%.3f)", flow_key,
+                                   int(proba.argmax()), float(proba.max()))
+
+    threading.Thread(target=run, name='lstm-stream', daemon=True).start()
+
+def log_packet_debug(packet):
+    """Per-packet debug details; only called when DEBUG logging is enabled"""
+    logger.debug("Packet captured: %d bytes", len(packet))
+
+    if UDP in packet:
+        logger.debug("UDP ports sport=%s dport=%s", packet[UDP].sport, packet[UDP].dport)
+
+    if UDP in packet and int(packet[UDP].dport) == 53:
+        if DNS in packet and DNSQR in packet:
+            qname = packet[DNSQR].qname.decode('utf-8', errors='ignore')
+            logger.debug("DNS query captured qname=%s", qname[:120])
+        else:
+            try:
+                parsed = DNS(bytes(packet[UDP].payload))
+                if parsed is not None and getattr(parsed, 'qd', None) is not None and getattr(parsed.qd, 'qname', None) is not None:
+                    qname = parsed.qd.qname.decode('utf-8', errors='ignore')
+                    logger.debug("UDP/53 decoded via fallback qname=%s", qname[:120])
+                else:
+                    logger.debug("UDP/53 captured but DNS layer not decoded")
+            except Exception:
+                logger.debug("UDP/53 captured but DNS layer not decoded")
+
+def log_stats():
+    """Log counters from the optional pipeline stages"""
+    if traffic_bypass.enabled:
+        logger.info("Trusted traffic bypass: %d packets bypassed", traffic_bypass.bypassed)
+    if deduplicator is not None:
+        stats = deduplicator.stats()
+        logger.info("Deduplication: %d duplicates dropped, %d packets passed", stats['deduplicated'], stats['passed'])
+    if reassembler is not None:
+        stats = reassembler.stats()
+        logger.info(
+            "TCP reassembly: %d bytes delivered, peak memory %d bytes, %d bytes dropped, %d buffers evicted",
+            stats['bytes_delivered'], stats['peak_memory'], stats['bytes_dropped'], stats['evicted_buffers'],
+        )
+    if signature_engine is not None:
+        stats = signature_engine.stats()
+        logger.info("Payload signatures: %d bytes scanned, %d matches", stats['bytes_scanned'], stats['matches'])
+    if dns_allowlist is not None:
+        stats = feature_extractor.dns_analyzer.allowlist_stats()
+        logger.info("DNS allowlist: %d of %d queries skipped analysis", stats['skipped_queries'], stats['lookups'])
+    if lstm_stream is not None:
+        stats = lstm_stream.stats()
+        logger.info("Streaming LSTM: %d steps in %d batches (%.1f us per flow step), %d flows cached, "
+                    "%d evicted on expiry, %d evicted by capacity", stats['steps'], stats['batched_steps'],
+                    stats['mean_step_us_per_flow'], stats['flows'], stats['evicted_expired'], stats['evicted_lru'])
+    if FEATURE_PRUNING:
+        stats = feature_extractor.feature_plan_stats()
+        skips = ', '.join(f"{group} x{count} (~{stats['group_cost_us'][group]:.1f} us)"
+                          for group, count in stats['group_skips'].items() if count)
+        logger.info("Feature pruning: skipped %s; est. %.3f s saved", skips or 'nothing',
+                    stats['estimated_seconds_saved'])
 
 def main():
     """Start packet capture"""
-    print(f"Starting Hybrid AI-IDS Network Sniffer on interface(s): {INTERFACES}")
-    print("Press Ctrl+C to stop...")
+    configure_logging()
+    logger.info("Starting Hybrid AI-IDS Network Sniffer on interface(s): %s", INTERFACES)
+    if dns_allowlist is not None:
+        stats = dns_allowlist.stats()
+        logger.info(
+            "DNS allowlist loaded: %d domains, %d bytes, est. false-positive rate %.5f",
+            stats['domains'], stats['memory_bytes'], stats['estimated_false_positive_rate'],
+        )
+    if METRICS_PORT:
+        start_http_server(METRICS_PORT)
+        logger.info("Metrics available on http://127.0.0.1:%d/metrics", METRICS_PORT)
+    logger.info("Press Ctrl+C to stop...")
+    if threat_intel is not None:
+        threat_intel.start_watching()
+    if FEATURE_PRUNING:
+        watch_feature_plan()
+    if lstm_stream is not None:
+        run_lstm_stream()
     
     try:
         # Connect to WebSocket server
         sio.connect(SIO_URL)
-        print("✓ Connected to WebSocket server")
+        logger.info("✓ Connected to WebSocket server")
         
         # Start packet capture
-        sniff(iface=INTERFACES, prn=process_packet, store=0)
+        handler = process_packet
+        if profiler is not None:
+            profiler.install_signal_handler()
+            handler = profiler.wrap_packet_handler(process_packet)
+        sniff(iface=INTERFACES, prn=handler, store=0)
         
     except socketio.exceptions.ConnectionError as e:
-        print(f"✗ Could not connect to WebSocket server: {e}")
-        print("Make sure the API server is running on http://127.0.0.1:5000")
+        logger.error("✗ Could not connect to WebSocket server: %s", e)
+        logger.error("Make sure the API server is running on http://127.0.0.1:5000")
     except KeyboardInterrupt:
-        print("\nStopping sniffer...")
+        logger.info("Stopping sniffer...")
     except PermissionError:
-        print("✗ Permission denied. Try running with administrator privileges.")
+        logger.error("✗ Permission denied. Try running with administrator privileges.")
     except Exception as e:
-        print(f"✗ Error: {e}")
+        logger.error("✗ Error: %s", e)
     finally:
+        log_stats()
         sio.disconnect()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
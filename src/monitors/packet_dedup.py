@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Packet Deduplication for Hybrid AI-IDS
+Drops copies of the same packet seen on several capture interfaces within a
+short time window.
+"""
+
+import time
+import zlib
+from scapy.all import IP, IPv6
+
+class PacketDeduplicator:
+    """Short-window duplicate filter keyed on a cheap packet fingerprint.
+
+    Fingerprints go into time buckets of window seconds. A packet is a
+    duplicate if its fingerprint is in the current or previous bucket, so a
+    copy is always caught within window seconds. Older buckets are dropped,
+    and each bucket holds at most max_entries_per_bucket fingerprints, which
+    bounds memory.
+    """
+
+    def __init__(self, window=0.05, payload_prefix=64, max_entries_per_bucket=65536):
+        self.window = window
+        self.payload_prefix = payload_prefix
+        self.max_entries_per_bucket = max_entries_per_bucket
+        self._bucket_id = None
+        self._current = set()
+        self._previous = set()
+        self.deduplicated = 0
+        self.passed = 0
+
+    def _fingerprint(self, packet):
+        """CRC32 over the IP header fields that are identical on every interface plus a payload prefix"""
+        if IP in packet:
+            raw = bytes(packet[IP])
+            header_len = (raw[0] & 0x0F) * 4
+            # Skip TTL (byte 8) and header checksum (bytes 10-11)
+            key = raw[0:8] + raw[9:10] + raw[12:20] + raw[header_len:header_len + self.payload_prefix]
+        elif IPv6 in packet:
+            raw = bytes(packet[IPv6])
+            # Skip hop limit (byte 7)
+            key = raw[0:7] + raw[8:40 + self.payload_prefix]
+        else:
+            return None
+        return zlib.crc32(key)
+
+    def is_duplicate(self, packet, now=None):
+        """Return True if an identical packet was seen within the window."""
+        fingerprint = self._fingerprint(packet)
+        if fingerprint is None:
+            self.passed += 1
+            return False
+
+        now = time.monotonic() if now is None else now
+        bucket_id = int(now / self.window)
+        if bucket_id != self._bucket_id:
+            adjacent = self._bucket_id is not None and bucket_id == self._bucket_id + 1
+            self._previous = self._current if adjacent else set()
+            self._current = set()
+            self._bucket_id = bucket_id
+
+        if fingerprint in self._current or fingerprint in self._previous:
+            self.deduplicated += 1
+            return True
+
+        if len(self._current) < self.max_entries_per_bucket:
+            self._current.add(fingerprint)
+        self.passed += 1
+        return False
+
+    def stats(self):
+        return {
+            'deduplicated': self.deduplicated,
+            'passed': self.passed,
+            'tracked': len(self._current) + len(self._previous),
+        }
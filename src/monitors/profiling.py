@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Hot-path Profiling for Hybrid AI-IDS
+Opt-in per-stage timing for the sniffer packet path, signal-triggered
+sampling cProfile captures, and a periodic summary in the log.
+
+Stages are instrumented by wrapping methods on the live objects
+(instrument()), so nothing is added to the packet path unless profiling
+is enabled.
+"""
+
+import io
+import os
+import time
+import pstats
+import signal
+import cProfile
+import functools
+import threading
+from metrics import REGISTRY, Histogram
+from ids_logging import get_logger
+
+logger = get_logger('profiling')
+
+# Signal that starts a cProfile capture (SIGBREAK / Ctrl+Break on Windows)
+CAPTURE_SIGNAL = getattr(signal, 'SIGUSR1', None) or getattr(signal, 'SIGBREAK', None)
+
+class StageProfiler:
+    """Per-stage latency histograms plus sampled cProfile captures.
+
+    Timings use time.perf_counter (monotonic) and go into the
+    ids_sniffer_profile_seconds{stage} histogram, which is also exported on
+    /metrics. Every report_interval seconds the change since the previous
+    report is logged as count, mean and approximate p50/p99 per stage.
+
+    A capture (started by CAPTURE_SIGNAL or request_capture()) runs cProfile
+    on every sample_every-th packet for capture_seconds, then writes a .prof
+    file to output_dir and logs the top functions by cumulative time.
+    """
+
+    def __init__(self, report_interval=60.0, sample_every=10, capture_seconds=30.0,
+                 output_dir='profiles', registry=REGISTRY):
+        self.report_interval = report_interval
+        self.sample_every = sample_every
+        self.capture_seconds = capture_seconds
+        self.output_dir = output_dir
+        self.histogram = Histogram('ids_sniffer_profile_seconds', 'Per-stage packet path timings (profiling)',
+                                   ['stage'], registry=registry)
+        self._stages = {}
+        self._last_report = time.monotonic()
+        self._last_snapshots = {}
+        self._packets = 0
+        self._capture_requested = False
+        self._capture = None
+        self._capture_until = 0.0
+        self._lock = threading.Lock()
+
+    # --- Stage timing ---
+
+    def stage(self, name):
+        """Histogram child for a stage (observe seconds on it directly)."""
+        child = self._stages.get(name)
+        if child is None:
+            child = self._stages[name] = self.histogram.labels(name)
+        return child
+
+    def instrument(self, owner, attribute, stage):
+        """Replace owner.attribute (a method or function) with a timed wrapper."""
+        function = getattr(owner, attribute)
+        observe = self.stage(stage).observe
+        clock = time.perf_counter
+
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                observe(clock() - start)
+
+        setattr(owner, attribute, timed)
+        return timed
+
+    def wrap_packet_handler(self, handler):
+        """Wrap the sniff() callback: total time, capture delay, sampling and reports."""
+        total = self.stage('total').observe
+        capture_delay = self.stage('capture_delay').observe
+        clock = time.perf_counter
+
+        @functools.wraps(handler)
+        def profiled(packet):
+            # Time from capture to the callback: scapy dissection plus queueing
+            captured_at = getattr(packet, 'time', None)
+            if captured_at is not None:
+                capture_delay(max(0.0, time.time() - float(captured_at)))
+            self._packets += 1
+            start = clock()
+            if self._capture_requested or self._capture is not None:
+                self._sample(handler, packet)
+            else:
+                handler(packet)
+            total(clock() - start)
+            if time.monotonic() - self._last_report >= self.report_interval:
+                self.report()
+
+        return profiled
+
+    # --- cProfile captures ---
+
+    def install_signal_handler(self):
+        """Start a capture on CAPTURE_SIGNAL; must be called from the main thread."""
+        if CAPTURE_SIGNAL is None:
+            logger.warning("No capture signal available on this platform")
+            return
+        signal.signal(CAPTURE_SIGNAL, lambda signum, frame: self.request_capture())
+        logger.info("Send signal %s (pid %d) to capture a cProfile sample", CAPTURE_SIGNAL.name, os.getpid())
+
+    def request_capture(self):
+        self._capture_requested = True
+
+    def _sample(self, handler, packet):
+        with self._lock:
+            if self._capture_requested:
+                self._capture_requested = False
+                if self._capture is None:
+                    self._capture = cProfile.Profile()
+                    self._capture_until = time.monotonic() + self.capture_seconds
+                    logger.info("cProfile capture started for %.0f s (1 in %d packets)",
+                                self.capture_seconds, self.sample_every)
+            capture = self._capture
+            if capture is not None and time.monotonic() >= self._capture_until:
+                self._capture = None
+                self._finish_capture(capture)
+                capture = None
+        if capture is not None and self._packets % self.sample_every == 0:
+            capture.runcall(handler, packet)
+        else:
+            handler(packet)
+
+    def _finish_capture(self, capture):
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f"sniffer-{time.strftime('%Y%m%d-%H%M%S')}.prof")
+        capture.dump_stats(path)
+        summary = io.StringIO()
+        pstats.Stats(capture, stream=summary).sort_stats('cumulative').print_stats(15)
+        logger.info("cProfile capture written to %s\n%s", path, summary.getvalue())
+
+    # --- Summary ---
+
+    def report(self):
+        """Log per-stage statistics since the previous report."""
+        self._last_report = time.monotonic()
+        bounds = self.histogram.bounds + (float('inf'),)
+        lines = []
+        for name, child in sorted(self._stages.items()):
+            cumulative, total, count = child.snapshot()
+            previous = self._last_snapshots.get(name)
+            self._last_snapshots[name] = (cumulative, total, count)
+            if previous is not None:
+                cumulative = [c - p for c, p in zip(cumulative, previous[0])]
+                total -= previous[1]
+                count -= previous[2]
+            if not count:
+                continue
+            p50 = next(b for b, c in zip(bounds, cumulative) if c >= count * 0.5)
+            p99 = next(b for b, c in zip(bounds, cumulative) if c >= count * 0.99)
+            lines.append(f"  {name:<20} n={int(count):<8} mean={total / count * 1e6:9.1f} us  "
+                         f"p50<={p50 * 1e6:.0f} us  p99<={p99 * 1e6:.0f} us")
+        if lines:
+            logger.info("Packet path profile (last %.0f s):\n%s", self.report_interval, '\n'.join(lines))
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+TCP Stream Reassembly for Hybrid AI-IDS
+Orders TCP segments per flow direction so payload analyzers see contiguous
+data, with a per-stream byte cap and a global memory budget.
+"""
+
+from collections import OrderedDict
+
+SEQ_MOD = 1 << 32
+SEQ_HALF = 1 << 31
+
+def seq_diff(a, b):
+    """Signed distance a - b in 32-bit sequence space."""
+    d = (a - b) % SEQ_MOD
+    return d - SEQ_MOD if d >= SEQ_HALF else d
+
+
+class TCPStream:
+    """Reassembly state for one direction of a TCP connection."""
+
+    __slots__ = ('next_seq', 'pending', 'pending_bytes', 'delivered')
+
+    def __init__(self, next_seq):
+        self.next_seq = next_seq
+        self.pending = {}        # seq -> payload for out-of-order segments
+        self.pending_bytes = 0
+        self.delivered = 0
+
+
+class TCPReassembler:
+    """Bounded-memory, sequence-ordered TCP reassembler.
+
+    Only out-of-order segments are buffered; in-order data is handed back
+    immediately as chunks. Each stream delivers at most max_bytes_per_stream
+    bytes, and when buffered data exceeds memory_budget the least recently
+    active streams lose their pending segments first. A stream whose pending
+    data is dropped, or that waits on a hole for more than
+    max_pending_segments segments, skips the hole and resumes with the next
+    data it has.
+    """
+
+    def __init__(self, max_bytes_per_stream=65536, memory_budget=16 * 1024 * 1024,
+                 max_streams=100000, max_pending_segments=64):
+        self.max_bytes_per_stream = max_bytes_per_stream
+        self.memory_budget = memory_budget
+        self.max_streams = max_streams
+        self.max_pending_segments = max_pending_segments
+        self.streams = OrderedDict()     # (flow_key, is_forward) -> TCPStream, LRU order
+        self.memory_used = 0
+        self.peak_memory = 0
+        self.bytes_delivered = 0
+        self.out_of_order_segments = 0
+        self.retransmitted_segments = 0
+        self.bytes_dropped = 0
+        self.gaps_skipped = 0
+        self.evicted_buffers = 0
+        self.evicted_streams = 0
+
+    def add_segment(self, flow_key, is_forward, seq, payload, syn=False, fin=False, rst=False):
+        """Add one segment and return the list of newly contiguous data chunks."""
+        key = (flow_key, is_forward)
+        stream = self.streams.get(key)
+        if stream is None:
+            if not payload and not syn:
+                return []
+            # SYN consumes one sequence number; otherwise start at the first segment seen
+            stream = TCPStream((seq + 1) % SEQ_MOD if syn else seq)
+            self.streams[key] = stream
+            if len(self.streams) > self.max_streams:
+                self._evict_oldest()
+        else:
+            self.streams.move_to_end(key)
+
+        chunks = []
+        if payload:
+            chunks = self._add_payload(stream, seq, payload)
+
+        # On FIN keep the stream while segments before it are still missing
+        if rst or (fin and not stream.pending):
+            self._release(key)
+        elif self.memory_used > self.memory_budget:
+            self._evict_under_pressure(key)
+        # Recorded after eviction, so the peak never exceeds the budget
+        self.peak_memory = max(self.peak_memory, self.memory_used)
+        return chunks
+
+    def _add_payload(self, stream, seq, payload):
+        if stream.next_seq is None:
+            # Resynchronize after pending data was dropped
+            stream.next_seq = seq
+        remaining = self.max_bytes_per_stream - stream.delivered - stream.pending_bytes
+        offset = seq_diff(seq, stream.next_seq)
+
+        if offset < 0:
+            # Retransmission or overlap: keep only data beyond what was delivered
+            if -offset >= len(payload):
+                self.retransmitted_segments += 1
+                return []
+            payload = payload[-offset:]
+            seq = stream.next_seq
+            offset = 0
+
+        if remaining <= 0:
+            self.bytes_dropped += len(payload)
+            return []
+        if len(payload) > remaining:
+            self.bytes_dropped += len(payload) - remaining
+            payload = payload[:remaining]
+
+        if offset > 0:
+            existing = stream.pending.get(seq)
+            if existing is not None and len(existing) >= len(payload):
+                self.retransmitted_segments += 1
+                return []
+            self.out_of_order_segments += 1
+            added = len(payload) - (len(existing) if existing is not None else 0)
+            stream.pending[seq] = payload
+            stream.pending_bytes += added
+            self.memory_used += added
+            if len(stream.pending) <= self.max_pending_segments:
+                return []
+            # The hole is unlikely to be filled: continue from the earliest pending segment
+            self.gaps_skipped += 1
+            stream.next_seq = min(stream.pending, key=lambda s: seq_diff(s, stream.next_seq))
+            chunks = self._drain(stream)
+            self.bytes_delivered += sum(len(c) for c in chunks)
+            return chunks
+
+        chunks = [payload]
+        stream.next_seq = (stream.next_seq + len(payload)) % SEQ_MOD
+        stream.delivered += len(payload)
+        chunks.extend(self._drain(stream))
+        self.bytes_delivered += sum(len(c) for c in chunks)
+        return chunks
+
+    def _drain(self, stream):
+        """Deliver buffered segments that have become contiguous."""
+        chunks = []
+        while stream.pending:
+            if stream.next_seq in stream.pending:
+                ready = stream.next_seq
+            else:
+                # Segments that overlap the delivered data are trimmed below
+                ready = next((seq for seq in stream.pending if seq_diff(seq, stream.next_seq) <= 0), None)
+            if ready is None:
+                break
+            data = stream.pending.pop(ready)
+            stream.pending_bytes -= len(data)
+            self.memory_used -= len(data)
+            overlap = -seq_diff(ready, stream.next_seq)
+            if overlap >= len(data):
+                continue
+            data = data[overlap:]
+            chunks.append(data)
+            stream.next_seq = (stream.next_seq + len(data)) % SEQ_MOD
+            stream.delivered += len(data)
+        return chunks
+
+    def _drop_pending(self, stream):
+        if not stream.pending:
+            return
+        self.bytes_dropped += stream.pending_bytes
+        self.memory_used -= stream.pending_bytes
+        stream.pending.clear()
+        stream.pending_bytes = 0
+        stream.next_seq = None
+
+    def _release(self, key):
+        stream = self.streams.pop(key, None)
+        if stream is not None:
+            self._drop_pending(stream)
+
+    def _evict_oldest(self):
+        key, stream = self.streams.popitem(last=False)
+        self._drop_pending(stream)
+        self.evicted_streams += 1
+
+    def _evict_under_pressure(self, current_key):
+        """Drop pending data from the least recently active streams until within budget."""
+        for key in list(self.streams):
+            if self.memory_used <= self.memory_budget:
+                break
+            if key == current_key:
+                continue
+            stream = self.streams[key]
+            if stream.pending_bytes:
+                self._drop_pending(stream)
+                self.evicted_buffers += 1
+        if self.memory_used > self.memory_budget:
+            self._drop_pending(self.streams[current_key])
+            self.evicted_buffers += 1
+
+    def remove_flow(self, flow_key):
+        """Forget both directions of a flow (called when the flow expires)."""
+        self._release((flow_key, True))
+        self._release((flow_key, False))
+
+    def stats(self):
+        return {
+            'streams': len(self.streams),
+            'memory_used': self.memory_used,
+            'peak_memory': self.peak_memory,
+            'memory_budget': self.memory_budget,
+            'bytes_delivered': self.bytes_delivered,
+            'out_of_order_segments': self.out_of_order_segments,
+            'retransmitted_segments': self.retransmitted_segments,
+            'bytes_dropped': self.bytes_dropped,
+            'gaps_skipped': self.gaps_skipped,
+            'evicted_buffers': self.evicted_buffers,
+            'evicted_streams': self.evicted_streams,
+        }
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Threat Intelligence Matcher for Hybrid AI-IDS
+Indexes IP/CIDR indicators from local feed files as sorted integer ranges
+so flows and API requests can be matched with a binary search.
+"""
+
+import os
+import socket
+import ipaddress
+import threading
+import time
+import numpy as np
+from bisect import bisect_right
+from ids_logging import get_logger
+
+logger = get_logger('threat_intel')
+
+def ip_to_int(ip):
+    """Convert an IPv4/IPv6 address string to (version, integer)."""
+    if ':' in ip:
+        return 6, int.from_bytes(socket.inet_pton(socket.AF_INET6, ip), 'big')
+    return 4, int.from_bytes(socket.inet_aton(ip), 'big')
+
+def parse_cidr(text):
+    """Parse '1.2.3.4', '1.2.3.0/24' or an IPv6 network into (version, start, end)."""
+    addr, _, prefix = text.partition('/')
+    if ':' not in addr and addr.count('.') == 3:
+        # IPv4 fast path; ipaddress.ip_network is too slow for large feeds
+        value = int.from_bytes(socket.inet_aton(addr), 'big')
+        bits = int(prefix) if prefix else 32
+        if not 0 <= bits <= 32:
+            raise ValueError(f"Invalid prefix length in {text!r}")
+        host_mask = (1 << (32 - bits)) - 1
+        start = value & ~host_mask & 0xFFFFFFFF
+        return 4, start, start | host_mask
+    network = ipaddress.ip_network(text, strict=False)
+    return network.version, int(network.network_address), int(network.broadcast_address)
+
+
+def _most_specific(ranges):
+    """Disjoint (start, end, value) segments from ranges sorted by (start, -end).
+
+    Ranges are CIDR blocks, so two of them either nest or are disjoint;
+    where they nest, the innermost range's value wins. Of identical ranges
+    the first is kept.
+    """
+    segments = []
+    stack = []  # enclosing ranges still open at pos, innermost last
+    pos = None
+    for start, end, value in ranges:
+        while stack and stack[-1][1] < start:
+            _, closed_end, closed_value = stack.pop()
+            if pos <= closed_end:
+                segments.append((pos, closed_end, closed_value))
+                pos = closed_end + 1
+        if stack:
+            if stack[-1][0] == start and stack[-1][1] == end:
+                continue
+            if pos < start:
+                segments.append((pos, start - 1, stack[-1][2]))
+        pos = start
+        stack.append((start, end, value))
+    while stack:
+        _, closed_end, closed_value = stack.pop()
+        if pos <= closed_end:
+            segments.append((pos, closed_end, closed_value))
+            pos = closed_end + 1
+    return segments
+
+
+class IPRangeIndex:
+    """Sorted, non-overlapping integer ranges with binary-search lookup.
+
+    Nested ranges are split so that every address maps to the value of the
+    most specific range containing it; adjacent or overlapping ranges are
+    merged only when their values are equal.
+    """
+
+    def __init__(self, ranges=()):
+        starts, ends, values = [], [], []
+        for start, end, value in _most_specific(sorted(ranges, key=lambda r: (r[0], -r[1]))):
+            if starts and start == ends[-1] + 1 and value == values[-1]:
+                ends[-1] = end
+                continue
+            starts.append(start)
+            ends.append(end)
+            values.append(value)
+        self._starts = starts
+        self._ends = ends
+        self._values = values
+
+    @classmethod
+    def from_arrays(cls, starts, ends, values):
+        """Vectorized build from int64 start/end arrays (used for large IPv4 feeds)."""
+        index = cls()
+        if len(starts) == 0:
+            return index
+        order = np.lexsort((-ends, starts))
+        starts, ends, values = starts[order], ends[order], values[order]
+        # Ranges overlapping nothing are kept as they are; only clusters of
+        # nested ranges go through the (Python) most-specific split
+        running_end = np.maximum.accumulate(ends)
+        is_new = np.empty(len(starts), dtype=bool)
+        is_new[0] = True
+        is_new[1:] = starts[1:] > running_end[:-1]
+        cluster = np.cumsum(is_new) - 1
+        nested = np.bincount(cluster)[cluster] > 1
+        if nested.any():
+            segments = _most_specific(zip(starts[nested].tolist(), ends[nested].tolist(), values[nested]))
+            seg_starts, seg_ends, seg_values = zip(*segments)
+            seg_value_array = np.empty(len(segments), dtype=object)
+            seg_value_array[:] = seg_values
+            starts = np.concatenate([starts[~nested], np.array(seg_starts, dtype=np.int64)])
+            ends = np.concatenate([ends[~nested], np.array(seg_ends, dtype=np.int64)])
+            values = np.concatenate([values[~nested], seg_value_array])
+            order = np.argsort(starts, kind='stable')
+            starts, ends, values = starts[order], ends[order], values[order]
+        # Merge runs of adjacent segments with the same value
+        first = np.flatnonzero(np.r_[True, (starts[1:] != ends[:-1] + 1) | (values[1:] != values[:-1])])
+        index._starts = starts[first].tolist()
+        index._ends = ends[np.r_[first[1:] - 1, len(starts) - 1]].tolist()
+        index._values = values[first].tolist()
+        return index
+
+    def __len__(self):
+        return len(self._starts)
+
+    def lookup(self, value):
+        """Return the value of the range containing the integer, or None."""
+        i = bisect_right(self._starts, value) - 1
+        if i >= 0 and value <= self._ends[i]:
+            return self._values[i]
+        return None
+
+
+class CIDRMatcher:
+    """Precompiled IPv4/IPv6 CIDR set, e.g. for trusted networks."""
+
+    def __init__(self, cidrs=(), value=True):
+        v4, v6 = [], []
+        for cidr in cidrs:
+            version, start, end = parse_cidr(cidr.strip())
+            (v4 if version == 4 else v6).append((start, end, value))
+        self._indexes = {4: IPRangeIndex(v4), 6: IPRangeIndex(v6)}
+
+    @classmethod
+    def from_indexes(cls, v4_index, v6_index):
+        """Build a matcher from prebuilt IPv4 and IPv6 range indexes."""
+        matcher = cls()
+        matcher._indexes = {4: v4_index, 6: v6_index}
+        return matcher
+
+    def __len__(self):
+        return len(self._indexes[4]) + len(self._indexes[6])
+
+    def lookup(self, ip):
+        """Return the stored value for a matching address string, or None."""
+        try:
+            version, value = ip_to_int(ip)
+        except (OSError, ValueError, TypeError):
+            return None
+        return self._indexes[version].lookup(value)
+
+    def __contains__(self, ip):
+        return self.lookup(ip) is not None
+
+
+class ThreatIntelIndex:
+    """IP/CIDR indicator index loaded from a local feed file.
+
+    Feed format: one indicator per line, optionally followed by a label
+    separated by a comma or whitespace; '#' starts a comment. The index is
+    rebuilt off to the side and swapped in with a single assignment, so
+    lookups never see a partially loaded feed.
+    """
+
+    def __init__(self, feed_path=None, check_interval=5.0):
+        self.feed_path = feed_path
+        self.check_interval = check_interval
+        self._matcher = CIDRMatcher()
+        self._mtime = None
+        self._last_check = 0.0
+        self._watcher = None
+        self.indicator_count = 0
+        self.invalid_count = 0
+        self.load_seconds = 0.0
+        self.matches = 0
+        if feed_path:
+            self.load(feed_path)
+
+    def load(self, feed_path):
+        """Load (or reload) the feed file and atomically replace the index."""
+        start_time = time.perf_counter()
+        mtime = os.stat(feed_path).st_mtime
+        # IPv4 indicators are collected as packed addresses + prefix lengths and
+        # converted in bulk with numpy; IPv6 goes through parse_cidr.
+        v4_packed, v4_prefixes, v4_labels = [], [], []
+        v6 = []
+        invalid = 0
+        inet_aton = socket.inet_aton
+        with open(feed_path, 'r', encoding='utf-8', errors='ignore') as f:
+            lines = f.read().splitlines()
+        for line in lines:
+            if '#' in line:
+                line = line.split('#', 1)[0]
+            parts = line.replace(',', ' ').split(None, 1)
+            if not parts:
+                continue
+            label = parts[1].strip() if len(parts) > 1 else 'threat-intel'
+            addr, _, prefix = parts[0].partition('/')
+            try:
+                if ':' in addr:
+                    v6.append(parse_cidr(parts[0])[1:] + (label,))
+                    continue
+                v4_packed.append(inet_aton(addr))
+            except (OSError, ValueError):
+                invalid += 1
+                continue
+            v4_prefixes.append(prefix or '32')
+            v4_labels.append(label)
+
+        v4_count = 0
+        v4_index = IPRangeIndex()
+        if v4_packed:
+            addrs = np.frombuffer(b''.join(v4_packed), dtype='>u4').astype(np.int64)
+            try:
+                bits = np.array(v4_prefixes).astype(np.int64)
+            except ValueError:
+                bits = np.array([int(p) if p.isdigit() else -1 for p in v4_prefixes], dtype=np.int64)
+            valid = (bits >= 0) & (bits <= 32)
+            invalid += int((~valid).sum())
+            addrs, bits = addrs[valid], bits[valid]
+            v4_count = len(addrs)
+            host_mask = (np.int64(1) << (32 - bits)) - 1
+            starts = addrs & ~host_mask
+            v4_index = IPRangeIndex.from_arrays(starts, starts | host_mask, np.array(v4_labels, dtype=object)[valid])
+
+        self._matcher = CIDRMatcher.from_indexes(v4_index, IPRangeIndex(v6))
+        self.feed_path = feed_path
+        self._mtime = mtime
+        self.indicator_count = v4_count + len(v6)
+        self.invalid_count = invalid
+        self.load_seconds = time.perf_counter() - start_time
+        logger.info(
+            "Threat intel loaded from %s: %d indicators (%d invalid) in %.1f ms",
+            feed_path, self.indicator_count, invalid, self.load_seconds * 1000,
+        )
+
+    def maybe_reload(self):
+        """Reload the feed if its modification time changed since the last load."""
+        now = time.monotonic()
+        if not self.feed_path or now - self._last_check < self.check_interval:
+            return False
+        self._last_check = now
+        try:
+            if os.stat(self.feed_path).st_mtime == self._mtime:
+                return False
+            self.load(self.feed_path)
+            return True
+        except OSError as e:
+            logger.warning("Threat intel reload failed: %s", e)
+            return False
+
+    def start_watching(self):
+        """Poll the feed file from a daemon thread and reload it when it changes."""
+        if self._watcher is not None:
+            return
+
+        def watch():
+            while True:
+                time.sleep(self.check_interval)
+                self.maybe_reload()
+
+        self._watcher = threading.Thread(target=watch, name='threat-intel-watcher', daemon=True)
+        self._watcher.start()
+
+    def match(self, ip):
+        """Return the indicator label for an address, or None."""
+        if ip is None:
+            return None
+        label = self._matcher.lookup(ip)
+        if label is not None:
+            self.matches += 1
+        return label
+
+    def stats(self):
+        return {
+            'feed_path': str(self.feed_path) if self.feed_path else None,
+            'indicators': self.indicator_count,
+            'ranges': len(self._matcher),
+            'invalid': self.invalid_count,
+            'load_ms': self.load_seconds * 1000,
+            'matches': self.matches,
+        }
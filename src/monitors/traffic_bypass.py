@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Trusted Traffic Bypass for Hybrid AI-IDS
+Lets the sniffer drop bulk traffic between trusted networks before any
+feature extraction, API submission or dashboard streaming.
+"""
+
+from scapy.all import IP, IPv6, TCP, UDP
+from threat_intel import CIDRMatcher
+
+class TrafficBypass:
+    """Precompiled trusted-network matcher applied to captured packets.
+
+    A packet is bypassed when one endpoint is in the trusted source networks
+    and the other is in the trusted destination networks (in either
+    direction, so replies are skipped too). If trusted ports are configured,
+    one of the packet's ports must also be in that set.
+    """
+
+    def __init__(self, trusted_src_cidrs=(), trusted_dst_cidrs=(), trusted_ports=()):
+        self.src_networks = CIDRMatcher(trusted_src_cidrs)
+        self.dst_networks = CIDRMatcher(trusted_dst_cidrs)
+        self.trusted_ports = frozenset(int(p) for p in trusted_ports)
+        self.enabled = len(self.src_networks) > 0 and len(self.dst_networks) > 0
+        self.bypassed = 0
+
+    def should_bypass(self, packet):
+        """Return True (and count it) if the packet belongs to trusted traffic."""
+        if not self.enabled:
+            return False
+
+        if IP in packet:
+            layer = packet[IP]
+        elif IPv6 in packet:
+            layer = packet[IPv6]
+        else:
+            return False
+        src, dst = layer.src, layer.dst
+
+        if self.trusted_ports:
+            if TCP in packet:
+                l4 = packet[TCP]
+            elif UDP in packet:
+                l4 = packet[UDP]
+            else:
+                return False
+            if l4.sport not in self.trusted_ports and l4.dport not in self.trusted_ports:
+                return False
+
+        if not ((src in self.src_networks and dst in self.dst_networks) or
+                (dst in self.src_networks and src in self.dst_networks)):
+            return False
+
+        self.bypassed += 1
+        return True
@@ -5,10 +5,27 @@ Measures model latency and throughput.
 """
 
 import pandas as pd
+import numpy as np
 import time
 import joblib
 from pathlib import Path
 from sklearn.model_selection import train_test_split
+from models.flat_forest import FlatForest
+from models.random_forest_model import RandomForestModel
+from models.cascade_model import CascadeModel
+
+# Rows per predict_proba call in the streaming (predict_batches) benchmark
+STREAM_BATCH_ROWS = 1024
+
+def measure_latency(predict, batch, repeats):
+    """Median and p99 wall time of predict(batch) in milliseconds."""
+    predict(batch)  # Warm-up
+    timings = []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        predict(batch)
+        timings.append((time.perf_counter() - start_time) * 1000)
+    return np.median(timings), np.percentile(timings, 99)
 
 def main():
     """Main function to run the performance tests."""
@@ -33,43 +50,65 @@ def main():
     print(f"Loading optimized model from {model_path}...")
     model = joblib.load(model_path)
 
-    # --- 2. Test Latency ---
-    print("\n--- Testing Prediction Latency ---")
-    # Test on a single instance
-    single_instance = X_test.iloc[[0]]
+    # Flatten the forest into arrays for the vectorized traversal engine
     start_time = time.perf_counter()
-    model.predict(single_instance)
-    end_time = time.perf_counter()
-    latency = (end_time - start_time) * 1000 # in milliseconds
-    print(f"  - Latency for a single prediction: {latency:.4f} ms")
+    compiled_model = FlatForest.from_sklearn(model)
+    print(f"Compiled {compiled_model.n_estimators} trees ({compiled_model.n_nodes} nodes, "
+          f"max depth {compiled_model.max_depth}) in {(time.perf_counter() - start_time) * 1000:.1f} ms")
+    max_error = compiled_model.verify(model, X_test.head(10000))
+    print(f"  - Max probability difference vs sklearn on {min(len(X_test), 10000)} rows: {max_error:.2e}")
 
-    # Test on a batch of instances
+    # --- 2. Test Latency ---
+    print("\n--- Testing Prediction Latency (sklearn vs compiled) ---")
     batch_size = 1000
-    batch = X_test.head(batch_size)
-    start_time = time.perf_counter()
-    model.predict(batch)
-    end_time = time.perf_counter()
-    batch_latency = (end_time - start_time) * 1000 # in milliseconds
-    avg_batch_latency = batch_latency / batch_size
-    print(f"  - Average latency for a batch of {batch_size}: {avg_batch_latency:.4f} ms per instance")
+    for name, batch, repeats in [('single prediction', X_test.iloc[[0]], 200),
+                                 (f'batch of {batch_size}', X_test.head(batch_size), 20)]:
+        for engine, engine_model in [('sklearn', model), ('compiled', compiled_model)]:
+            median, p99 = measure_latency(engine_model.predict_proba, batch, repeats)
+            print(f"  - {engine:<8} {name}: median {median:.4f} ms, p99 {p99:.4f} ms "
+                  f"({median / len(batch):.4f} ms per instance)")
 
     # --- 3. Test Throughput ---
     print("\n--- Testing Prediction Throughput ---")
     test_duration = 10 # seconds
-    predictions = 0
-    start_time = time.time()
-
-    while (time.time() - start_time) < test_duration:
-        # Simulate a stream of data
-        sample_indices = range(len(X_test))
-        for i in sample_indices:
-            if (time.time() - start_time) >= test_duration:
-                break
-            model.predict(X_test.iloc[[i]])
-            predictions += 1
-    
-    throughput = predictions / test_duration
-    print(f"  - Throughput: {throughput:.2f} predictions per second")
+    for engine, engine_model in [('sklearn', model), ('compiled', compiled_model)]:
+        predictions = 0
+        start_time = time.time()
+
+        while (time.time() - start_time) < test_duration:
+            # Simulate a stream of data
+            sample_indices = range(len(X_test))
+            for i in sample_indices:
+                if (time.time() - start_time) >= test_duration:
+                    break
+                engine_model.predict(X_test.iloc[[i]])
+                predictions += 1
+
+        throughput = predictions / test_duration
+        print(f"  - {engine:<8} throughput: {throughput:.2f} predictions per second")
+
+    # --- 4. Benchmark Backends ---
+    # Every backend is fed the same float32 matrix through BaseModel.predict_proba
+    print("\n--- Benchmarking Backends (float32 batches) ---")
+    backends = {}
+    for engine, engine_model in [('sklearn', model), ('compiled', compiled_model)]:
+        backends[f'random_forest ({engine})'] = RandomForestModel()
+        backends[f'random_forest ({engine})'].model = engine_model
+    screen_path = model_path.parent / 'cascade_screening_model.joblib'
+    if screen_path.exists():
+        cascade = CascadeModel(backends['random_forest (compiled)'])
+        cascade.load(str(screen_path))
+        backends['cascade (compiled)'] = cascade.compile()
+
+    test_batch = backends['random_forest (sklearn)'].as_batch(X_test)
+    for name, backend in backends.items():
+        single, _ = measure_latency(backend.predict_proba, test_batch[:1], 200)
+        batch, _ = measure_latency(backend.predict_proba, test_batch[:batch_size], 20)
+        start_time = time.perf_counter()
+        rows = sum(len(proba) for proba in backend.predict_batches([test_batch], STREAM_BATCH_ROWS))
+        throughput = rows / (time.perf_counter() - start_time)
+        print(f"  - {name:<26} single {single:8.4f} ms, batch of {batch_size} {batch:9.3f} ms, "
+              f"streamed {throughput:10.0f} rows/s")
 
     print("\n" + "="*60)
     print("Performance testing complete.")
@@ -3,12 +3,15 @@
 Main Model Training Pipeline for Hybrid AI-IDS
 """
 
+import time
 import pandas as pd
 from pathlib import Path
 from sklearn.model_selection import train_test_split
 
 # Import models
 from models.random_forest_model import RandomForestModel
+from models.cascade_model import CascadeModel
+from models.model_registry import ModelRegistry, dataset_hash
 # from models.lstm_model import LSTMModel
 # from models.gnn_model import GNNModel
 
@@ -47,6 +50,46 @@ def main():
     rf_model.train(X_train, y_train)
     rf_model.save(str(models_path / 'random_forest_model.joblib'))
 
+    # --- Early-Exit Cascade ---
+    # A small forest on the top features screens every row; only uncertain
+    # (or, in the API, rule-flagged) rows are rescored by the full forest
+    cascade = CascadeModel(rf_model)
+    cascade.train(X_train, y_train)
+    test_batch = rf_model.as_batch(X_test)
+    start_time = time.perf_counter()
+    full_pred = rf_model.predict(test_batch)
+    full_only_ms = (time.perf_counter() - start_time) / len(X_test) * 1000
+    # Timed with the production audit rate; agreement comes from the full-model pass above
+    start_time = time.perf_counter()
+    cascade_pred = cascade.predict(test_batch)
+    cascade_ms = (time.perf_counter() - start_time) / len(X_test) * 1000
+    cascade_stats = cascade.stats()
+    # Escalated rows get the full model's answer, so every disagreement is an early exit
+    exits = len(X_test) - round(cascade_stats['escalation_rate'] * len(X_test))
+    disagreements = int((cascade_pred != full_pred).sum())
+    print("Cascade on the test set:")
+    print(f"  - Escalation rate: {cascade_stats['escalation_rate']:.2%}")
+    print(f"  - Latency: cascade {cascade_ms:.4f} ms/row (screen {cascade_stats['mean_screen_ms']:.4f}, "
+          f"full model on escalated and audited rows {cascade_stats['mean_full_ms_per_row']:.4f}), "
+          f"full model only: {full_only_ms:.4f} ms/row")
+    print(f"  - Agreement with full model only: {(cascade_pred == full_pred).mean():.4%} "
+          f"(early exits: {1 - disagreements / exits if exits else 1.0:.4%})")
+    print(f"  - Accuracy: cascade {(cascade_pred == y_test).mean():.4f}, full model {(full_pred == y_test).mean():.4f}")
+    cascade.save(str(models_path / 'cascade_screening_model.joblib'))
+
+    # Publish a new registry version; a running API picks it up without a restart
+    registry = ModelRegistry(models_path / 'registry')
+    version = registry.publish(
+        rf_model.model,
+        cascade=cascade,
+        feature_names=list(X_train.columns),
+        class_map={i: str(label) for i, label in enumerate(rf_model.model.classes_)},
+        training_data_hash=dataset_hash(pd.concat([X_train, y_train], axis=1)),
+        training_rows=len(X_train),
+        test_accuracy=float((full_pred == y_test).mean()),
+    )
+    print(f"Published model version {version} to {registry.root}")
+
     # --- LSTM (Structure) ---
     # print("\nLSTM training would be here.")
     # Note: LSTM requires data reshaping (e.g., into sequences)
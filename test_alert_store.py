@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Test SQLite Alert Store Paging, Filters and Write Failures
+"""
+
+import sys
+import os
+import time
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src', 'monitors'))
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src', 'api'))
+
+from alert_store import AlertStore
+
+def make_alert(i):
+    return {
+        'src': f'10.0.0.{i % 4}', 'dst': '192.168.1.10', 'destination_port': 80,
+        'status': 'malicious' if i % 3 == 0 else 'suspicious', 'prediction': i % 5, 'confidence': 0.9,
+        'timestamp': 1000.0 + i,
+    }
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out waiting for the alert writer"
+        time.sleep(0.01)
+
+def ids(alerts):
+    return [alert['id'] for alert in alerts]
+
+def test_alert_store_paging():
+    print("=== Alert Store Paging Test ===")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'alerts.db')
+        store = AlertStore(db_path, hot_size=10, flush_interval=0.01)
+        store.open()
+        for i in range(1, 51):
+            store.add(make_alert(i))
+        store.close()
+
+        # Reopened: ids 41-50 are in the hot tail, everything is in SQLite
+        store = AlertStore(db_path, hot_size=10, flush_interval=0.01)
+        store.open()
+        print(f"   Stats: {store.stats()}")
+        assert ids(store.hot) == list(range(41, 51))
+        assert ids(store.query(limit=5)) == list(range(46, 51))
+        assert ids(store.query(limit=15)) == list(range(36, 51))
+
+        # Forward from a cursor before the hot tail, across the boundary
+        assert ids(store.query(since_id=35, limit=10)) == list(range(36, 46))
+        assert ids(store.query(since_id=45, limit=10)) == list(range(46, 51))
+        # Backward from inside the hot tail into the table
+        assert ids(store.query(before_id=43, limit=5)) == list(range(38, 43))
+        assert ids(store.query(before_id=5, limit=10)) == [1, 2, 3, 4]
+
+        # New alerts join the paging before and after they are written
+        store.add(make_alert(51))
+        assert ids(store.query(since_id=48, limit=10)) == [49, 50, 51]
+        assert ids(store.query(before_id=52, limit=3)) == [49, 50, 51]
+        store.close()
+        assert store.stats()['persisted'] == 1
+
+    print("✅ Cursors page across the hot tail and the table!")
+
+def test_alert_store_filters_and_updates():
+    print("=== Alert Store Filters and Updates Test ===")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = AlertStore(os.path.join(tmp, 'alerts.db'), hot_size=5, flush_interval=0.01)
+        store.open()
+        for i in range(1, 31):
+            store.add(make_alert(i))
+        wait_until(lambda: store.stats()['persisted'] == 30)
+
+        # Hold back the writer: these stay unwritten until it is woken
+        store.flush_interval = 60
+        store.batch_size = 1000
+        time.sleep(0.05)
+        for i in range(31, 41):
+            store.add(make_alert(i))
+        assert store.stats()['pending'] == 10
+
+        malicious = [i for i in range(1, 41) if i % 3 == 0]
+        assert ids(store.query(status='malicious', limit=100)) == malicious
+        assert ids(store.query(status='malicious', since_id=27, limit=100)) == [30, 33, 36, 39]
+        assert ids(store.query(status='malicious', before_id=34, limit=3)) == [27, 30, 33]
+        assert ids(store.query(src='10.0.0.1', start_time=1025, end_time=1037, limit=100)) == [25, 29, 33, 37]
+
+        # Update an alert that is already in the table
+        alert = store.query(since_id=12, limit=1)[0]
+        assert alert['id'] == 13 and alert['status'] == 'suspicious'
+        alert['status'] = 'malicious'
+        alert['count'] = 7
+        store.update(alert)
+        assert 13 in ids(store.query(status='malicious', limit=100))
+        store.close()
+
+        store = AlertStore(os.path.join(tmp, 'alerts.db'), hot_size=5)
+        store.open()
+        print(f"   Stats: {store.stats()}")
+        assert store.stats()['last_id'] == 40
+        updated = store.query(since_id=12, limit=1)[0]
+        assert updated['status'] == 'malicious' and updated['count'] == 7
+        assert ids(store.query(status='malicious', limit=100)) == sorted(malicious + [13])
+        store.close()
+
+    print("✅ Filters see unwritten alerts and updates are persisted!")
+
+def test_alert_store_write_failures():
+    print("=== Alert Store Write Failure Test ===")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = AlertStore(os.path.join(tmp, 'alerts.db'), flush_interval=0.01, write_attempts=3)
+        store.open()
+        failing = [True]
+        row = store._row
+
+        def flaky_row(alert):
+            if failing[0]:
+                raise OSError("disk I/O error")
+            return row(alert)
+        store._row = flaky_row
+
+        # Fails three times, then the batch is dropped from persistence
+        for i in range(1, 6):
+            store.add(make_alert(i))
+        wait_until(lambda: store.stats()['dropped'] == 5)
+        stats = store.stats()
+        print(f"   Stats: {stats}")
+        assert stats['write_failures'] == 3
+        assert stats['persisted'] == 0 and stats['pending'] == 0
+        # Dropped alerts are still served from the hot tail
+        assert ids(store.query(limit=10)) == [1, 2, 3, 4, 5]
+
+        # A failure that clears before the last attempt loses nothing
+        failing[0] = True
+        store.add(make_alert(6))
+        wait_until(lambda: store.stats()['write_failures'] >= 4)
+        failing[0] = False
+        wait_until(lambda: store.stats()['persisted'] == 1)
+        assert store.stats()['dropped'] == 5
+        assert store._writer.is_alive()
+        store.close()
+
+        store = AlertStore(os.path.join(tmp, 'alerts.db'))
+        store.open()
+        assert ids(store.query(since_id=0, limit=10)) == [6]
+        store.close()
+
+    print("✅ Failed writes are retried, then dropped, without stopping the writer!")
+
+def test_alert_store_pending_bound():
+    print("=== Alert Store Pending Bound Test ===")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = AlertStore(os.path.join(tmp, 'alerts.db'), batch_size=10, flush_interval=60, max_pending=50)
+        store.open()
+        time.sleep(0.05)
+        # The writer is idle and the writes fail, so only the bound limits the queue
+        store._row = lambda alert: (_ for _ in ()).throw(OSError("disk full"))
+        store.batch_size = 10 ** 6
+        for i in range(1, 201):
+            store.add(make_alert(i))
+        stats = store.stats()
+        print(f"   Stats: {stats}")
+        assert stats['pending'] <= 50
+        assert stats['dropped'] + stats['pending'] == 200
+        start = time.time()
+        store.close(timeout=0.2)
+        assert time.time() - start < 1.0
+
+    print("✅ Unwritten alerts are bounded and close() does not hang!")
+
+if __name__ == "__main__":
+    test_alert_store_paging()
+    test_alert_store_filters_and_updates()
+    test_alert_store_write_failures()
+    test_alert_store_pending_bound()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Test Parallel Ensemble Timeouts and Fusion
+"""
+
+import sys
+import os
+import time
+import threading
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from models.ensemble_model import EnsembleModel
+
+CLASSES = np.array([0, 1])
+
+class Constant:
+    """Backend answering the same probabilities for every row."""
+    classes_ = CLASSES
+
+    def __init__(self, proba, delay=0.0):
+        self.proba = proba
+        self.delay = delay
+
+    def predict_proba(self, X):
+        if self.delay:
+            time.sleep(self.delay)
+        return np.tile(self.proba, (len(X), 1))
+
+class Stuck:
+    """Backend whose calls block until released."""
+    classes_ = CLASSES
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = 0
+
+    def predict_proba(self, X):
+        self.calls += 1
+        self.release.wait(5)
+        return np.tile([0.0, 1.0], (len(X), 1))
+
+def test_ensemble_stalled_backend():
+    print("=== Ensemble Stalled Backend Test ===")
+
+    stuck = Stuck()
+    ensemble = EnsembleModel({'fast': Constant([0.8, 0.2]), 'stuck': stuck}, CLASSES, timeout=0.05)
+    X = np.zeros((3, 4), dtype=np.float32)
+    try:
+        for _ in range(5):
+            proba = ensemble.predict_proba(X)
+            # Only the healthy backend is fused while the other one is stuck
+            assert np.allclose(proba, [[0.8, 0.2]] * 3)
+        stats = ensemble.stats()
+        print(f"   Stats: {stats}")
+        stuck_stats = stats['backends']['stuck']
+        assert stuck_stats['timeouts'] == 1
+        assert stuck_stats['errors'] == 0
+        # The late call is still running, so the backend gets no new work
+        assert stuck_stats['skipped'] == 4
+        assert stuck.calls == 1
+        assert stats['backends']['fast']['calls'] == 5
+        assert stats['degraded_batches'] == 5
+    finally:
+        stuck.release.set()
+
+    # Once the late call finishes the backend is used again
+    deadline = time.time() + 5
+    while ensemble._stalled and not ensemble._stalled['stuck'].done() and time.time() < deadline:
+        time.sleep(0.01)
+    proba = ensemble.predict_proba(X)
+    assert np.allclose(proba, [[0.4, 0.6]] * 3)
+    assert stuck.calls == 2
+
+    print("✅ A stalled backend is skipped and the others keep answering!")
+
+def test_ensemble_concurrent_callers():
+    print("=== Ensemble Concurrent Callers Test ===")
+
+    # Slower than the callers' spacing but well within the timeout: never skipped
+    ensemble = EnsembleModel({'a': Constant([0.6, 0.4], delay=0.02), 'b': Constant([0.2, 0.8], delay=0.02)},
+                             CLASSES, timeout=1.0)
+    X = np.zeros((2, 4), dtype=np.float32)
+    results = []
+
+    def caller():
+        for _ in range(5):
+            results.append(ensemble.predict_proba(X))
+
+    threads = [threading.Thread(target=caller) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = ensemble.stats()
+    print(f"   Stats: {stats}")
+    assert len(results) == 20
+    assert all(np.allclose(proba, [[0.4, 0.6]] * 2) for proba in results)
+    assert stats['degraded_batches'] == 0
+    for backend in stats['backends'].values():
+        assert backend['calls'] == 20
+        assert backend['skipped'] == 0 and backend['timeouts'] == 0
+
+    print("✅ Concurrent callers do not mark healthy backends as stalled!")
+
+if __name__ == "__main__":
+    test_ensemble_stalled_backend()
+    test_ensemble_concurrent_callers()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test Incremental HTTP Feature Extraction
+"""
+
+import sys
+import os
+import zlib
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src', 'monitors'))
+
+from http_parser import HTTPFeatureExtractor, shannon_entropy
+
+REQUEST = (b"POST /login.php?next=%2Fadmin HTTP/1.1\r\n"
+           b"Host: example.com\r\n"
+           b"User-Agent: sqlmap/1.7\r\n"
+           b"Content-Length: 11\r\n"
+           b"\r\n"
+           b"user=admin\n")
+RESPONSE = b"HTTP/1.1 302 Found\r\nLocation: /admin\r\n\r\n"
+
+def parse(chunks, response_chunks=(), byte_budget=2048):
+    extractor = HTTPFeatureExtractor(byte_budget)
+    state = extractor.new_state()
+    for chunk in chunks:
+        extractor.feed(state, True, chunk)
+    for chunk in response_chunks:
+        extractor.feed(state, False, chunk)
+    return extractor, state
+
+def test_http_request_and_response():
+    print("=== HTTP Request and Response Test ===")
+
+    extractor, state = parse([REQUEST], [RESPONSE])
+    features = extractor.features(state)
+    print(f"   Features: {features}")
+    assert features['http_method'] == 2
+    assert features['http_uri_length'] == len(b'/login.php?next=%2Fadmin')
+    assert features['http_uri_entropy'] == shannon_entropy(b'/login.php?next=%2Fadmin')
+    # Parsing stops at the blank line: the body line is not counted as a header
+    assert features['http_header_count'] == 3
+    assert features['http_user_agent_hash'] == zlib.crc32(b'sqlmap/1.7')
+    assert features['http_response_status'] == 302
+    assert state[True].done and state[True].partial == b''
+    assert extractor.bytes_parsed == len(REQUEST) + len(RESPONSE)
+
+    # Requests may come from either direction of the flow
+    extractor, state = parse([RESPONSE], [REQUEST])
+    assert extractor.features(state) == features
+
+    print("✅ Request and status lines and headers are parsed!")
+
+def test_http_incremental_chunks():
+    print("=== HTTP Incremental Chunk Test ===")
+
+    extractor, state = parse([REQUEST])
+    expected = extractor.features(state)
+    # Every split point, including inside "\r\n" and inside the method token
+    for split in range(1, len(REQUEST)):
+        extractor, state = parse([REQUEST[:split], REQUEST[split:]])
+        assert extractor.features(state) == expected, split
+    # One byte at a time only ever buffers the current line
+    extractor, state = parse([REQUEST[i:i + 1] for i in range(len(REQUEST))])
+    assert extractor.features(state) == expected
+
+    extractor = HTTPFeatureExtractor()
+    state = extractor.new_state()
+    extractor.feed(state, True, REQUEST[:60])
+    assert len(state[True].partial) < 60 and not state[True].done
+
+    print("✅ Chunked input gives the same features as one chunk!")
+
+def test_http_non_http_and_budget():
+    print("=== HTTP Non-HTTP and Byte Budget Test ===")
+
+    # TLS or binary data is given up on immediately without buffering
+    extractor, state = parse([b'\x16\x03\x01\x02\x00\x01\x00\x01\xfc\x03\x03' * 10])
+    assert state[True].done and state[True].partial == b'' and extractor.bytes_parsed == 0
+    # Looks like a method but the request line is malformed
+    extractor, state = parse([b'GET /\r\nHost: x\r\n\r\n'])
+    assert state[True].done and extractor.features(state)['http_method'] == 0
+
+    # The budget stops parsing mid-headers and releases the partial line
+    extractor, state = parse([REQUEST[:30], REQUEST[30:]], byte_budget=60)
+    features = extractor.features(state)
+    assert features['http_method'] == 2 and features['http_header_count'] == 1
+    assert state[True].done and state[True].partial == b''
+    assert extractor.bytes_parsed == 60
+    # Nothing is read after the parser is done
+    extractor.feed(state, True, b'User-Agent: late\r\n')
+    assert extractor.bytes_parsed == 60
+
+    print("✅ Non-HTTP data and the byte budget stop the parser!")
+
+if __name__ == "__main__":
+    test_http_request_and_response()
+    test_http_incremental_chunks()
+    test_http_non_http_and_budget()
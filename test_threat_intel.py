@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test Threat Intel IP/CIDR Matching
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src', 'monitors'))
+
+from threat_intel import ThreatIntelIndex, CIDRMatcher
+
+def test_threat_intel_matching():
+    print("=== Threat Intel Matching Test ===")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        feed_path = os.path.join(tmp, 'indicators.txt')
+        with open(feed_path, 'w') as f:
+            f.write("# test feed\n")
+            f.write("203.0.113.7,botnet-c2\n")
+            f.write("198.51.100.0/24 scanner\n")
+            f.write("198.51.100.128/25 nested\n")
+            f.write("2001:db8::/32 ipv6-range\n")
+            f.write("not-an-ip\n")
+
+        index = ThreatIntelIndex(feed_path, check_interval=0)
+        print(f"   Stats: {index.stats()}")
+
+        assert index.match('203.0.113.7') == 'botnet-c2'
+        assert index.match('203.0.113.8') is None
+        assert index.match('198.51.100.1') == 'scanner'
+        assert index.match('198.51.100.200') == 'nested'
+        assert index.match('2001:db8::1') == 'ipv6-range'
+        assert index.match(None) is None
+        assert index.invalid_count == 1
+
+        # Reload picks up a changed feed
+        with open(feed_path, 'w') as f:
+            f.write("192.0.2.1 new-indicator\n")
+        os.utime(feed_path, (0, 0))
+        assert index.maybe_reload()
+        assert index.match('192.0.2.1') == 'new-indicator'
+        assert index.match('203.0.113.7') is None
+
+    trusted = CIDRMatcher(['10.0.0.0/8', '192.168.0.0/16'])
+    assert '10.1.2.3' in trusted
+    assert '192.168.255.255' in trusted
+    assert '172.16.0.1' not in trusted
+    assert 'garbage' not in trusted
+
+    print("✅ Threat intel matching is working correctly!")
+
+def test_threat_intel_nested_and_adjacent_labels():
+    print("=== Threat Intel Nested/Adjacent Labels Test ===")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        feed_path = os.path.join(tmp, 'indicators.txt')
+        with open(feed_path, 'w') as f:
+            f.write("10.0.0.0/8 big\n")
+            f.write("10.0.0.0/25 botnet\n")
+            f.write("10.0.0.128/25 scanner\n")
+            f.write("10.1.1.1 specific\n")
+            f.write("192.0.2.0/25 left\n")
+            f.write("192.0.2.128/25 right\n")
+            f.write("198.51.100.0/25 same\n")
+            f.write("198.51.100.128/25 same\n")
+            f.write("2001:db8::/32 v6-big\n")
+            f.write("2001:db8::1 v6-specific\n")
+
+        index = ThreatIntelIndex(feed_path, check_interval=0)
+
+        # The most specific indicator wins
+        assert index.match('10.0.0.1') == 'botnet'
+        assert index.match('10.0.0.200') == 'scanner'
+        assert index.match('10.1.1.1') == 'specific'
+        assert index.match('10.1.1.2') == 'big'
+        assert index.match('10.255.255.255') == 'big'
+        assert index.match('2001:db8::1') == 'v6-specific'
+        assert index.match('2001:db8::2') == 'v6-big'
+
+        # Adjacent ranges keep their own labels, and are merged only when labels match
+        assert index.match('192.0.2.127') == 'left'
+        assert index.match('192.0.2.128') == 'right'
+        assert index.match('198.51.100.200') == 'same'
+        assert index.stats()['ranges'] == 11
+
+    print("✅ Nested and adjacent indicator labels are kept!")
+
+if __name__ == "__main__":
+    test_threat_intel_matching()
+    test_threat_intel_nested_and_adjacent_labels()